@@ -0,0 +1,78 @@
+"""
+Reports canonical JSON encode-and-hash throughput for realistic evidence sizes.
+
+"json" is the encoding collectors used before: json.dumps with compact separators, then sha256,
+and is not canonical. "python" and "orjson" are collectors/runtime/canonical.py with each backend,
+encoding and hashing in one call. "dedup" is what emitting deduplicated evidence costs: before, the
+payload was encoded for its digest and again inside the evidence object; now it is encoded once and
+spliced into the object.
+
+Usage:
+    python benchmarks/bench_canonical.py [--sizes-kb 1 64 1024] [--seconds S]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_validation import _evidence, _rate
+from collectors.runtime import canonical
+
+
+def _json_encode(value):
+    body = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()
+
+
+def _dedup_before(evidence):
+    digest = hashlib.sha256(json.dumps(
+        evidence['evidence_payload'], sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    ).encode('utf-8')).hexdigest()
+    return digest, _json_encode(evidence)
+
+
+def _dedup_now(evidence):
+    payload_body, digest = canonical.encode(evidence['evidence_payload'])
+    body = canonical.encode_member(evidence, 'evidence_payload', payload_body)
+    return digest, body, hashlib.sha256(body).hexdigest()
+
+
+def _with_backend(name, function):
+    """
+    Returns function run with the named canonical backend.
+    """
+    def run(*args):
+        saved = canonical._orjson
+        canonical._orjson = False if name == "python" else saved
+        try:
+            return function(*args)
+        finally:
+            canonical._orjson = saved
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes-kb', type=int, nargs='+', default=[1, 64, 1024])
+    parser.add_argument('--seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    backends = ["python"] + (["orjson"] if canonical.backend() == "orjson" else [])
+    print(f"{'size':>7} {'mode':<16} {'encodes/s':>10} {'MB/s':>8}")
+    for size_kb in args.sizes_kb:
+        evidence = _evidence(size_kb)
+        size_mb = len(canonical.dumps(evidence)) / (1024 * 1024)
+        modes = [('json', lambda: _json_encode(evidence)), ('dedup before', lambda: _dedup_before(evidence))]
+        for name in backends:
+            modes.append((name, _with_backend(name, lambda: canonical.encode(evidence))))
+            modes.append((f"dedup {name}", _with_backend(name, lambda: _dedup_now(evidence))))
+        for label, function in modes:
+            rate = _rate(function, args.seconds)
+            print(f"{size_kb:>5}KB {label:<16} {rate:10.0f} {rate * size_mb:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
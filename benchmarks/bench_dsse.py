@@ -0,0 +1,110 @@
+"""
+Reports DSSE signs per second with a keyring and verifies per second with cached verifiers.
+
+Signing compares signing with each key through Envelope.sign, which rebuilds the PAE per key,
+against witness_ingestion.dsse.sign_envelope, which builds it once. Verification compares building
+the public keys from PEM and parsing the envelope for every check against a VerifierCache that
+parses each key once and verifies the stored envelope dicts directly.
+
+Usage:
+    python benchmarks/bench_dsse.py [--keys 1 2 3] [--sizes-kb 1 1024] [--envelopes N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+from securesystemslib.dsse import Envelope
+from securesystemslib.signer import CryptoSigner, SSlibKey
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from witness_ingestion.dsse import PAYLOAD_TYPE, VerifierCache, sign_envelope
+
+
+def _signers(count):
+    """
+    Returns count signers, alternating ed25519 and ECDSA P-256 keys.
+    """
+    signers = []
+    for i in range(count):
+        private_key = ed25519.Ed25519PrivateKey.generate() if i % 2 == 0 else ec.generate_private_key(ec.SECP256R1())
+        signers.append(CryptoSigner(private_key, SSlibKey.from_crypto(private_key.public_key())))
+    return signers
+
+
+def _payload(size):
+    item = {"UserName": "bench-user", "MfaEnabled": True}
+    return json.dumps({"evidence_payload": [item] * max(1, size // 40)}).encode('utf-8')
+
+
+def _sign_per_key(payload, signers):
+    envelope = Envelope(payload, PAYLOAD_TYPE, {})
+    for signer in signers:
+        envelope.sign(signer)
+    return envelope
+
+
+def _rate(function, items):
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def bench_signing(key_counts, sizes_kb, iterations):
+    print(f"{'keys':>4} {'size':>8} {'per-key sign/s':>15} {'single PAE sign/s':>18}")
+    for count in key_counts:
+        signers = _signers(count)
+        for size_kb in sizes_kb:
+            payload = _payload(size_kb * 1024)
+            n = max(5, iterations // max(1, size_kb // 64))
+            per_key = _rate(lambda _: _sign_per_key(payload, signers), range(n))
+            single_pae = _rate(lambda _: sign_envelope(payload, signers), range(n))
+            print(f"{count:>4} {size_kb:>6}KB {per_key:>15.1f} {single_pae:>18.1f}")
+
+
+def bench_verification(envelope_count):
+    signers = _signers(2)
+    pems = [
+        signer._private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        for signer in signers
+    ]
+    envelopes = [sign_envelope(_payload(1024), signers).to_dict() for _ in range(envelope_count)]
+
+    def rebuild_keys(document):
+        keys = [SSlibKey.from_crypto(load_pem_public_key(pem)) for pem in pems]
+        Envelope.from_dict(json.loads(json.dumps(document))).verify(keys, 2)
+
+    rebuilt = _rate(rebuild_keys, envelopes)
+    cache = VerifierCache(pems)
+    start = time.perf_counter()
+    results = list(cache.verify_many(envelopes, threshold=2))
+    cached = len(envelopes) / (time.perf_counter() - start)
+    assert all(isinstance(result, list) for result in results)
+
+    print(f"\nverifying {envelope_count} envelopes with 2 signatures each")
+    print(f"{'keys rebuilt per check':<26} {rebuilt:>10.1f} verifies/s")
+    print(f"{'cached verifiers (bulk)':<26} {cached:>10.1f} verifies/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--keys', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--sizes-kb', type=int, nargs='+', default=[1, 1024])
+    parser.add_argument('--iterations', type=int, default=500, help="Signatures per measurement at 1KB")
+    parser.add_argument('--envelopes', type=int, default=5000)
+    args = parser.parse_args()
+
+    bench_signing(args.keys, args.sizes_kb, args.iterations)
+    bench_verification(args.envelopes)
+
+
+if __name__ == '__main__':
+    main()
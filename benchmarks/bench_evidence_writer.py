@@ -0,0 +1,129 @@
+"""
+Reports bytes stored and PUT requests per 10k evidence items for the two evidence formats.
+
+"json" is one pretty-printed object per put_object, as written by write_to_s3 today. "ndjson" is
+BatchEvidenceWriter's gzip-compressed NDJSON parts plus a manifest. Runs offline against moto.
+
+Usage:
+    python benchmarks/bench_evidence_writer.py [--items N] [--max-records N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import boto3
+from moto import mock_aws
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collectors.runtime.batch_writer import BatchEvidenceWriter
+
+BUCKET_NAME = 'bench-evidence-bucket'
+WRITE_OPERATIONS = ('PutObject', 'CreateMultipartUpload', 'UploadPart', 'CompleteMultipartUpload')
+
+
+def _evidence(i):
+    """
+    Builds a realistic branch protection evidence object.
+    """
+    return {
+        "evidence_id": str(uuid.uuid4()),
+        "collector_name": "github-branch-protection",
+        "collection_timestamp": datetime.now(timezone.utc).isoformat(),
+        "target_account_id": "my-org",
+        "evidence_payload": {
+            "repository": f"repo-{i:05d}",
+            "is_archived": False,
+            "default_branch": "main",
+            "branch_protection_rules": [{
+                "pattern": "main",
+                "isAdminEnforced": True,
+                "requiresApprovingReviews": True,
+                "requiredApprovingReviewCount": 2,
+                "requiresCodeOwnerReviews": i % 2 == 0,
+                "dismissesStaleReviews": True,
+                "requiresStatusChecks": True,
+                "requiresStrictStatusChecks": False,
+                "requiredStatusCheckContexts": ["ci/build", "ci/test", "security/scan"],
+                "requiresLinearHistory": False,
+                "requiresCommitSignatures": i % 3 == 0,
+                "requiresConversationResolution": True,
+                "restrictsPushes": False,
+                "allowsForcePushes": False,
+                "allowsDeletions": False
+            }]
+        },
+        "schema_version": "1.0.0"
+    }
+
+
+def _counting_client():
+    """
+    Returns an S3 client and a dict counting its write requests by operation.
+    """
+    s3 = boto3.client('s3', region_name='us-east-1')
+    counts = {}
+
+    def count(model, **kwargs):
+        if model.name in WRITE_OPERATIONS:
+            counts[model.name] = counts.get(model.name, 0) + 1
+
+    s3.meta.events.register('before-call.s3', count)
+    return s3, counts
+
+
+def _stored_bytes(s3, prefix):
+    total = 0
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        total += sum(obj['Size'] for obj in page.get('Contents', []))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--max-records', type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ.update({'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing'})
+    items = [_evidence(i) for i in range(args.items)]
+
+    with mock_aws():
+        s3, counts = _counting_client()
+        s3.create_bucket(Bucket=BUCKET_NAME)
+
+        start = time.perf_counter()
+        for evidence in items:
+            s3.put_object(
+                Bucket=BUCKET_NAME,
+                Key=f"json/{evidence['evidence_id']}.json",
+                Body=json.dumps(evidence, indent=2),
+                ContentType='application/json'
+            )
+        json_seconds = time.perf_counter() - start
+        json_requests = sum(counts.values())
+        counts.clear()
+
+        start = time.perf_counter()
+        with BatchEvidenceWriter(s3, BUCKET_NAME, 'ndjson', max_records=args.max_records) as writer:
+            for evidence in items:
+                writer.add(evidence)
+        ndjson_seconds = time.perf_counter() - start
+        ndjson_requests = sum(counts.values())
+
+        json_bytes = _stored_bytes(s3, 'json/')
+        ndjson_bytes = _stored_bytes(s3, 'ndjson/')
+
+    scale = 10000 / args.items
+    print(f"{'format':<8} {'bytes/10k':>12} {'requests/10k':>13} {'seconds':>8}")
+    print(f"{'json':<8} {json_bytes * scale:12.0f} {json_requests * scale:13.0f} {json_seconds:8.2f}")
+    print(f"{'ndjson':<8} {ndjson_bytes * scale:12.0f} {ndjson_requests * scale:13.0f} {ndjson_seconds:8.2f}")
+    print(f"bytes reduced {json_bytes / ndjson_bytes:.1f}x, requests reduced {json_requests / ndjson_requests:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+Drives the ingestion Lambda at a target event rate against the local Archivista stand-in.
+
+Synthetic S3 events are generated open-loop: event i is due at i / --rate seconds, whether or not
+earlier invocations have finished, and up to --invokers run at once, like warm Lambda containers.
+Uploads go over real HTTP to witness_ingestion.archivista_stub, which adds the configured latency,
+errors and throttling; S3 and Secrets Manager are moto. Records reported as batchItemFailures are
+redelivered after --retry-delay seconds, like an SQS queue, until they have been received
+--max-receives times. With --redeliver event, the whole event is redelivered when any record fails,
+like the retries of an asynchronous S3 invocation.
+
+The report gives achieved throughput, invocation latency percentiles (handler time, and time from
+when the event was due, which includes waiting for an invoker), and retry amplification: upload
+requests and signatures per record, redeliveries and records given up on. Run with --ledger to see
+how the ingestion ledger changes amplification.
+
+Usage:
+    python benchmarks/bench_ingestion_load.py [--rate 20] [--duration 10] [--batch-size 10]
+        [--payload-kb 4] [--invokers 4] [--latency-ms 40] [--jitter-ms 20] [--error-rate 0.05]
+        [--throttle-rps 150] [--max-in-flight N] [--max-receives 3] [--retry-delay 0.5]
+        [--redeliver failed|event] [--ledger] [--seed 1] [--output results.json]
+"""
+import argparse
+import contextlib
+import functools
+import heapq
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+
+from benchmarks.suite import percentile
+
+BUCKET_NAME = 'bench-evidence-bucket'
+KB = 1024
+PERCENTILES = (50, 90, 99)
+
+
+def _attestation(index, size):
+    """
+    Builds a schema-conforming in-toto Statement of roughly size bytes, unique per index.
+    """
+    statement = {
+        "_type": "https://in-toto.io/Statement/v1",
+        "subject": [{"name": f"bench-artifact-{index}", "digest": {"sha256": "deadbeef"}}],
+        "predicateType": "https://scoutos.dev/evidence/v1",
+        "predicate": {
+            "evidence_id": str(uuid.UUID(int=index)),
+            "collector_name": "aws-iam-password-policy",
+            "collection_timestamp": "2025-10-13T19:18:00Z",
+            "target_account_id": "123456789012",
+            "evidence_payload": {"index": index, "padding": ""},
+            "schema_version": "1.0.0"
+        }
+    }
+    padding = max(0, size - len(json.dumps(statement)))
+    statement["predicate"]["evidence_payload"]["padding"] = "x" * padding
+    return json.dumps(statement).encode('utf-8')
+
+
+def _setup(args, stub_url):
+    """
+    Creates the bucket, attestations and signing key. Returns the events, each a list of records.
+    """
+    import boto3
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+
+    pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode('utf-8')
+    secret = boto3.client('secretsmanager').create_secret(Name='bench-signing-key', SecretString=pem)
+    os.environ.update({'ARCHIVISTA_URL': stub_url, 'SIGNING_KEY_ARN': secret['ARN']})
+
+    s3 = boto3.client('s3')
+    s3.create_bucket(Bucket=BUCKET_NAME)
+    event_count = max(1, int(args.rate * args.duration))
+    events = []
+    for event_index in range(event_count):
+        records = []
+        for position in range(args.batch_size):
+            index = event_index * args.batch_size + position
+            key = f"evidence/load-{index:08d}.json"
+            etag = s3.put_object(Bucket=BUCKET_NAME, Key=key, Body=_attestation(index, args.payload_kb * KB))['ETag']
+            records.append({'s3': {'bucket': {'name': BUCKET_NAME}, 'object': {'key': key, 'eTag': etag}}})
+        events.append(records)
+    return events
+
+
+class LoadRun:
+    """
+    Schedules events and their redeliveries, invokes the handler and records what happened.
+    """
+
+    def __init__(self, handler, events, args):
+        self.handler = handler
+        self.args = args
+        self.lock = threading.Lock()
+        # (due time, sequence, records, receive count)
+        self.queue = [(i / args.rate, i, records, 1) for i, records in enumerate(events)]
+        heapq.heapify(self.queue)
+        self.sequence = len(events)
+        self.in_flight = 0
+        self.handler_ms = []
+        self.response_ms = []
+        self.invocations = 0
+        self.redeliveries = 0
+        self.redelivered_records = 0
+        self.dead_lettered = 0
+        self.errors = 0
+
+    def _invoke(self, started_at, due, records, receive_count):
+        start = time.perf_counter()
+        try:
+            result = self.handler({'Records': records}, None)
+            failed = {failure['itemIdentifier'] for failure in result['batchItemFailures']}
+        except Exception:
+            with self.lock:
+                self.errors += 1
+            failed = {record['s3']['object']['key'] for record in records}
+        end = time.perf_counter()
+
+        with self.lock:
+            self.in_flight -= 1
+            self.invocations += 1
+            self.handler_ms.append((end - start) * 1000)
+            self.response_ms.append((end - (started_at + due)) * 1000)
+            retry = [record for record in records if record['s3']['object']['key'] in failed]
+            if not retry:
+                return
+            if receive_count >= self.args.max_receives:
+                self.dead_lettered += len(retry)
+                return
+            if self.args.redeliver == 'event':
+                retry = records
+            self.redeliveries += 1
+            self.redelivered_records += len(retry)
+            heapq.heappush(self.queue, (end - started_at + self.args.retry_delay, self.sequence, retry, receive_count + 1))
+            self.sequence += 1
+
+    def run(self):
+        """
+        Runs until every event has been handled or given up on. Returns the wall time in seconds.
+        """
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.invokers) as executor:
+            while True:
+                with self.lock:
+                    if not self.queue and not self.in_flight:
+                        break
+                    next_due = self.queue[0][0] if self.queue else None
+                    now = time.perf_counter() - started_at
+                    if next_due is not None and next_due <= now:
+                        due, _, records, receive_count = heapq.heappop(self.queue)
+                        self.in_flight += 1
+                        executor.submit(self._invoke, started_at, due, records, receive_count)
+                        continue
+                time.sleep(min(0.005, max(0.0, next_due - now)) if next_due is not None else 0.005)
+        return time.perf_counter() - started_at
+
+
+def run_load(args):
+    """
+    Runs the load test and returns its report.
+    """
+    # The handler sizes its thread and connection pools from the environment at import
+    os.environ.update({
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_SESSION_TOKEN': 'testing',
+        'AWS_REGION': 'us-east-1',
+        'AWS_DEFAULT_REGION': 'us-east-1',
+        'INGESTION_CONCURRENCY': str(args.concurrency)
+    })
+    import logging
+    logging.disable(logging.INFO)
+
+    from moto import mock_aws
+    from witness_ingestion import handler as ingestion
+    from witness_ingestion.archivista_stub import ArchivistaStub
+
+    signatures = []
+    sign_envelope = ingestion.sign_envelope
+
+    @functools.wraps(sign_envelope)
+    def counting_sign_envelope(payload, signers, *rest):
+        signatures.append(len(signers))
+        return sign_envelope(payload, signers, *rest)
+
+    stub = ArchivistaStub(
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate,
+        throttle_rps=args.throttle_rps, max_in_flight=args.max_in_flight, seed=args.seed
+    )
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock_aws())
+        stack.enter_context(stub)
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        if args.ledger:
+            os.environ['INGESTION_LEDGER_PATH'] = os.path.join(directory, 'ledger.sqlite3')
+        else:
+            os.environ.pop('INGESTION_LEDGER_PATH', None)
+        os.environ.pop('INGESTION_LEDGER_TABLE', None)
+        ingestion.sign_envelope = counting_sign_envelope
+        stack.callback(setattr, ingestion, 'sign_envelope', sign_envelope)
+
+        events = _setup(args, stub.url)
+        records = sum(len(event) for event in events)
+        load = LoadRun(ingestion.handler, events, args)
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = load.run()
+        upstream = stub.stats()
+
+    uploaded = upstream['stored_payloads']
+    report = {
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'events': len(events),
+        'records': records,
+        'elapsed_seconds': round(elapsed, 3),
+        'offered_events_per_second': args.rate,
+        'achieved_events_per_second': round(len(events) / elapsed, 2),
+        'records_uploaded_per_second': round(uploaded / elapsed, 2),
+        'invocations': load.invocations,
+        'invocation_errors': load.errors,
+        'records_uploaded': uploaded,
+        'records_dead_lettered': load.dead_lettered,
+        'redeliveries': load.redeliveries,
+        'redelivered_records': load.redelivered_records,
+        'upload_requests': upstream['requests'],
+        'signatures': sum(signatures),
+        # Work per record: 1.0 means every record was posted (or signed) exactly once
+        'retry_amplification': round(upstream['requests'] / records, 3),
+        'signing_amplification': round(len(signatures) / records, 3),
+        'duplicate_uploads': upstream['duplicates'],
+        'archivista': upstream
+    }
+    for name, values in (('handler', load.handler_ms), ('response', load.response_ms)):
+        for p in PERCENTILES:
+            report[f'{name}_p{p}_ms'] = round(percentile(values, p), 2)
+    return report
+
+
+def _print_report(report):
+    print(f"events {report['events']} x {report['settings']['batch_size']} records "
+          f"in {report['elapsed_seconds']:.2f}s "
+          f"({report['achieved_events_per_second']:.1f} of {report['offered_events_per_second']} events/s offered, "
+          f"{report['records_uploaded_per_second']:.1f} records/s uploaded)")
+    print("handler  " + "  ".join(f"p{p}={report[f'handler_p{p}_ms']:.1f}ms" for p in PERCENTILES))
+    print("response " + "  ".join(f"p{p}={report[f'response_p{p}_ms']:.1f}ms" for p in PERCENTILES))
+    print(f"uploads  {report['records_uploaded']} of {report['records']} records, "
+          f"{report['records_dead_lettered']} dead-lettered, {report['redeliveries']} redeliveries "
+          f"of {report['redelivered_records']} records")
+    print(f"retry amplification {report['retry_amplification']:.3f} upload requests/record, "
+          f"{report['signing_amplification']:.3f} signings/record, {report['duplicate_uploads']} duplicate uploads")
+    print(f"archivista statuses {report['archivista']['statuses']}, peak {report['archivista']['peak_in_flight']} in flight")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rate', type=float, default=20, help="Events offered per second")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds of events to offer")
+    parser.add_argument('--batch-size', type=int, default=10, help="Records per event")
+    parser.add_argument('--payload-kb', type=int, default=4, help="Approximate attestation size")
+    parser.add_argument('--invokers', type=int, default=4, help="Concurrent handler invocations")
+    parser.add_argument('--concurrency', type=int, default=8, help="INGESTION_CONCURRENCY of the handler")
+    parser.add_argument('--latency-ms', type=float, default=40)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--throttle-rps', type=float, default=None)
+    parser.add_argument('--max-in-flight', type=int, default=None)
+    parser.add_argument('--max-receives', type=int, default=3, help="Deliveries of a record before it is given up on")
+    parser.add_argument('--retry-delay', type=float, default=0.5, help="Seconds before a failed record is redelivered")
+    parser.add_argument('--redeliver', choices=('failed', 'event'), default='failed',
+                        help="Redeliver only the failed records (SQS) or the whole event (async S3)")
+    parser.add_argument('--ledger', action='store_true', help="Run with a SQLite ingestion ledger")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = run_load(args)
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
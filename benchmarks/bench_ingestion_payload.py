@@ -0,0 +1,121 @@
+"""
+Measures memory and throughput of signing multi-MB attestations in the ingestion Lambda.
+
+Compares the in-memory path used by the handler (get_object, sign the stored bytes) against the
+previous disk path (download_file to /tmp, json.load, json.dumps, sign). Runs entirely offline
+against moto and a mocked Archivista endpoint.
+
+Usage:
+    python benchmarks/bench_ingestion_payload.py [--sizes-mb 1 4 16] [--iterations N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import responses
+from moto import mock_aws
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from securesystemslib.dsse import Envelope
+from securesystemslib.signer import CryptoSigner, SSlibKey
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from witness_ingestion import handler as ingestion
+
+ARCHIVISTA_URL = 'https://archivista.example.test'
+BUCKET_NAME = 'bench-evidence-bucket'
+
+
+def _make_attestation(size_mb):
+    """
+    Builds an in-toto Statement whose predicate payload is roughly size_mb megabytes.
+    """
+    item = {"UserName": "bench-user", "Arn": "arn:aws:iam::123456789012:user/bench-user", "MfaEnabled": True}
+    item_size = len(json.dumps(item))
+    items = [item] * max(1, (size_mb * 1024 * 1024) // item_size)
+    return json.dumps({
+        "_type": "https://in-toto.io/Statement/v1",
+        "subject": [{"name": "bench-artifact", "digest": {"sha256": "deadbeef"}}],
+        "predicateType": "https://scoutos.dev/evidence/v1",
+        "predicate": {"evidence_id": "bench-evidence", "evidence_payload": items}
+    }, indent=2).encode('utf-8')
+
+
+def _ingest_via_disk(s3, signer, session, archivista_url, bucket_name, object_key):
+    """
+    The previous ingestion path: download to /tmp, parse and re-serialize before signing.
+    """
+    local_attestation_path = os.path.join(tempfile.gettempdir(), os.path.basename(object_key))
+    s3.download_file(bucket_name, object_key, local_attestation_path)
+    with open(local_attestation_path, 'r') as f:
+        attestation_statement = json.load(f)
+    os.remove(local_attestation_path)
+
+    payload = json.dumps(attestation_statement).encode('utf-8')
+    envelope = Envelope(payload, "application/vnd.in-toto+json", {})
+    envelope.sign(signer)
+    session.post(f"{archivista_url}/upload", json=envelope.to_dict()).raise_for_status()
+
+
+def _ingest_in_memory(s3, signer, session, archivista_url, bucket_name, object_key):
+    """
+    The handler's path: read the stored bytes and sign them as-is.
+    """
+    payload = ingestion._read_object(s3, bucket_name, object_key)
+    ingestion._sign_and_upload([signer], session, archivista_url, object_key, payload)
+
+
+def _measure(ingest, s3, signer, session, object_key, size_bytes, iterations):
+    """
+    Returns (MB/s, peak traced memory in MB) for ingesting object_key repeatedly.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            ingest(s3, signer, session, ARCHIVISTA_URL, BUCKET_NAME, object_key)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (size_bytes * iterations / (1024 * 1024)) / elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--iterations', type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.update({
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_SESSION_TOKEN': 'testing',
+        'AWS_REGION': 'us-east-1'
+    })
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    signer = CryptoSigner(private_key, SSlibKey.from_crypto(private_key.public_key()))
+
+    with mock_aws(), responses.RequestsMock() as upstream:
+        upstream.add(responses.POST, f"{ARCHIVISTA_URL}/upload", json={'message': 'success'}, status=200)
+        s3 = ingestion._get_client('s3')
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        session = ingestion._get_http_session()
+
+        print(f"{'size':>6} {'path':<9} {'MB/s':>8} {'peak MB':>9}")
+        for size_mb in args.sizes_mb:
+            body = _make_attestation(size_mb)
+            object_key = f"evidence/bench-{size_mb}mb.json"
+            s3.put_object(Bucket=BUCKET_NAME, Key=object_key, Body=body)
+            for label, ingest in (('disk', _ingest_via_disk), ('in-memory', _ingest_in_memory)):
+                throughput, peak = _measure(ingest, s3, signer, session, object_key, len(body), args.iterations)
+                print(f"{size_mb:>4}MB {label:<9} {throughput:8.1f} {peak:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Compares cold and warm invocation cost of the ingestion Lambda's signer setup.
+
+A cold invocation starts with empty module caches, so it creates boto3 clients, fetches the
+signing key from Secrets Manager and parses it. A warm invocation reuses the cached signer.
+Runs entirely offline against moto and a mocked Archivista endpoint.
+
+Usage:
+    python benchmarks/bench_ingestion_signer.py [--iterations N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import boto3
+import responses
+from moto import mock_aws
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from witness_ingestion import handler as ingestion
+
+ARCHIVISTA_URL = 'https://archivista.example.test'
+BUCKET_NAME = 'bench-evidence-bucket'
+OBJECT_KEY = 'evidence/bench-attestation.json'
+
+
+def _setup_environment():
+    """
+    Creates the mock bucket, attestation and signing key secret.
+    """
+    os.environ.update({
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_SESSION_TOKEN': 'testing',
+        'AWS_REGION': 'us-east-1',
+        'ARCHIVISTA_URL': ARCHIVISTA_URL
+    })
+    s3 = boto3.client('s3', region_name='us-east-1')
+    s3.create_bucket(Bucket=BUCKET_NAME)
+    s3.put_object(Bucket=BUCKET_NAME, Key=OBJECT_KEY, Body=json.dumps({
+        "_type": "https://in-toto.io/Statement/v1",
+        "subject": [{"name": "bench-artifact", "digest": {"sha256": "deadbeef"}}],
+        "predicateType": "https://scoutos.dev/evidence/v1",
+        "predicate": {"evidence_id": "bench-evidence"}
+    }))
+
+    pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    secretsmanager = boto3.client('secretsmanager', region_name='us-east-1')
+    secret = secretsmanager.create_secret(Name='bench-signing-key', SecretString=pem.decode('utf-8'))
+    os.environ['SIGNING_KEY_ARN'] = secret['ARN']
+
+
+def _time_invocations(event, iterations, cold):
+    """
+    Runs the handler repeatedly and returns per-invocation latencies in milliseconds.
+    """
+    latencies = []
+    for _ in range(iterations):
+        if cold:
+            ingestion._clients.clear()
+            ingestion._signer_cache.clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ingestion.handler(event, None)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _summarize(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(f"{label:<6} n={len(ordered):<5} mean={statistics.mean(ordered):8.2f}ms "
+          f"p50={statistics.median(ordered):8.2f}ms p95={p95:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    event = {'Records': [{'s3': {'bucket': {'name': BUCKET_NAME}, 'object': {'key': OBJECT_KEY}}}]}
+
+    with mock_aws(), responses.RequestsMock() as upstream:
+        upstream.add(responses.POST, f"{ARCHIVISTA_URL}/upload", json={'message': 'success'}, status=200)
+        _setup_environment()
+
+        # Prime imports and moto's backends so neither run pays one-off setup cost
+        _time_invocations(event, 1, cold=True)
+
+        cold = _time_invocations(event, args.iterations, cold=True)
+        warm = _time_invocations(event, args.iterations, cold=False)
+
+    _summarize('cold', cold)
+    _summarize('warm', warm)
+    print(f"warm speedup (p50): {statistics.median(cold) / statistics.median(warm):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
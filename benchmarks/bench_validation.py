@@ -0,0 +1,104 @@
+"""
+Reports evidence schema validations per second for realistic payload sizes.
+
+"uncached" is jsonschema.validate(), which checks and compiles the schema on every call. "compiled"
+is the process-cached validator used by collectors and the ingestion Lambda, on parsed evidence.
+"statement" is validate_batch() on raw attestation bytes, as ingestion runs it, including parsing.
+
+Usage:
+    python benchmarks/bench_validation.py [--sizes-kb 1 64 1024] [--seconds S]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import jsonschema
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collectors.runtime import validation
+
+
+def _evidence(size_kb):
+    """
+    Builds an evidence object whose payload is a list of IAM user records of roughly size_kb.
+    """
+    users = []
+    while len(json.dumps(users)) < size_kb * 1024:
+        i = len(users)
+        users.append({
+            "UserName": f"user-{i:06d}",
+            "Arn": f"arn:aws:iam::123456789012:user/user-{i:06d}",
+            "CreateDate": "2024-03-01T12:00:00+00:00",
+            "PasswordLastUsed": "2025-10-01T08:30:00+00:00",
+            "MfaEnabled": i % 4 != 0,
+            "AccessKeys": [{"AccessKeyId": f"AKIA{i:016d}", "Status": "Active"}]
+        })
+    return {
+        "evidence_id": str(uuid.uuid4()),
+        "collector_name": "aws-iam-users",
+        "collection_timestamp": datetime.now(timezone.utc).isoformat(),
+        "target_account_id": "123456789012",
+        "evidence_payload": {"users": users},
+        "schema_version": "1.0.0"
+    }
+
+
+def _statement_bytes(evidence):
+    return json.dumps({
+        "_type": "https://in-toto.io/Statement/v1",
+        "subject": [{"name": "aws-iam-users", "digest": {"sha256": "deadbeef"}}],
+        "predicateType": "https://scoutos.dev/evidence/v1",
+        "predicate": evidence
+    }).encode('utf-8')
+
+
+def _rate(function, seconds):
+    """
+    Returns calls per second of function() over roughly the given wall time.
+    """
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes-kb', type=int, nargs='+', default=[1, 64, 1024])
+    parser.add_argument('--seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(validation.schema_path()) as f:
+        predicate_schema = json.load(f)['properties']['predicate']
+
+    start = time.perf_counter()
+    validation.get_validator("evidence")
+    validation.get_validator("statement")
+    print(f"compile both validators: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"{'size':>7} {'mode':<10} {'validations/s':>14} {'MB/s':>8}")
+    for size_kb in args.sizes_kb:
+        evidence = _evidence(size_kb)
+        statement = _statement_bytes(evidence)
+        size_mb = len(statement) / (1024 * 1024)
+        modes = (
+            ('uncached', lambda: jsonschema.validate(evidence, predicate_schema, format_checker=validation._format_checker())),
+            ('compiled', lambda: validation.validate_evidence(evidence)),
+            ('statement', lambda: validation.validate_batch([statement]))
+        )
+        for label, function in modes:
+            rate = _rate(function, args.seconds)
+            print(f"{size_kb:>5}KB {label:<10} {rate:14.0f} {rate * size_mb:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,419 @@
+"""
+Runs the offline benchmark suite for the ingestion Lambda and the collector handlers.
+
+Every scenario runs in a fresh Python process against moto and a mocked HTTP upstream (`responses`),
+so import time, the first (cold) invocation and peak RSS are measured the way a new Lambda
+container sees them. The handler is then invoked repeatedly to get warm latency percentiles and
+throughput.
+
+Scenarios:
+    ingestion   witness_ingestion.handler.handler on synthetic S3 events of 1 to 1000 records with
+                attestations of 1KB to 10MB. Batches larger than --max-batch-mb are skipped.
+    aws_iam     the IAM password policy collector for one account and fanned out over many.
+    github      the GitHub collector in repository mode and in organization mode (per-repo and
+                batched layouts).
+
+Results are written as JSON with the commit, interpreter and machine they were measured on.
+Pass an earlier results file to --compare to print the change in median latency and peak RSS.
+moto's request handling and stored objects are part of what is measured; compare runs made on the
+same machine.
+
+Usage:
+    python benchmarks/suite.py [--quick] [--only ingestion,github] [--iterations N]
+                               [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO_ROOT)
+
+BUCKET_NAME = 'bench-evidence-bucket'
+ARCHIVISTA_URL = 'https://archivista.example.test'
+GITHUB_API_URL = 'https://github.example.test'
+KB = 1024
+MB = 1024 * 1024
+
+RECORD_COUNTS = [1, 10, 100, 1000]
+PAYLOAD_SIZES = [1 * KB, 100 * KB, 1 * MB, 10 * MB]
+QUICK_RECORD_COUNTS = [1, 100]
+QUICK_PAYLOAD_SIZES = [1 * KB, 1 * MB]
+FAN_OUT_ACCOUNTS = 25
+ORGANIZATION_REPOSITORIES = 500
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of values, interpolating linearly between the closest ranks.
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (MB if sys.platform == 'darwin' else KB)
+
+
+def _format_size(size):
+    return f"{size // MB}MB" if size >= MB else f"{size // KB}KB"
+
+
+def _aws_environment(**variables):
+    os.environ.update({
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_SESSION_TOKEN': 'testing',
+        'AWS_REGION': 'us-east-1',
+        'AWS_DEFAULT_REGION': 'us-east-1',
+        'EVIDENCE_BUCKET': BUCKET_NAME
+    })
+    os.environ.update(variables)
+
+
+# --------------------------------------------------------------------------------------------------
+# Scenario setup. Each returns (invoke, records, payload bytes per invocation).
+# --------------------------------------------------------------------------------------------------
+def _attestation(size):
+    """
+    Builds a schema-conforming in-toto Statement of roughly size bytes.
+    """
+    statement = {
+        "_type": "https://in-toto.io/Statement/v1",
+        "subject": [{"name": "bench-artifact", "digest": {"sha256": "deadbeef"}}],
+        "predicateType": "https://scoutos.dev/evidence/v1",
+        "predicate": {
+            "evidence_id": "a1b2c3d4-e5f6-7890-1234-567890abcdef",
+            "collector_name": "aws-iam-password-policy",
+            "collection_timestamp": "2025-10-13T19:18:00Z",
+            "target_account_id": "123456789012",
+            "evidence_payload": {"users": []},
+            "schema_version": "1.0.0"
+        }
+    }
+    item = {"UserName": "bench-user", "Arn": "arn:aws:iam::123456789012:user/bench-user", "MfaEnabled": True}
+    item_size = len(json.dumps(item)) + 2
+    count = max(0, (size - len(json.dumps(statement))) // item_size)
+    statement["predicate"]["evidence_payload"]["users"] = [item] * count
+    return json.dumps(statement).encode('utf-8')
+
+
+def _setup_ingestion(stack, params):
+    import boto3
+    import responses
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+    from witness_ingestion.handler import handler
+
+    upstream = stack.enter_context(responses.RequestsMock(assert_all_requests_are_fired=False))
+    upstream.add(responses.POST, f"{ARCHIVISTA_URL}/upload", json={'message': 'success'}, status=200)
+
+    pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode('utf-8')
+    secret = boto3.client('secretsmanager').create_secret(Name='bench-signing-key', SecretString=pem)
+    os.environ.update({'ARCHIVISTA_URL': ARCHIVISTA_URL, 'SIGNING_KEY_ARN': secret['ARN']})
+
+    s3 = boto3.client('s3')
+    s3.create_bucket(Bucket=BUCKET_NAME)
+    body = _attestation(params['payload_bytes'])
+    records = []
+    for i in range(params['records']):
+        key = f"evidence/bench-{i:05d}.json"
+        s3.put_object(Bucket=BUCKET_NAME, Key=key, Body=body)
+        records.append({'s3': {'bucket': {'name': BUCKET_NAME}, 'object': {'key': key}}})
+    event = {'Records': records}
+
+    def invoke():
+        result = handler(event, None)
+        if result['batchItemFailures']:
+            raise RuntimeError(f"{len(result['batchItemFailures'])} records failed")
+
+    return invoke, params['records'], len(body) * params['records']
+
+
+def _setup_aws_iam(stack, params):
+    import boto3
+    from collectors.aws_iam.collector import handler
+
+    boto3.client('s3').create_bucket(Bucket=BUCKET_NAME)
+    accounts = params['accounts']
+    if accounts == 1:
+        boto3.client('iam').update_account_password_policy(MinimumPasswordLength=14)
+        event = {}
+    else:
+        sts = boto3.client('sts')
+        account_ids = [f"{100000000000 + i}" for i in range(accounts)]
+        for account_id in account_ids:
+            credentials = sts.assume_role(
+                RoleArn=f"arn:aws:iam::{account_id}:role/scoutos-iam-collector-role", RoleSessionName='bench-setup'
+            )['Credentials']
+            boto3.client(
+                'iam',
+                aws_access_key_id=credentials['AccessKeyId'],
+                aws_secret_access_key=credentials['SecretAccessKey'],
+                aws_session_token=credentials['SessionToken']
+            ).update_account_password_policy(MinimumPasswordLength=14)
+        event = {'accounts': account_ids}
+
+    def invoke():
+        result = handler(event, None)
+        if result['status'] != 'success':
+            raise RuntimeError(f"Collector returned {result}")
+
+    return invoke, accounts, None
+
+
+def _setup_github(stack, params):
+    import boto3
+    import responses
+    from collectors.github.collector import handler
+
+    boto3.client('s3').create_bucket(Bucket=BUCKET_NAME)
+    boto3.client('secretsmanager').create_secret(Name='github-token', SecretString=json.dumps({'GITHUB_TOKEN': 'bench'}))
+    upstream = stack.enter_context(responses.RequestsMock(assert_all_requests_are_fired=False))
+
+    repositories = params['repositories']
+    if not repositories:
+        os.environ.update({'COLLECTION_MODE': 'repository', 'GITHUB_REPO': 'bench-repo'})
+        upstream.add(
+            responses.GET, f"{GITHUB_API_URL}/repos/bench-org/bench-repo/branches/main/protection",
+            json={"required_status_checks": {"strict": True, "contexts": ["ci"]}, "enforce_admins": {"enabled": True}}
+        )
+        records = 1
+    else:
+        os.environ.update({'COLLECTION_MODE': 'organization', 'EVIDENCE_LAYOUT': params['layout']})
+        nodes = [
+            {
+                "name": f"repo-{i:05d}",
+                "isArchived": False,
+                "defaultBranchRef": {"name": "main"},
+                "branchProtectionRules": {"nodes": [{"pattern": "main", "requiresApprovingReviews": True}]}
+            }
+            for i in range(repositories)
+        ]
+
+        def graphql(request):
+            variables = json.loads(request.body)['variables']
+            start = int(variables['cursor'] or 0)
+            end = start + variables['pageSize']
+            return 200, {}, json.dumps({"data": {"repositoryOwner": {"repositories": {
+                "pageInfo": {"hasNextPage": end < len(nodes), "endCursor": str(end)},
+                "nodes": nodes[start:end]
+            }}}})
+
+        upstream.add_callback(responses.POST, f"{GITHUB_API_URL}/graphql", callback=graphql,
+                              content_type='application/json')
+        records = repositories
+
+    def invoke():
+        result = handler({}, None)
+        if result['status'] != 'success':
+            raise RuntimeError(f"Collector returned {result}")
+
+    return invoke, records, None
+
+
+SCENARIOS = {
+    'ingestion': ('witness_ingestion.handler', _setup_ingestion, {}),
+    'aws_iam': ('collectors.aws_iam.collector', _setup_aws_iam, {'TARGET_ACCOUNT_ID': '123456789012'}),
+    'github': ('collectors.github.collector', _setup_github, {
+        'TARGET_ACCOUNT_ID': 'bench-org', 'SECRET_NAME': 'github-token', 'GITHUB_API_URL': GITHUB_API_URL
+    })
+}
+
+
+def run_scenario(scenario):
+    """
+    Runs one scenario in this process and returns its measurements. Call in a fresh process.
+    """
+    module_name, setup, environment = SCENARIOS[scenario['kind']]
+    _aws_environment(**environment)
+    # Keep INFO logging and progress prints of the handlers out of the measurements
+    import logging
+    logging.disable(logging.INFO)
+
+    start = time.perf_counter()
+    importlib.import_module(module_name)
+    import_ms = (time.perf_counter() - start) * 1000
+
+    from moto import mock_aws
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock_aws())
+        invoke, records, payload_bytes = setup(stack, scenario['params'])
+        setup_peak_rss_mb = _peak_rss_mb()
+
+        latencies = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(scenario['iterations'] + 1):
+                start = time.perf_counter()
+                invoke()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    cold_ms, warm = latencies[0], latencies[1:]
+    median_seconds = percentile(warm, 50) / 1000
+    result = {
+        "import_ms": round(import_ms, 3),
+        "cold_ms": round(cold_ms, 3),
+        "latency_ms": dict(
+            {f"p{p}": round(percentile(warm, p), 3) for p in PERCENTILES},
+            min=round(min(warm), 3), max=round(max(warm), 3), mean=round(sum(warm) / len(warm), 3)
+        ),
+        "throughput": {"records_per_second": round(records / median_seconds, 1)},
+        "setup_peak_rss_mb": round(setup_peak_rss_mb, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1)
+    }
+    if payload_bytes:
+        result["throughput"]["mb_per_second"] = round(payload_bytes / MB / median_seconds, 2)
+    return result
+
+
+def build_scenarios(kinds, quick, iterations, max_batch_bytes):
+    """
+    Returns the scenarios to run, each {id, kind, params, iterations}, and the skipped scenario IDs.
+    """
+    scenarios = []
+    skipped = []
+
+    def add(kind, name, params):
+        scenarios.append({"id": f"{kind}/{name}", "kind": kind, "params": params, "iterations": iterations})
+
+    if 'ingestion' in kinds:
+        for records in (QUICK_RECORD_COUNTS if quick else RECORD_COUNTS):
+            for size in (QUICK_PAYLOAD_SIZES if quick else PAYLOAD_SIZES):
+                name = f"records={records}/payload={_format_size(size)}"
+                if records * size > max_batch_bytes:
+                    skipped.append(f"ingestion/{name}")
+                    continue
+                add('ingestion', name, {"records": records, "payload_bytes": size})
+    if 'aws_iam' in kinds:
+        add('aws_iam', 'accounts=1', {"accounts": 1})
+        add('aws_iam', f"accounts={FAN_OUT_ACCOUNTS}", {"accounts": FAN_OUT_ACCOUNTS})
+    if 'github' in kinds:
+        repositories = 100 if quick else ORGANIZATION_REPOSITORIES
+        add('github', 'repository', {"repositories": 0})
+        for layout in ('per_repo', 'batched'):
+            add('github', f"organization/repositories={repositories}/layout={layout}",
+                {"repositories": repositories, "layout": layout})
+    return scenarios, skipped
+
+
+def _run_in_subprocess(scenario, timeout):
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--scenario', json.dumps(scenario)],
+        capture_output=True, text=True, timeout=timeout, cwd=REPO_ROOT
+    )
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f"exit {process.returncode}"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def _git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=REPO_ROOT, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                                    text=True, cwd=REPO_ROOT, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {"commit": commit, "dirty": dirty}
+
+
+def compare(results, baseline):
+    """
+    Prints the change in median latency and peak RSS of every scenario present in both runs.
+    """
+    previous = {result['id']: result for result in baseline['results'] if 'error' not in result}
+    commit = (baseline.get('git') or {}).get('commit', 'baseline')[:12]
+    print(f"\nCompared with {commit}:")
+    print(f"{'scenario':<58} {'p50 ms':>10} {'change':>8} {'peak MB':>9} {'change':>8}")
+    for result in results:
+        before = previous.get(result['id'])
+        if not before or 'error' in result:
+            continue
+        p50, before_p50 = result['latency_ms']['p50'], before['latency_ms']['p50']
+        rss, before_rss = result['peak_rss_mb'], before['peak_rss_mb']
+        print(f"{result['id']:<58} {p50:>10.1f} {(p50 - before_p50) / before_p50:>+8.1%} "
+              f"{rss:>9.1f} {(rss - before_rss) / before_rss:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--only', help="Comma-separated scenario kinds: " + ",".join(SCENARIOS))
+    parser.add_argument('--quick', action='store_true', help="Run a reduced grid")
+    parser.add_argument('--iterations', type=int, default=5, help="Warm invocations per scenario")
+    parser.add_argument('--max-batch-mb', type=int, default=128, help="Skip ingestion batches larger than this")
+    parser.add_argument('--timeout', type=int, default=900, help="Seconds per scenario")
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help="Earlier results file to compare with")
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        return 0
+
+    kinds = args.only.split(',') if args.only else list(SCENARIOS)
+    scenarios, skipped = build_scenarios(kinds, args.quick, args.iterations, args.max_batch_mb * MB)
+
+    print(f"{'scenario':<58} {'import':>8} {'cold':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'rec/s':>10} {'peak MB':>8}")
+    results = []
+    for scenario in scenarios:
+        try:
+            measurements = _run_in_subprocess(scenario, args.timeout)
+        except subprocess.TimeoutExpired:
+            measurements = {"error": f"timed out after {args.timeout}s"}
+        result = dict(id=scenario['id'], kind=scenario['kind'], params=scenario['params'],
+                      iterations=scenario['iterations'], **measurements)
+        results.append(result)
+        if 'error' in result:
+            print(f"{result['id']:<58} error: {result['error']}")
+            continue
+        latency = result['latency_ms']
+        print(f"{result['id']:<58} {result['import_ms']:>8.1f} {result['cold_ms']:>9.1f} {latency['p50']:>9.1f} "
+              f"{latency['p90']:>9.1f} {latency['p99']:>9.1f} {result['throughput']['records_per_second']:>10.1f} "
+              f"{result['peak_rss_mb']:>8.1f}")
+    for scenario_id in skipped:
+        print(f"{scenario_id:<58} skipped: batch larger than {args.max_batch_mb}MB")
+
+    document = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"iterations": args.iterations, "quick": args.quick, "max_batch_mb": args.max_batch_mb},
+        "skipped": skipped,
+        "results": results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return 1 if any('error' in result for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
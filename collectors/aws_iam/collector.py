@@ -1,95 +1,196 @@
 import os
-import boto3
-import json
 import logging
-import uuid
-from datetime import datetime, timezone
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from collectors.runtime import metrics
+from collectors.runtime.aws import get_client
+from collectors.runtime.collector import Collector
 
-# --------------------------------------------------------------------------------------------------
-# Configure Logging
-# --------------------------------------------------------------------------------------------------
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --------------------------------------------------------------------------------------------------
 # Constants
 # --------------------------------------------------------------------------------------------------
 COLLECTOR_NAME = "aws-iam-password-policy"
-SCHEMA_VERSION = "1.0.0"
+
+# Stable evidence_payload fields exported as typed Parquet columns (see evidence_lake/export.py)
+PAYLOAD_COLUMNS = {
+    "MinimumPasswordLength": "int",
+    "RequireSymbols": "bool",
+    "RequireNumbers": "bool",
+    "RequireUppercaseCharacters": "bool",
+    "RequireLowercaseCharacters": "bool",
+    "AllowUsersToChangePassword": "bool",
+    "ExpirePasswords": "bool",
+    "MaxPasswordAge": "int",
+    "PasswordReusePrevention": "int",
+    "HardExpiry": "bool",
+    "error": "string"
+}
+
+# Fan-out mode: the role assumed in every target account, and how many accounts are collected at once
+ASSUME_ROLE_NAME = "scoutos-iam-collector-role"
+DEFAULT_MAX_WORKERS = 16
+# Cached STS credentials are refreshed this long before they expire
+CREDENTIALS_REFRESH_MARGIN = timedelta(minutes=5)
+
+# --------------------------------------------------------------------------------------------------
+# Account Cache
+# --------------------------------------------------------------------------------------------------
+# Assumed-role credentials, with the session and clients built from them, survive between
+# invocations in a warm Lambda container. All three are replaced together when the credentials
+# are refreshed.
+_account_cache = {}
 
 # --------------------------------------------------------------------------------------------------
 # Helper Functions
 # --------------------------------------------------------------------------------------------------
-def write_to_s3(s3_client, bucket, key, data):
+def collect_password_policy(iam_client):
     """
-    Writes a dictionary to S3 as a JSON object.
+    Fetches the IAM password policy for the account the client belongs to.
     """
     try:
-        logger.info(f"Writing evidence to s3://{bucket}/{key}")
-        s3_client.put_object(
-            Bucket=bucket,
-            Key=key,
-            Body=json.dumps(data, indent=2),
-            ContentType='application/json'
+        with metrics.span('api_call'):
+            response = iam_client.get_account_password_policy()
+        return response['PasswordPolicy']
+    except iam_client.exceptions.NoSuchEntityException:
+        logger.warning("No IAM password policy found for this account.")
+        return {"error": "NoPasswordPolicyFound"}
+
+def _account_entry(sts_client, account_id, role_name):
+    """
+    Returns the cached credentials, session and clients of the target account, assuming the role
+    again once the credentials are about to expire.
+    """
+    import boto3
+
+    role_arn = f"arn:aws:iam::{account_id}:role/{role_name}"
+    entry = _account_cache.get(role_arn)
+    if entry is None or entry['credentials']['Expiration'] - CREDENTIALS_REFRESH_MARGIN <= datetime.now(timezone.utc):
+        logger.info(f"Assuming role {role_arn}")
+        with metrics.span('assume_role'):
+            response = sts_client.assume_role(RoleArn=role_arn, RoleSessionName=COLLECTOR_NAME)
+        credentials = response['Credentials']
+        session = boto3.session.Session(
+            aws_access_key_id=credentials['AccessKeyId'],
+            aws_secret_access_key=credentials['SecretAccessKey'],
+            aws_session_token=credentials['SessionToken']
         )
-    except Exception as e:
-        logger.error(f"Failed to write to S3 bucket {bucket}: {e}")
-        raise
+        entry = _account_cache[role_arn] = {"credentials": credentials, "session": session, "clients": {}}
+    return entry
+
+def get_account_client(sts_client, account_id, role_name, service_name):
+    """
+    Returns a boto3 client for the target account, created once per set of assumed-role
+    credentials.
+    """
+    entry = _account_entry(sts_client, account_id, role_name)
+    client = entry['clients'].get(service_name)
+    if client is None:
+        client = entry['clients'][service_name] = entry['session'].client(service_name)
+    return client
 
-def create_evidence_object(payload, target_account_id):
+def list_organization_accounts(organizations_client):
     """
-    Creates a standardized evidence object.
+    Returns the IDs of all active accounts in the AWS Organization.
     """
-    return {
-        "evidence_id": str(uuid.uuid4()),
-        "collector_name": COLLECTOR_NAME,
-        "collection_timestamp": datetime.now(timezone.utc).isoformat(),
-        "target_account_id": target_account_id,
-        "evidence_payload": payload,
-        "schema_version": SCHEMA_VERSION
-    }
+    account_ids = []
+    for page in organizations_client.get_paginator('list_accounts').paginate():
+        account_ids.extend(account['Id'] for account in page['Accounts'] if account['Status'] == 'ACTIVE')
+    return account_ids
 
 # --------------------------------------------------------------------------------------------------
-# Main Handler
+# Collector
 # --------------------------------------------------------------------------------------------------
-def handler(event, context):
+class AwsIamPasswordPolicyCollector(Collector):
     """
-    Main Lambda handler function.
+    Collects the IAM password policy of TARGET_ACCOUNT_ID with the ambient credentials, or fans
+    out across many accounts when the event or environment names more than one target.
+
+    Fan-out targets come from the event's `accounts` list, the comma-separated TARGET_ACCOUNT_IDS
+    environment variable, or the AWS Organization when the event sets `organization` to true.
     """
-    logger.info("Starting collector execution...")
 
-    # Initialize clients inside the handler
-    s3_client = boto3.client('s3')
-    iam_client = boto3.client('iam')
+    name = COLLECTOR_NAME
 
-    # Read environment variables inside the handler
-    evidence_bucket = os.environ.get('EVIDENCE_BUCKET')
-    target_account_id = os.environ.get('TARGET_ACCOUNT_ID')
+    def fan_out_requested(self):
+        return bool(self.event.get('accounts') or self.event.get('organization') or os.environ.get('TARGET_ACCOUNT_IDS'))
 
-    if not all([evidence_bucket, target_account_id]):
-        logger.error("Missing one or more required environment variables.")
-        return {"status": "error", "message": "Missing environment variables."}
+    def missing_environment(self):
+        if self.fan_out_requested():
+            return [name for name in ("EVIDENCE_BUCKET",) if not os.environ.get(name)]
+        return super().missing_environment()
+
+    def collect(self):
+        if self.fan_out_requested():
+            self.fan_out()
+            return None
 
-    try:
         logger.info("Fetching IAM password policy...")
+        return collect_password_policy(get_client('iam'))
 
-        try:
-            response = iam_client.get_account_password_policy()
-            collected_data = response['PasswordPolicy']
-        except iam_client.exceptions.NoSuchEntityException:
-            logger.warning("No IAM password policy found for this account.")
-            collected_data = {"error": "NoPasswordPolicyFound"}
+    def collect_account(self, sts_client, account_id, role_name):
+        """
+        Collects and writes the password policy evidence for a single target account.
+        """
+        iam_client = get_account_client(sts_client, account_id, role_name, 'iam')
+        self.emit(collect_password_policy(iam_client), target_account_id=account_id)
+
+    def fan_out(self):
+        """
+        Collects from many accounts concurrently and summarizes the outcome per account.
+        """
+        if self.event.get('organization'):
+            account_ids = list_organization_accounts(get_client('organizations'))
+        else:
+            account_ids = self.event.get('accounts') or os.environ['TARGET_ACCOUNT_IDS'].split(',')
+        account_ids = [account_id.strip() for account_id in account_ids if account_id.strip()]
 
-        logger.info("Successfully fetched data.")
+        role_name = self.event.get('role_name') or os.environ.get('ASSUME_ROLE_NAME', ASSUME_ROLE_NAME)
+        max_workers = int(self.event.get('max_workers') or os.environ.get('MAX_WORKERS', DEFAULT_MAX_WORKERS))
+        sts_client = get_client('sts')
 
-        evidence = create_evidence_object(collected_data, target_account_id)
+        logger.info(f"Collecting from {len(account_ids)} accounts with {max_workers} workers...")
 
-        file_name = f"{COLLECTOR_NAME}/{target_account_id}/{evidence['evidence_id']}.json"
-        write_to_s3(s3_client, evidence_bucket, file_name, evidence)
+        accounts = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Each account runs in a copy of this context, so its stages count towards this invocation
+            futures = {
+                account_id: executor.submit(
+                    contextvars.copy_context().run, self.collect_account, sts_client, account_id, role_name
+                )
+                for account_id in account_ids
+            }
+            for account_id, future in futures.items():
+                try:
+                    future.result()
+                    accounts[account_id] = {"status": "success"}
+                except Exception as e:
+                    logger.error(f"Failed to collect from account {account_id}: {e}")
+                    accounts[account_id] = {"status": "error", "message": str(e)}
 
-        logger.info("Collector execution finished successfully.")
-        return {"status": "success"}
+        failed = sum(1 for result in accounts.values() if result["status"] == "error")
+        logger.info(f"Fan-out finished: {len(accounts) - failed} succeeded, {failed} failed.")
+        if failed == 0:
+            status = "success"
+        elif failed == len(accounts):
+            status = "error"
+        else:
+            status = "partial_failure"
+        self.summary = {
+            "status": status,
+            "succeeded": len(accounts) - failed,
+            "failed": failed,
+            "accounts": accounts
+        }
 
-    except Exception as e:
-        logger.error(f"An unhandled error occurred: {e}")
-        raise
\ No newline at end of file
+# --------------------------------------------------------------------------------------------------
+# Main Handler
+# --------------------------------------------------------------------------------------------------
+def handler(event, context):
+    """
+    Main Lambda handler function.
+    """
+    return AwsIamPasswordPolicyCollector(event, context).run()
@@ -1,16 +1,55 @@
+# --------------------------------------------------------------------------------------------------
+# Lambda Layer for Python Dependencies
+# --------------------------------------------------------------------------------------------------
+resource "aws_lambda_layer_version" "iam_collector_layer" {
+  layer_name = "scoutos-iam-collector-layer"
+  # This assumes you have a `python` directory with the dependencies in requirements.txt installed.
+  # You would typically create this with `pip install -r requirements.txt -t python`
+  filename   = "${path.module}/layer.zip"
+  compatible_runtimes = ["python3.9"]
+}
+
+locals {
+  # The collector imports the shared runtime, so the zip keeps the collectors package layout
+  package_files = {
+    "collectors/__init__.py"           = ""
+    "collectors/aws_iam/__init__.py"   = ""
+    "collectors/aws_iam/collector.py"  = file("${path.module}/collector.py")
+    "collectors/runtime/__init__.py"   = ""
+    "collectors/runtime/aws.py"        = file("${path.module}/../runtime/aws.py")
+    "collectors/runtime/canonical.py"  = file("${path.module}/../runtime/canonical.py")
+    "collectors/runtime/collector.py"  = file("${path.module}/../runtime/collector.py")
+    "collectors/runtime/dedup.py"      = file("${path.module}/../runtime/dedup.py")
+    "collectors/runtime/drift.py"      = file("${path.module}/../runtime/drift.py")
+    "collectors/runtime/evidence.py"   = file("${path.module}/../runtime/evidence.py")
+    "collectors/runtime/metrics.py"    = file("${path.module}/../runtime/metrics.py")
+    "collectors/runtime/streaming.py"  = file("${path.module}/../runtime/streaming.py")
+    "collectors/runtime/validation.py" = file("${path.module}/../runtime/validation.py")
+    "schema/evidence.schema.json"      = file("${path.module}/../../schema/evidence.schema.json")
+  }
+}
+
 data "archive_file" "iam_collector" {
   type        = "zip"
-  source_file = "${path.module}/collector.py"
   output_path = "${path.module}/collector.zip"
+
+  dynamic "source" {
+    for_each = local.package_files
+    content {
+      content  = source.value
+      filename = source.key
+    }
+  }
 }
 
 resource "aws_lambda_function" "iam_collector" {
   function_name = "scoutos-aws-iam-password-policy-collector"
-  handler       = "collector.handler"
+  handler       = "collectors.aws_iam.collector.handler"
   runtime       = "python3.9"
   filename      = data.archive_file.iam_collector.output_path
   source_code_hash = data.archive_file.iam_collector.output_base64sha256
   role          = aws_iam_role.iam_collector_role.arn
+  layers        = [aws_lambda_layer_version.iam_collector_layer.arn]
 
   tracing_config {
     mode = "Active"
@@ -20,6 +59,7 @@ resource "aws_lambda_function" "iam_collector" {
     variables = {
       EVIDENCE_BUCKET   = var.evidence_bucket_name
       TARGET_ACCOUNT_ID = var.target_account_id
+      METRICS_ENABLED   = "true"
     }
   }
 
@@ -61,4 +101,18 @@ data "aws_iam_policy_document" "iam_collector_policy_doc" {
     ]
     resources = ["*"] # This action does not support resource-level permissions
   }
+
+  statement {
+    sid       = "AllowAssumeCollectorRoleInTargetAccounts"
+    effect    = "Allow"
+    actions   = ["sts:AssumeRole"]
+    resources = ["arn:aws:iam::*:role/scoutos-iam-collector-role"]
+  }
+
+  statement {
+    sid       = "AllowOrganizationAccountListing"
+    effect    = "Allow"
+    actions   = ["organizations:ListAccounts"]
+    resources = ["*"]
+  }
 }
\ No newline at end of file
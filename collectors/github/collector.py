@@ -1,139 +1,236 @@
 import os
-import boto3
-import json
 import logging
-import uuid
-import requests
-from datetime import datetime, timezone
 
-# --------------------------------------------------------------------------------------------------
-# Configure Logging
-# --------------------------------------------------------------------------------------------------
-logging.basicConfig(level=logging.INFO)
+from collectors.runtime.aws import get_secret
+from collectors.runtime.batch_writer import BatchEvidenceWriter
+from collectors.runtime.collector import Collector
+from collectors.runtime.http_client import get_http_client
+
 logger = logging.getLogger(__name__)
 
 # --------------------------------------------------------------------------------------------------
-# Environment Variables
+# Constants
 # --------------------------------------------------------------------------------------------------
-EVIDENCE_BUCKET = os.environ.get('EVIDENCE_BUCKET')
-SECRET_NAME = os.environ.get('SECRET_NAME')
-TARGET_ACCOUNT_ID = os.environ.get('TARGET_ACCOUNT_ID') # GitHub Organization/User
-GITHUB_REPO = os.environ.get('GITHUB_REPO')
-GITHUB_BRANCH = os.environ.get('GITHUB_BRANCH', 'main')
 COLLECTOR_NAME = "github-branch-protection"
-SCHEMA_VERSION = "1.0.0"
 
-# --------------------------------------------------------------------------------------------------
-# Boto3 Clients
-# --------------------------------------------------------------------------------------------------
-s3_client = boto3.client('s3')
-secrets_manager_client = boto3.client('secretsmanager')
+# Stable evidence_payload fields of organization-mode evidence exported as typed Parquet columns
+PAYLOAD_COLUMNS = {
+    "repository": "string",
+    "is_archived": "bool",
+    "default_branch": "string",
+    "error": "string"
+}
+
+# Repositories fetched per GraphQL request (the API maximum)
+GRAPHQL_PAGE_SIZE = 100
+
+BRANCH_PROTECTION_RULE_FIELDS = """
+fragment RuleFields on BranchProtectionRule {
+  pattern
+  isAdminEnforced
+  requiresApprovingReviews
+  requiredApprovingReviewCount
+  requiresCodeOwnerReviews
+  dismissesStaleReviews
+  requiresStatusChecks
+  requiresStrictStatusChecks
+  requiredStatusCheckContexts
+  requiresLinearHistory
+  requiresCommitSignatures
+  requiresConversationResolution
+  restrictsPushes
+  allowsForcePushes
+  allowsDeletions
+}
+"""
+
+BRANCH_PROTECTION_QUERY = """
+query($owner: String!, $pageSize: Int!, $cursor: String) {
+  repositoryOwner(login: $owner) {
+    repositories(first: $pageSize, after: $cursor, orderBy: {field: NAME, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        isArchived
+        defaultBranchRef { name }
+        branchProtectionRules(first: $pageSize) {
+          pageInfo { hasNextPage endCursor }
+          nodes { ...RuleFields }
+        }
+      }
+    }
+  }
+}
+""" + BRANCH_PROTECTION_RULE_FIELDS
+
+# Fetches the rules of a repository beyond the first page returned with the repository itself
+REPOSITORY_RULES_QUERY = """
+query($owner: String!, $name: String!, $pageSize: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    branchProtectionRules(first: $pageSize, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { ...RuleFields }
+    }
+  }
+}
+""" + BRANCH_PROTECTION_RULE_FIELDS
 
 # --------------------------------------------------------------------------------------------------
 # Helper Functions
 # --------------------------------------------------------------------------------------------------
-def get_secret(secret_name):
+def graphql_query(api_url, github_token, query, variables):
     """
-    Retrieves a secret from AWS Secrets Manager.
+    Runs one GraphQL query and returns its data, raising on HTTP or GraphQL errors.
     """
-    try:
-        logger.info(f"Retrieving secret: {secret_name}")
-        response = secrets_manager_client.get_secret_value(SecretId=secret_name)
-        if 'SecretString' in response:
-            return json.loads(response['SecretString'])
-        else:
-            logger.warning("Secret is binary and not handled by this template.")
-            return None
-    except Exception as e:
-        logger.error(f"Failed to retrieve secret {secret_name}: {e}")
-        raise
+    response = get_http_client().post(f"{api_url}/graphql", headers={"Authorization": f"bearer {github_token}"},
+                                      json={"query": query, "variables": variables})
+    response.raise_for_status()
+    body = response.json()
+    if body.get("errors"):
+        raise RuntimeError(f"GraphQL query failed: {body['errors']}")
+    return body["data"]
 
-def write_to_s3(bucket, key, data):
-    """
-    Writes a dictionary to S3 as a JSON object.
-    """
-    try:
-        logger.info(f"Writing evidence to s3://{bucket}/{key}")
-        s3_client.put_object(
-            Bucket=bucket,
-            Key=key,
-            Body=json.dumps(data, indent=2),
-            ContentType='application/json'
-        )
-    except Exception as e:
-        logger.error(f"Failed to write to S3 bucket {bucket}: {e}")
-        raise
-
-def create_evidence_object(payload):
+
+def iter_organization_repositories(api_url, github_token, owner):
     """
-    Creates a standardized evidence object.
+    Yields every repository of the owner with its branch protection rules, one GraphQL page at a time.
+    Repositories with more rules than fit on a page have the rest fetched with follow-up queries.
     """
-    return {
-        "evidence_id": str(uuid.uuid4()),
-        "collector_name": COLLECTOR_NAME,
-        "collection_timestamp": datetime.now(timezone.utc).isoformat(),
-        "target_account_id": TARGET_ACCOUNT_ID,
-        "evidence_payload": payload,
-        "schema_version": SCHEMA_VERSION
-    }
+    cursor = None
+    while True:
+        data = graphql_query(api_url, github_token, BRANCH_PROTECTION_QUERY,
+                             {"owner": owner, "pageSize": GRAPHQL_PAGE_SIZE, "cursor": cursor})
+        repositories = data["repositoryOwner"]["repositories"]
+        for node in repositories["nodes"]:
+            rules = node["branchProtectionRules"]
+            branch_protection_rules = list(rules["nodes"])
+            while rules["pageInfo"]["hasNextPage"]:
+                rules = graphql_query(api_url, github_token, REPOSITORY_RULES_QUERY, {
+                    "owner": owner, "name": node["name"], "pageSize": GRAPHQL_PAGE_SIZE,
+                    "cursor": rules["pageInfo"]["endCursor"]
+                })["repository"]["branchProtectionRules"]
+                branch_protection_rules.extend(rules["nodes"])
+
+            yield {
+                "repository": node["name"],
+                "is_archived": node["isArchived"],
+                "default_branch": (node.get("defaultBranchRef") or {}).get("name"),
+                "branch_protection_rules": branch_protection_rules
+            }
+
+        if not repositories["pageInfo"]["hasNextPage"]:
+            return
+        cursor = repositories["pageInfo"]["endCursor"]
 
 # --------------------------------------------------------------------------------------------------
-# Main Handler
+# Collector
 # --------------------------------------------------------------------------------------------------
-def handler(event, context):
+class GitHubBranchProtectionCollector(Collector):
     """
-    Main Lambda handler function.
+    Collects branch protection rules for GITHUB_REPO over REST, or for every repository of the
+    owner over batched GraphQL when COLLECTION_MODE is "organization".
+
+    Environment Variables:
+        SECRET_NAME: Secret holding a JSON object with a GITHUB_TOKEN key.
+        TARGET_ACCOUNT_ID: The GitHub organization or user.
+        GITHUB_REPO / GITHUB_BRANCH: The repository and branch collected in repository mode.
+        GITHUB_API_URL: The API base URL, for GitHub Enterprise Server or a local stand-in.
+        COLLECTION_MODE: "repository" (default) or "organization".
+        EVIDENCE_LAYOUT: In organization mode, one evidence object per repo ("per_repo"),
+            a single one ("combined"), or one per repo in gzip NDJSON batch parts ("batched").
     """
-    logger.info("Starting collector execution...")
 
-    if not all([EVIDENCE_BUCKET, SECRET_NAME, TARGET_ACCOUNT_ID, GITHUB_REPO]):
-        logger.error("Missing one or more required environment variables.")
-        return {"status": "error", "message": "Missing environment variables."}
-
-    try:
-        secrets = get_secret(SECRET_NAME)
-        github_token = secrets.get('GITHUB_TOKEN')
+    name = COLLECTOR_NAME
+
+    def __init__(self, event=None, context=None):
+        super().__init__(event, context)
+        self.secret_name = os.environ.get('SECRET_NAME')
+        self.github_repo = os.environ.get('GITHUB_REPO')
+        self.github_branch = os.environ.get('GITHUB_BRANCH', 'main')
+        self.api_url = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+        self.collection_mode = os.environ.get('COLLECTION_MODE', 'repository')
+        self.evidence_layout = os.environ.get('EVIDENCE_LAYOUT', 'per_repo')
+
+    def missing_environment(self):
+        required = ["EVIDENCE_BUCKET", "SECRET_NAME", "TARGET_ACCOUNT_ID"]
+        if self.collection_mode != "organization":
+            required.append("GITHUB_REPO")
+        return [name for name in required if not os.environ.get(name)]
+
+    def github_token(self):
+        github_token = (get_secret(self.secret_name) or {}).get('GITHUB_TOKEN')
         if not github_token:
             logger.error("Secret is missing 'GITHUB_TOKEN' key.")
             raise ValueError("GitHub token not found in secret.")
+        return github_token
 
-        logger.info(f"Fetching branch protection rules for {TARGET_ACCOUNT_ID}/{GITHUB_REPO} branch {GITHUB_BRANCH}")
+    def collect(self):
+        github_token = self.github_token()
+        if self.collection_mode == "organization":
+            self.collect_organization(github_token)
+        else:
+            self.collect_repository(github_token)
+        return None
+
+    def collect_repository(self, github_token):
+        """
+        Collects branch protection for GITHUB_BRANCH of GITHUB_REPO via the REST API.
+        """
+        logger.info(f"Fetching branch protection rules for {self.target_account_id}/{self.github_repo} branch {self.github_branch}")
 
         headers = {
             "Authorization": f"token {github_token}",
             "Accept": "application/vnd.github.v3+json"
         }
-        url = f"https://api.github.com/repos/{TARGET_ACCOUNT_ID}/{GITHUB_REPO}/branches/{GITHUB_BRANCH}/protection"
-
-        response = requests.get(url, headers=headers)
-        response.raise_for_status() # Raises an HTTPError for bad responses (4xx or 5xx)
-
-        collected_data = response.json()
-
-        logger.info("Successfully fetched data.")
-
-        evidence = create_evidence_object(collected_data)
+        url = f"{self.api_url}/repos/{self.target_account_id}/{self.github_repo}/branches/{self.github_branch}/protection"
 
-        file_name = f"{COLLECTOR_NAME}/{TARGET_ACCOUNT_ID}-{GITHUB_REPO}/{evidence['evidence_id']}.json"
-        write_to_s3(EVIDENCE_BUCKET, file_name, evidence)
-
-        logger.info("Collector execution finished successfully.")
-        return {"status": "success"}
-
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
+        response = get_http_client().get(url, headers=headers)
+        if response.status_code == 404:
             logger.warning("Branch protection not found. It may not be configured.")
             collected_data = {"error": "BranchProtectionNotFound"}
-            evidence = create_evidence_object(collected_data)
-            file_name = f"{COLLECTOR_NAME}/{TARGET_ACCOUNT_ID}-{GITHUB_REPO}/{evidence['evidence_id']}.json"
-            write_to_s3(EVIDENCE_BUCKET, file_name, evidence)
-            return {"status": "success", "message": "Branch protection not found."}
+            self.summary["message"] = "Branch protection not found."
         else:
-            logger.error(f"HTTP error occurred: {e}")
-            raise
-    except Exception as e:
-        logger.error(f"An unhandled error occurred: {e}")
-        raise
-
-if __name__ == "__main__":
-    pass
\ No newline at end of file
+            try:
+                response.raise_for_status() # Raises an HTTPError for bad responses (4xx or 5xx)
+            except Exception as e:
+                logger.error(f"HTTP error occurred: {e}")
+                raise
+            collected_data = response.json()
+
+        self.emit(collected_data, target_path=f"{self.target_account_id}-{self.github_repo}")
+
+    def collect_organization(self, github_token):
+        """
+        Collects branch protection rules for every repository of the owner via batched GraphQL.
+        """
+        logger.info(f"Fetching branch protection rules for all repositories of {self.target_account_id}")
+
+        repositories = iter_organization_repositories(self.api_url, github_token, self.target_account_id)
+        repository_count = 0
+        if self.evidence_layout == "batched":
+            # The context manager aborts the open multipart upload if collection fails part way
+            with BatchEvidenceWriter(self.s3_client, self.evidence_bucket, self.name) as batch_writer:
+                for repository in repositories:
+                    repository_count += 1
+                    batch_writer.add(self.create_evidence(repository),
+                                     target_path=f"{self.target_account_id}-{repository['repository']}")
+        elif self.evidence_layout == "combined":
+            combined = list(repositories)
+            repository_count = len(combined)
+            self.emit({"repositories": combined})
+        else:
+            for repository in repositories:
+                repository_count += 1
+                self.emit(repository, target_path=f"{self.target_account_id}-{repository['repository']}")
+
+        logger.info(f"Collected branch protection rules for {repository_count} repositories.")
+        self.summary["repositories"] = repository_count
+
+# --------------------------------------------------------------------------------------------------
+# Main Handler
+# --------------------------------------------------------------------------------------------------
+def handler(event, context):
+    """
+    Main Lambda handler function.
+    """
+    return GitHubBranchProtectionCollector(event, context).run()
@@ -3,8 +3,8 @@
 # --------------------------------------------------------------------------------------------------
 resource "aws_lambda_layer_version" "github_collector_layer" {
   layer_name = "scoutos-github-collector-layer"
-  # This assumes you have a `python` directory with the requests library installed.
-  # You would typically create this with `pip install requests -t python`
+  # This assumes you have a `python` directory with the dependencies in requirements.txt installed.
+  # You would typically create this with `pip install -r requirements.txt -t python`
   filename   = "${path.module}/layer.zip"
   compatible_runtimes = ["python3.9"]
 }
@@ -12,15 +12,44 @@ resource "aws_lambda_layer_version" "github_collector_layer" {
 # --------------------------------------------------------------------------------------------------
 # Lambda Function
 # --------------------------------------------------------------------------------------------------
+locals {
+  # The collector imports the shared runtime, so the zip keeps the collectors package layout
+  package_files = {
+    "collectors/__init__.py"             = ""
+    "collectors/github/__init__.py"      = ""
+    "collectors/github/collector.py"     = file("${path.module}/collector.py")
+    "collectors/runtime/__init__.py"     = ""
+    "collectors/runtime/aws.py"          = file("${path.module}/../runtime/aws.py")
+    "collectors/runtime/batch_writer.py" = file("${path.module}/../runtime/batch_writer.py")
+    "collectors/runtime/canonical.py"    = file("${path.module}/../runtime/canonical.py")
+    "collectors/runtime/collector.py"    = file("${path.module}/../runtime/collector.py")
+    "collectors/runtime/dedup.py"        = file("${path.module}/../runtime/dedup.py")
+    "collectors/runtime/drift.py"        = file("${path.module}/../runtime/drift.py")
+    "collectors/runtime/evidence.py"     = file("${path.module}/../runtime/evidence.py")
+    "collectors/runtime/http_client.py"  = file("${path.module}/../runtime/http_client.py")
+    "collectors/runtime/metrics.py"      = file("${path.module}/../runtime/metrics.py")
+    "collectors/runtime/streaming.py"    = file("${path.module}/../runtime/streaming.py")
+    "collectors/runtime/validation.py"   = file("${path.module}/../runtime/validation.py")
+    "schema/evidence.schema.json"        = file("${path.module}/../../schema/evidence.schema.json")
+  }
+}
+
 data "archive_file" "github_collector" {
   type        = "zip"
-  source_file = "${path.module}/collector.py"
   output_path = "${path.module}/collector.zip"
+
+  dynamic "source" {
+    for_each = local.package_files
+    content {
+      content  = source.value
+      filename = source.key
+    }
+  }
 }
 
 resource "aws_lambda_function" "github_collector" {
   function_name = "scoutos-github-branch-protection-collector"
-  handler       = "collector.handler"
+  handler       = "collectors.github.collector.handler"
   runtime       = "python3.9"
   filename      = data.archive_file.github_collector.output_path
   source_code_hash = data.archive_file.github_collector.output_base64sha256
@@ -38,6 +67,8 @@ resource "aws_lambda_function" "github_collector" {
       SECRET_NAME       = var.github_secret_name
       GITHUB_REPO       = var.github_repo
       GITHUB_BRANCH     = var.github_branch
+      HTTP_CACHE_DIR    = "/tmp/http-cache"
+      METRICS_ENABLED   = "true"
     }
   }
 
@@ -0,0 +1,362 @@
+"""
+Runs many collectors concurrently in one process.
+
+Every collector package under collectors/ (except `_template` and `runtime`) is discovered and its
+handler is run by a bounded worker pool. The collectors share the runtime's process-wide AWS
+clients, secrets and HTTP session, so boto3 is initialized once instead of once per collector.
+The run report records per-collector latency, bytes written to S3 and errors.
+
+Collectors of different kinds need different configuration: TARGET_ACCOUNT_ID is an AWS account
+for aws_iam but a GitHub organization for github. A --config file maps collector names to the
+environment variables and event of each, for example:
+
+    {
+        "aws_iam": {"environment": {"TARGET_ACCOUNT_ID": "123456789012"}},
+        "github": {
+            "environment": {"TARGET_ACCOUNT_ID": "my-org", "SECRET_NAME": "github-token", "GITHUB_REPO": "my-repo"},
+            "event": {}
+        }
+    }
+
+A collector's environment is layered over the process environment for reads made while it runs,
+including from threads that copy its context. AWS clients are shared, so AWS credentials and
+region always come from the process environment. A collector's event replaces --event.
+
+Usage:
+    python -m collectors.runner [--collectors aws_iam,github] [--workers 4] [--timeout 300]
+                                [--event '{"accounts": [...]}'] [--config collectors.json]
+                                [--report report.json] [--moto]
+
+Point the runner at a local S3 stand-in with the standard AWS_ENDPOINT_URL_S3 variable, or pass
+--moto to run fully offline against an in-process moto backend.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import queue
+import argparse
+import importlib
+import pkgutil
+import threading
+import contextvars
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+import collectors
+from collectors.runtime.aws import get_client
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+EXCLUDED_PACKAGES = ("runtime",)
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 300  # seconds per collector
+# S3 operations whose request bodies count towards a collector's bytes written
+WRITE_OPERATIONS = ("PutObject", "UploadPart")
+
+# --------------------------------------------------------------------------------------------------
+# Discovery
+# --------------------------------------------------------------------------------------------------
+def discover_collectors():
+    """
+    Returns {name: collector module} for every collector package under collectors/.
+    """
+    modules = {}
+    for module in pkgutil.iter_modules(collectors.__path__):
+        if not module.ispkg or module.name.startswith('_') or module.name in EXCLUDED_PACKAGES:
+            continue
+        modules[module.name] = importlib.import_module(f"collectors.{module.name}.collector")
+    return modules
+
+# --------------------------------------------------------------------------------------------------
+# Write Accounting
+# --------------------------------------------------------------------------------------------------
+class _WriteCounter:
+    """
+    Attributes S3 write requests made through the shared client to collectors.
+
+    Writes are matched to a collector by the evidence prefix of their key (its COLLECTOR_NAME,
+    optionally under latest/, heartbeats/ or deltas/), which also covers writes from a collector's own
+    worker threads. Other writes fall back to the collector running on the calling thread.
+    """
+
+    def __init__(self, prefixes):
+        self.prefixes = prefixes
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.bytes = {}
+        self.requests = {}
+
+    def start(self, name):
+        self.local.name = name
+
+    def stop(self):
+        self.local.name = None
+
+    def _collector_for(self, key):
+        parts = key.split('/')
+        if parts[0] in ('latest', 'heartbeats', 'deltas') and len(parts) > 1:
+            parts = parts[1:]
+        return self.prefixes.get(parts[0]) or getattr(self.local, 'name', None)
+
+    def __call__(self, params, model, **kwargs):
+        if model.name not in WRITE_OPERATIONS:
+            return
+        name = self._collector_for(params.get('Key', ''))
+        if name is None:
+            return
+        body = params.get('Body', b'')
+        if isinstance(body, str):
+            size = len(body.encode('utf-8'))
+        elif isinstance(body, (bytes, bytearray)):
+            size = len(body)
+        else:
+            # File-like bodies are not read here, to avoid consuming them
+            size = 0
+        with self.lock:
+            self.bytes[name] = self.bytes.get(name, 0) + size
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+# --------------------------------------------------------------------------------------------------
+# Collector Environments
+# --------------------------------------------------------------------------------------------------
+# The environment variables of the collector running in the current context
+_environment = contextvars.ContextVar('scoutos_collector_environment', default={})
+
+
+class _CollectorEnviron(MutableMapping):
+    """
+    Stands in for os.environ while collectors run. Reads see the current collector's environment
+    over the process environment; writes go to the process environment.
+    """
+
+    def __init__(self, environ):
+        self.environ = environ
+
+    def __getitem__(self, name):
+        environment = _environment.get()
+        return environment[name] if name in environment else self.environ[name]
+
+    def __setitem__(self, name, value):
+        self.environ[name] = value
+
+    def __delitem__(self, name):
+        del self.environ[name]
+
+    def __iter__(self):
+        return iter(dict(self.environ, **_environment.get()))
+
+    def __len__(self):
+        return len(dict(self.environ, **_environment.get()))
+
+    def copy(self):
+        return dict(self)
+
+
+@contextmanager
+def _collector_environments():
+    """
+    Installs _CollectorEnviron as os.environ for the duration of the block.
+    """
+    environ = os.environ
+    os.environ = _CollectorEnviron(environ)
+    try:
+        yield
+    finally:
+        os.environ = environ
+
+# --------------------------------------------------------------------------------------------------
+# Workers
+# --------------------------------------------------------------------------------------------------
+def _start_workers(function, names, max_workers):
+    """
+    Runs function(name) for every name on up to max_workers daemon threads.
+
+    Returns ({future: name}, threads). Daemon threads do not hold up interpreter exit, so a
+    collector that timed out cannot keep the process running.
+    """
+    tasks = queue.SimpleQueue()
+    futures = {}
+    for name in names:
+        future = Future()
+        futures[future] = name
+        tasks.put((future, name))
+
+    def work():
+        while True:
+            try:
+                future, name = tasks.get_nowait()
+            except queue.Empty:
+                return
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(function(name))
+            except Exception as e:
+                future.set_exception(e)
+
+    threads = [
+        threading.Thread(target=work, name=f"collector-runner-{index}", daemon=True)
+        for index in range(min(max_workers, len(futures)))
+    ]
+    for thread in threads:
+        thread.start()
+    return futures, threads
+
+# --------------------------------------------------------------------------------------------------
+# Runner
+# --------------------------------------------------------------------------------------------------
+def run_collectors(modules, event=None, max_workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, config=None,
+                   wait_for_timeouts=False):
+    """
+    Runs the collectors' handlers concurrently and returns the run report.
+
+    `modules` maps collector names to their modules (see discover_collectors), each providing
+    `handler` and optionally `COLLECTOR_NAME`. `config` maps collector names to their own
+    `environment` and `event` (see the module docstring).
+
+    A collector that runs longer than `timeout` seconds is reported as timed out. Python threads
+    cannot be interrupted, so it keeps running in the background. The report does not wait for it,
+    but with wait_for_timeouts set the call only returns once it has finished, e.g. so a mocked
+    AWS backend outlives it.
+    """
+    config = config or {}
+    counter = _WriteCounter({
+        module.COLLECTOR_NAME: name for name, module in modules.items() if hasattr(module, 'COLLECTOR_NAME')
+    })
+    s3_client = get_client('s3')
+    s3_client.meta.events.register('provide-client-params.s3', counter)
+
+    runs = {name: {"name": name, "status": "pending", "started_at": None} for name in modules}
+
+    def run_one(name):
+        run = runs[name]
+        collector_config = config.get(name, {})
+        _environment.set({key: str(value) for key, value in collector_config.get('environment', {}).items()})
+        counter.start(name)
+        run["started_at"] = time.monotonic()
+        try:
+            return modules[name].handler(dict(collector_config.get('event', event) or {}), None)
+        finally:
+            run["finished_at"] = time.monotonic()
+            counter.stop()
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    start = time.monotonic()
+    with _collector_environments():
+        futures, threads = _start_workers(run_one, list(modules), max_workers)
+        try:
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    run = runs[futures[future]]
+                    try:
+                        run["result"] = future.result()
+                        run["status"] = "success"
+                    except Exception as e:
+                        logger.error(f"Collector {run['name']} failed: {e}")
+                        run["status"] = "error"
+                        run["error"] = f"{type(e).__name__}: {e}"
+
+                now = time.monotonic()
+                for future in list(pending):
+                    run = runs[futures[future]]
+                    if run["started_at"] is not None and now - run["started_at"] > timeout:
+                        logger.error(f"Collector {run['name']} timed out after {timeout}s")
+                        run["status"] = "timeout"
+                        run["error"] = f"Timed out after {timeout}s"
+                        pending.discard(future)
+            wall_seconds = round(time.monotonic() - start, 4)
+            if wait_for_timeouts:
+                for thread in threads:
+                    thread.join()
+        finally:
+            s3_client.meta.events.unregister('provide-client-params.s3', counter)
+
+    report = {
+        "started_at": started_at,
+        "wall_seconds": wall_seconds,
+        "workers": max_workers,
+        "timeout": timeout,
+        "collectors": []
+    }
+    for name, run in runs.items():
+        finished_at = run.pop("finished_at", None) or time.monotonic()
+        run_started_at = run.pop("started_at")
+        run["latency_seconds"] = round(finished_at - run_started_at, 4) if run_started_at else None
+        run["bytes_written"] = counter.bytes.get(name, 0)
+        run["put_requests"] = counter.requests.get(name, 0)
+        report["collectors"].append(run)
+    report["succeeded"] = sum(1 for run in report["collectors"] if run["status"] == "success")
+    report["failed"] = len(report["collectors"]) - report["succeeded"]
+    return report
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+# --------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run scoutos collectors concurrently in one process.")
+    parser.add_argument('--collectors', help="Comma-separated collector names (default: all discovered)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Seconds per collector")
+    parser.add_argument('--event', default='{}', help="JSON event passed to every handler")
+    parser.add_argument('--config', help="JSON file mapping collector names to their environment and event")
+    parser.add_argument('--report', help="Write the JSON run report to this file instead of stdout")
+    parser.add_argument('--moto', action='store_true', help="Run offline against an in-process moto backend")
+    args = parser.parse_args(argv)
+
+    modules = discovered = discover_collectors()
+    if args.collectors:
+        names = [name.strip() for name in args.collectors.split(',')]
+        unknown = [name for name in names if name not in modules]
+        if unknown:
+            parser.error(f"Unknown collectors: {', '.join(unknown)}")
+        modules = {name: modules[name] for name in names}
+
+    config = {}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+        unknown = [name for name in config if name not in discovered]
+        if unknown:
+            parser.error(f"Unknown collectors in {args.config}: {', '.join(unknown)}")
+
+    mock = None
+    if args.moto:
+        # moto is a development dependency, so it is only imported for offline runs
+        from moto import mock_aws
+        for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+            os.environ.setdefault(name, 'testing')
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+        mock = mock_aws()
+        mock.start()
+        buckets = {os.environ.get('EVIDENCE_BUCKET')}
+        buckets.update(collector.get('environment', {}).get('EVIDENCE_BUCKET') for collector in config.values())
+        for bucket in sorted(bucket for bucket in buckets if bucket):
+            get_client('s3').create_bucket(Bucket=bucket)
+
+    try:
+        # Collectors that timed out still run; moto stays in place until they finish, so they
+        # never reach real AWS
+        report = run_collectors(modules, json.loads(args.event), args.workers, args.timeout, config,
+                                wait_for_timeouts=mock is not None)
+    finally:
+        if mock:
+            mock.stop()
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0 if report["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
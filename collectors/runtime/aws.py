@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from collectors.runtime import metrics
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+# Seconds a retrieved secret is reused before Secrets Manager is asked again
+SECRET_CACHE_TTL = int(os.environ.get('SECRET_CACHE_TTL', '300'))
+
+# --------------------------------------------------------------------------------------------------
+# Process Caches
+# --------------------------------------------------------------------------------------------------
+# Clients and secrets are created on first use and then shared by every collector in the process,
+# and by later invocations of a warm Lambda container.
+_clients = {}
+_secrets = {}
+_lock = threading.Lock()
+
+# --------------------------------------------------------------------------------------------------
+# Helper Functions
+# --------------------------------------------------------------------------------------------------
+def get_client(service_name, region_name=None):
+    """
+    Returns a boto3 client for the service, created on first use and cached for the process.
+    """
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is None:
+        # boto3's default session is not safe to create clients from concurrently
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                import boto3
+                client = boto3.client(service_name, region_name=region_name)
+                _clients[key] = client
+    return client
+
+def get_secret(secret_name):
+    """
+    Retrieves a JSON secret from AWS Secrets Manager, reusing it for SECRET_CACHE_TTL seconds.
+    """
+    cached = _secrets.get(secret_name)
+    if cached and time.monotonic() - cached['retrieved_at'] < SECRET_CACHE_TTL:
+        metrics.count('secret_cache_hits')
+        return cached['value']
+
+    try:
+        logger.info(f"Retrieving secret: {secret_name}")
+        with metrics.span('secret_fetch'):
+            response = get_client('secretsmanager').get_secret_value(SecretId=secret_name)
+    except Exception as e:
+        logger.error(f"Failed to retrieve secret {secret_name}: {e}")
+        raise
+
+    if 'SecretString' in response:
+        value = json.loads(response['SecretString'])
+    else:
+        logger.warning("Secret is binary and not handled by the collector runtime.")
+        value = None
+    _secrets[secret_name] = {'value': value, 'retrieved_at': time.monotonic()}
+    return value
+
+def reset():
+    """
+    Drops all cached clients and secrets.
+    """
+    with _lock:
+        _clients.clear()
+        _secrets.clear()
@@ -0,0 +1,200 @@
+import io
+import gzip
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+
+from collectors.runtime import canonical, metrics
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+DEFAULT_MAX_RECORDS = 5000  # evidence objects per part
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # uncompressed NDJSON bytes per part
+# Compressed bytes buffered before they are sent as one multipart upload part (S3 minimum is 5 MiB)
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+# --------------------------------------------------------------------------------------------------
+# Part Upload
+# --------------------------------------------------------------------------------------------------
+class _PartUpload:
+    """
+    Gzip-compresses NDJSON lines into one S3 object.
+
+    Small parts are written with a single put_object. Once more than MULTIPART_CHUNK_SIZE compressed
+    bytes are buffered, the part switches to a multipart upload and streams chunks as they fill up,
+    so memory use stays bounded no matter how large the part grows.
+    """
+
+    def __init__(self, s3_client, bucket, key, chunk_size):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.chunk_size = chunk_size
+        self.buffer = io.BytesIO()
+        self.gzip = gzip.GzipFile(fileobj=self.buffer, mode='wb')
+        self.sha256 = hashlib.sha256()
+        self.records = 0
+        self.uncompressed_bytes = 0
+        self.compressed_bytes = 0
+        self.upload_id = None
+        self.parts = []
+        self.targets = []
+
+    def write(self, line, target_path=None):
+        self.gzip.write(line)
+        self.targets.append(target_path)
+        self.records += 1
+        self.uncompressed_bytes += len(line)
+        if self.buffer.tell() >= self.chunk_size:
+            self._upload_chunk()
+
+    def _upload_chunk(self):
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.sha256.update(chunk)
+        self.compressed_bytes += len(chunk)
+
+        if self.upload_id is None:
+            self.upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType='application/x-ndjson', ContentEncoding='gzip'
+            )['UploadId']
+        part_number = len(self.parts) + 1
+        with metrics.span('put_object'):
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=part_number, Body=chunk
+            )
+        metrics.count('bytes_written', len(chunk), unit="Bytes")
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+
+    def close(self):
+        """
+        Finishes the object and returns its manifest entry.
+        """
+        self.gzip.close()
+        if self.upload_id is None:
+            body = self.buffer.getvalue()
+            self.sha256.update(body)
+            self.compressed_bytes += len(body)
+            with metrics.span('put_object'):
+                self.s3_client.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=body,
+                    ContentType='application/x-ndjson', ContentEncoding='gzip'
+                )
+            metrics.count('bytes_written', len(body), unit="Bytes")
+        else:
+            self._upload_chunk()
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={'Parts': self.parts}
+            )
+        metrics.count('objects_written')
+
+        entry = {
+            "key": self.key,
+            "records": self.records,
+            "uncompressed_bytes": self.uncompressed_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "sha256": self.sha256.hexdigest()
+        }
+        if any(self.targets):
+            entry["targets"] = self.targets
+        return entry
+
+    def abort(self):
+        if self.upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+# --------------------------------------------------------------------------------------------------
+# Batch Writer
+# --------------------------------------------------------------------------------------------------
+class BatchEvidenceWriter:
+    """
+    Buffers evidence objects and writes them as gzip-compressed NDJSON parts plus a manifest. Each
+    line is the canonical JSON of one evidence object (see canonical.py).
+
+    Objects are laid out as:
+        <collector_name>/batches/<batch_id>/part-00000.ndjson.gz
+        <collector_name>/batches/<batch_id>/manifest.json
+
+    A part is closed once it holds max_records evidence objects or max_bytes of uncompressed NDJSON.
+    The manifest lists every part with its record count, sizes and sha256, and is written last, so a
+    batch without a manifest is incomplete. Records added with a target_path have it listed, in record
+    order, under the part's "targets". Use as a context manager, or call close() when done.
+    """
+
+    def __init__(self, s3_client, bucket, collector_name, max_records=DEFAULT_MAX_RECORDS,
+                 max_bytes=DEFAULT_MAX_BYTES, chunk_size=MULTIPART_CHUNK_SIZE):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.collector_name = collector_name
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.batch_id = str(uuid.uuid4())
+        self.prefix = f"{collector_name}/batches/{self.batch_id}"
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.parts = []
+        self.current = None
+        self.lock = threading.Lock()
+
+    def add(self, evidence, target_path=None):
+        """
+        Appends an evidence object to the current part, starting a new part when it is full.
+
+        target_path is the target the evidence would be stored under on its own (see
+        Collector.emit), and defaults to the target account ID.
+        """
+        line = canonical.dumps(evidence) + b'\n'
+        with self.lock:
+            if self.current is None:
+                self.current = _PartUpload(
+                    self.s3_client, self.bucket, f"{self.prefix}/part-{len(self.parts):05d}.ndjson.gz", self.chunk_size
+                )
+            self.current.write(line, target_path)
+            if self.current.records >= self.max_records or self.current.uncompressed_bytes >= self.max_bytes:
+                self._close_part()
+
+    def _close_part(self):
+        logger.info(f"Writing evidence batch part to s3://{self.bucket}/{self.current.key}")
+        self.parts.append(self.current.close())
+        self.current = None
+
+    def close(self):
+        """
+        Writes the last part and the manifest. Returns the manifest.
+        """
+        with self.lock:
+            if self.current is not None:
+                self._close_part()
+            manifest = {
+                "batch_id": self.batch_id,
+                "collector_name": self.collector_name,
+                "created_at": self.created_at,
+                "format": "ndjson+gzip",
+                "records": sum(part["records"] for part in self.parts),
+                "parts": self.parts
+            }
+            logger.info(f"Writing evidence batch manifest to s3://{self.bucket}/{self.prefix}/manifest.json")
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=f"{self.prefix}/manifest.json",
+                Body=canonical.dumps(manifest),
+                ContentType='application/json'
+            )
+            return manifest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self.current is not None:
+            # Leave no dangling multipart upload and no manifest for a failed batch
+            self.current.abort()
+        return False
@@ -0,0 +1,194 @@
+"""
+Canonical JSON: one byte encoding per value, so the digest of evidence can be reproduced anywhere.
+
+The encoding follows the JSON Canonicalization Scheme (RFC 8785):
+
+*   object members are sorted by the UTF-16 code units of their names,
+*   there is no whitespace between tokens,
+*   strings are UTF-8 with only the escapes JSON requires,
+*   numbers take their shortest ECMAScript form: 1.0 is written 1, 1e-7 is written 1e-7.
+
+NaN, infinities and object names that are not strings are rejected. Integers are written exactly.
+
+encode() returns the bytes together with their sha256, so a document that is stored and digested
+is encoded once. Evidence that is written and deduplicated splices its already encoded payload into
+the evidence object with encode_member() instead of encoding it twice.
+
+When orjson is installed it encodes values made only of objects, arrays, strings, integers,
+booleans and null. Values holding floats, whose formatting differs from RFC 8785, or any other
+type, and all values when CANONICAL_JSON_BACKEND=python, use the built-in encoder, so the bytes,
+and which values are rejected, never depend on whether orjson is installed.
+"""
+import os
+import math
+import hashlib
+from json.encoder import encode_basestring
+
+# --------------------------------------------------------------------------------------------------
+# Backends
+# --------------------------------------------------------------------------------------------------
+_orjson = None
+
+def _load_orjson():
+    """
+    Returns the orjson module, or False when it is missing or turned off.
+    """
+    global _orjson
+    if _orjson is None:
+        _orjson = False
+        if os.environ.get('CANONICAL_JSON_BACKEND', 'auto').lower() != 'python':
+            try:
+                import orjson
+            except ImportError:
+                pass
+            else:
+                _orjson = orjson
+    return _orjson
+
+def backend():
+    """
+    Returns the name of the backend used for values without floats: "orjson" or "python".
+    """
+    return "orjson" if _load_orjson() else "python"
+
+# Types orjson encodes exactly like the built-in encoder. Floats are formatted differently, and
+# orjson would also accept datetimes, UUIDs, dataclasses or numpy values the built-in encoder rejects.
+_ORJSON_SCALARS = (str, int, bool, type(None))
+
+def _orjson_compatible(value):
+    """
+    Returns True when orjson encodes value canonically: only dicts, lists and tuples of strings,
+    integers, booleans and None, and only string names at or below U+FFFF, where code point
+    order and UTF-16 order agree. Subclasses of these types are left to the built-in encoder.
+    """
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        kind = type(value)
+        if kind in _ORJSON_SCALARS:
+            continue
+        if kind is dict:
+            for name in value:
+                if type(name) is not str or (not name.isascii() and max(name) > '\uffff'):
+                    return False
+            stack.extend(value.values())
+        elif kind is list or kind is tuple:
+            stack.extend(value)
+        else:
+            return False
+    return True
+
+# --------------------------------------------------------------------------------------------------
+# Built-in Encoder
+# --------------------------------------------------------------------------------------------------
+def _utf16_order(name):
+    return name.encode('utf-16-be', 'surrogatepass')
+
+def format_number(number):
+    """
+    Returns the RFC 8785 (ECMAScript Number.prototype.toString) form of an int or float.
+    """
+    if isinstance(number, int):
+        return int.__repr__(number)
+    if not math.isfinite(number):
+        raise ValueError(f"{number!r} is not allowed in canonical JSON")
+    if number == 0:
+        return "0"
+    # repr gives the shortest digits that round-trip; only their layout differs from ECMAScript
+    mantissa, _, exponent = repr(abs(number)).partition('e')
+    integer, _, fraction = mantissa.partition('.')
+    digits = (integer + fraction).lstrip('0')
+    # The decimal point follows the first `point` digits
+    point = len(integer) + int(exponent or 0) - (len(integer + fraction) - len(digits))
+    digits = digits.rstrip('0')
+    sign = "-" if number < 0 else ""
+    if len(digits) <= point <= 21:
+        return sign + digits + "0" * (point - len(digits))
+    if 0 < point <= 21:
+        return sign + digits[:point] + "." + digits[point:]
+    if -6 < point <= 0:
+        return sign + "0." + "0" * -point + digits
+    shown = point - 1
+    return f"{sign}{digits[0]}{'.' + digits[1:] if len(digits) > 1 else ''}e{'+' if shown >= 0 else '-'}{abs(shown)}"
+
+def _encode(value, chunks):
+    kind = type(value)
+    if kind is str:
+        chunks.append(encode_basestring(value))
+    elif isinstance(value, dict):
+        names = sorted(value)
+        for name in names:
+            if type(name) is not str:
+                raise TypeError(f"Object names must be strings, not {type(name).__name__}")
+        if not all(name.isascii() or max(name) <= '\uffff' for name in names):
+            names.sort(key=_utf16_order)
+        chunks.append("{")
+        for index, name in enumerate(names):
+            if index:
+                chunks.append(",")
+            chunks.append(encode_basestring(name))
+            chunks.append(":")
+            _encode(value[name], chunks)
+        chunks.append("}")
+    elif isinstance(value, (list, tuple)):
+        chunks.append("[")
+        for index, item in enumerate(value):
+            if index:
+                chunks.append(",")
+            _encode(item, chunks)
+        chunks.append("]")
+    elif value is True:
+        chunks.append("true")
+    elif value is False:
+        chunks.append("false")
+    elif value is None:
+        chunks.append("null")
+    elif isinstance(value, (int, float)):
+        chunks.append(format_number(value))
+    elif isinstance(value, str):
+        chunks.append(encode_basestring(value))
+    else:
+        raise TypeError(f"Object of type {kind.__name__} is not JSON serializable")
+
+# --------------------------------------------------------------------------------------------------
+# Encoding
+# --------------------------------------------------------------------------------------------------
+def dumps(value):
+    """
+    Returns the canonical JSON encoding of value as UTF-8 bytes.
+    """
+    orjson = _load_orjson()
+    if orjson and _orjson_compatible(value):
+        try:
+            return orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits and lone surrogates; the built-in encoder decides
+            pass
+    chunks = []
+    _encode(value, chunks)
+    return "".join(chunks).encode('utf-8')
+
+def encode(value):
+    """
+    Returns (canonical bytes, their sha256 hex digest).
+    """
+    body = dumps(value)
+    return body, hashlib.sha256(body).hexdigest()
+
+def digest(value):
+    """
+    Returns the sha256 hex digest of the canonical encoding of value.
+    """
+    return encode(value)[1]
+
+def encode_member(document, name, member_body):
+    """
+    Returns the canonical bytes of the object document, whose member name is already encoded as
+    member_body. The other members are encoded; member_body is copied in as it is.
+    """
+    names = sorted(document, key=_utf16_order)
+    parts = []
+    for member in names:
+        body = member_body if member == name else dumps(document[member])
+        parts.append(dumps(member) + b":" + body)
+    return b"{" + b",".join(parts) + b"}"
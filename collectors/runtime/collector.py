@@ -0,0 +1,152 @@
+import os
+import logging
+import functools
+
+from collectors.runtime import metrics
+from collectors.runtime.aws import get_client
+from collectors.runtime.dedup import emit_evidence
+from collectors.runtime.evidence import create_evidence_object, write_to_s3
+from collectors.runtime.streaming import DEFAULT_CHUNK_SIZE, StreamingEvidenceWriter
+from collectors.runtime.validation import validate_evidence
+
+# --------------------------------------------------------------------------------------------------
+# Configure Logging
+# --------------------------------------------------------------------------------------------------
+# Use INFO for normal operational messages
+# Use DEBUG for detailed diagnostic information
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Collector Base Class
+# --------------------------------------------------------------------------------------------------
+class Collector:
+    """
+    Base class for scoutos collectors.
+
+    Subclasses set `name`, list the environment variables they need in `required_environment`,
+    and implement `collect()`. A collector module exposes it to Lambda with:
+
+        def handler(event, context):
+            return MyCollector(event, context).run()
+
+    Inventory-style collectors implement `iter_items()` instead of `collect()`. Their items are
+    then written as evidence chunks while they are collected (see streaming.py).
+
+    Configuration is read when the collector is created, not at import, and all AWS clients come
+    from the shared, lazily populated runtime cache.
+    """
+
+    name = None
+    required_environment = ("EVIDENCE_BUCKET", "TARGET_ACCOUNT_ID")
+    # Items per evidence chunk when the collector streams with iter_items()
+    chunk_size = DEFAULT_CHUNK_SIZE
+
+    def __init__(self, event=None, context=None):
+        self.event = event or {}
+        self.context = context
+        self.evidence_bucket = os.environ.get('EVIDENCE_BUCKET')
+        self.target_account_id = os.environ.get('TARGET_ACCOUNT_ID')
+        # Extra keys merged into the handler's return value, e.g. counts or per-target results
+        self.summary = {}
+
+    @property
+    def s3_client(self):
+        return get_client('s3')
+
+    def missing_environment(self):
+        """
+        Returns the required environment variables that are not set.
+        """
+        return [name for name in self.required_environment if not os.environ.get(name)]
+
+    def collect(self):
+        """
+        Fetches and returns the evidence payload for the target account.
+
+        Collectors that produce several evidence objects call `emit()` for each and return None.
+        By default, the items of `iter_items()` are streamed with `collect_stream()`.
+        """
+        if type(self).iter_items is Collector.iter_items:
+            raise NotImplementedError
+        self.collect_stream(self.iter_items())
+        return None
+
+    def iter_items(self):
+        """
+        Yields the items of an inventory one at a time, e.g. from iter_boto3_items() or
+        Pagination.items(), transforming each as it goes.
+        """
+        raise NotImplementedError
+
+    def collect_stream(self, items, target_account_id=None, target_path=None):
+        """
+        Writes items as evidence chunks of `chunk_size` items while consuming them, then the stream
+        manifest with the sha256 of every chunk. Returns the manifest.
+        """
+        writer = StreamingEvidenceWriter(self, target_account_id, target_path, self.chunk_size)
+        manifest = writer.write(items)
+        logger.info(f"Streamed {manifest['items']} items in {len(manifest['chunks'])} chunks.")
+        self.summary.update({"items": manifest['items'], "chunks": len(manifest['chunks']), "manifest": writer.manifest_key})
+        return manifest
+
+    def create_evidence(self, payload, target_account_id=None):
+        """
+        Wraps the payload in an evidence object and validates it against the evidence schema.
+
+        Raises EvidenceValidationError before anything is written if the evidence is malformed.
+        """
+        evidence = create_evidence_object(self.name, payload, target_account_id or self.target_account_id)
+        with metrics.span('validate'):
+            validate_evidence(evidence)
+        metrics.count('records')
+        return evidence
+
+    def emit(self, payload, target_account_id=None, target_path=None):
+        """
+        Wraps the payload in a validated evidence object and writes it to the evidence lake.
+
+        The object is stored at `<name>/<target_path>/<evidence_id>.json`, where target_path
+        defaults to the target account ID. Returns the evidence object.
+        """
+        evidence = self.create_evidence(payload, target_account_id)
+        key = f"{self.name}/{target_path or evidence['target_account_id']}/{evidence['evidence_id']}.json"
+        s3_client = self.s3_client
+        emit_evidence(s3_client, self.evidence_bucket, key, evidence, functools.partial(write_to_s3, s3_client))
+        return evidence
+
+    def run(self):
+        """
+        Runs the collector and returns the handler response.
+
+        When METRICS_ENABLED is "true", stage timings and counters of the run are emitted as one
+        CloudWatch EMF document at the end (see collectors/runtime/metrics.py).
+        """
+        logger.info(f"Starting collector execution for {self.name}...")
+
+        if self.missing_environment():
+            logger.error("Missing one or more required environment variables.")
+            return {"status": "error", "message": "Missing environment variables."}
+
+        invocation = metrics.start_invocation(self.name)
+        try:
+            with invocation.span('collect'):
+                payload = self.collect()
+            logger.info("Successfully fetched data.")
+
+            if payload is not None:
+                with invocation.span('emit'):
+                    self.emit(payload)
+
+            logger.info("Collector execution finished successfully.")
+            result = {"status": "success"}
+            result.update(self.summary)
+            return result
+
+        except Exception as e:
+            logger.error(f"An unhandled error occurred: {e}")
+            invocation.count('errors')
+            # This will cause the Lambda function to fail
+            raise
+        finally:
+            metrics.finish_invocation(invocation)
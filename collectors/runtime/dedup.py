@@ -0,0 +1,104 @@
+import os
+import json
+import logging
+
+from collectors.runtime import canonical, metrics
+from collectors.runtime.drift import drift_enabled, record_drift
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+# Pointers to the latest evidence of every collector/target live under this prefix
+LATEST_PREFIX = "latest/"
+# Heartbeats recorded instead of evidence when nothing changed live under this prefix
+HEARTBEAT_PREFIX = "heartbeats/"
+
+# --------------------------------------------------------------------------------------------------
+# Helper Functions
+# --------------------------------------------------------------------------------------------------
+def dedup_enabled():
+    """
+    Returns True when EVIDENCE_DEDUP is set to "true".
+    """
+    return os.environ.get('EVIDENCE_DEDUP', 'false').lower() == 'true'
+
+def payload_digest(payload):
+    """
+    Returns the sha256 hex digest of the canonical JSON (RFC 8785) of the evidence payload.
+    """
+    return canonical.digest(payload)
+
+def _read_json(s3_client, bucket, key):
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=key)
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    return json.loads(response['Body'].read())
+
+def _put_json(s3_client, bucket, key, data):
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=canonical.dumps(data),
+        ContentType='application/json'
+    )
+
+def emit_evidence(s3_client, bucket, key, evidence, write):
+    """
+    Writes evidence with write(bucket, key, evidence), deduplicating it when EVIDENCE_DEDUP is on
+    and recording drift when EVIDENCE_DRIFT is on.
+
+    The evidence target is the key's directory, e.g. `aws-iam-password-policy/123456789012`. With
+    either option on, the payload digest is compared with the target's latest pointer at
+    `latest/<target>.json`. With dedup, an unchanged payload only produces a small heartbeat
+    record under `heartbeats/<target>/`. A changed payload is written as usual and moves the
+    pointer. With drift tracking, the pointer also keeps the canonical payload, and each change is
+    stored as a JSON patch under `deltas/<target>/` (see drift.py).
+
+    The payload is encoded once: its canonical bytes give the digest and are spliced into the
+    evidence object that is written.
+
+    Returns True if the evidence itself was written.
+    """
+    dedup = dedup_enabled()
+    drift = drift_enabled()
+    if not dedup and not drift:
+        write(bucket, key, evidence)
+        return True
+
+    target = key.rsplit('/', 1)[0]
+    pointer_key = f"{LATEST_PREFIX}{target}.json"
+    payload_body, digest = canonical.encode(evidence['evidence_payload'])
+
+    with metrics.span('pointer_read'):
+        latest = _read_json(s3_client, bucket, pointer_key)
+    unchanged = bool(latest) and latest.get('payload_sha256') == digest
+    if unchanged and dedup:
+        logger.info(f"Evidence for {target} is unchanged, writing heartbeat only.")
+        metrics.count('heartbeats')
+        _put_json(s3_client, bucket, f"{HEARTBEAT_PREFIX}{target}/{evidence['evidence_id']}.json", {
+            "evidence_id": evidence['evidence_id'],
+            "collector_name": evidence['collector_name'],
+            "collection_timestamp": evidence['collection_timestamp'],
+            "target_account_id": evidence['target_account_id'],
+            "payload_sha256": digest,
+            "latest_evidence_key": latest['evidence_key']
+        })
+        return False
+
+    write(bucket, key, canonical.encode_member(evidence, 'evidence_payload', payload_body))
+    if drift and (not unchanged or 'payload' not in latest):
+        record_drift(s3_client, bucket, target, key, evidence, digest, latest)
+
+    pointer = {
+        "payload_sha256": digest,
+        "evidence_key": key,
+        "evidence_id": evidence['evidence_id'],
+        "collection_timestamp": evidence['collection_timestamp']
+    }
+    if drift:
+        pointer["payload"] = evidence['evidence_payload']
+    _put_json(s3_client, bucket, pointer_key, pointer)
+    return True
@@ -0,0 +1,160 @@
+import os
+import copy
+import json
+import logging
+
+from collectors.runtime.aws import get_client
+from collectors.runtime.evidence import write_to_s3
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+# Deltas between successive payloads of a target live under this prefix
+DELTA_PREFIX = "deltas/"
+EVENT_SOURCE = "scoutos.drift"
+EVENT_DETAIL_TYPE = "Evidence Drift Detected"
+# Paths listed in a change event; the full patch is in the stored delta
+MAX_EVENT_PATHS = 50
+
+# --------------------------------------------------------------------------------------------------
+# JSON Patch
+# --------------------------------------------------------------------------------------------------
+def _pointer(path, token):
+    return f"{path}/{str(token).replace('~', '~0').replace('/', '~1')}"
+
+def _same(old, new):
+    # JSON equality: 1 and true differ, 1 and 1.0 do not
+    return (type(old) is type(new) and old == new) or (
+        isinstance(old, (int, float)) and isinstance(new, (int, float))
+        and not isinstance(old, bool) and not isinstance(new, bool) and old == new
+    )
+
+def json_patch(old, new, path=""):
+    """
+    Returns the RFC 6902 operations (add, remove, replace) that turn old into new.
+
+    Objects are compared key by key and arrays element by element, so a change deep inside a
+    document produces one small operation instead of a copy of the document.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations = []
+        for key in old:
+            if key not in new:
+                operations.append({"op": "remove", "path": _pointer(path, key)})
+            else:
+                operations.extend(json_patch(old[key], new[key], _pointer(path, key)))
+        for key in new:
+            if key not in old:
+                operations.append({"op": "add", "path": _pointer(path, key), "value": new[key]})
+        return operations
+
+    if isinstance(old, list) and isinstance(new, list):
+        operations = []
+        for index in range(min(len(old), len(new))):
+            operations.extend(json_patch(old[index], new[index], _pointer(path, index)))
+        for index in range(len(old), len(new)):
+            operations.append({"op": "add", "path": _pointer(path, "-"), "value": new[index]})
+        # Remove surplus elements from the end, so earlier indexes stay valid
+        for index in range(len(old) - 1, len(new) - 1, -1):
+            operations.append({"op": "remove", "path": _pointer(path, index)})
+        return operations
+
+    if _same(old, new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+def apply_patch(document, operations):
+    """
+    Returns a copy of document with the add, remove and replace operations applied.
+    """
+    document = copy.deepcopy(document)
+    for operation in operations:
+        tokens = [token.replace('~1', '/').replace('~0', '~') for token in operation['path'].split('/')[1:]]
+        if not tokens:
+            document = copy.deepcopy(operation['value'])
+            continue
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            if operation['op'] == 'remove':
+                del parent[int(last)]
+            elif last == '-':
+                parent.append(copy.deepcopy(operation['value']))
+            elif operation['op'] == 'add':
+                parent.insert(int(last), copy.deepcopy(operation['value']))
+            else:
+                parent[int(last)] = copy.deepcopy(operation['value'])
+        elif operation['op'] == 'remove':
+            del parent[last]
+        else:
+            parent[last] = copy.deepcopy(operation['value'])
+    return document
+
+# --------------------------------------------------------------------------------------------------
+# Drift Recording
+# --------------------------------------------------------------------------------------------------
+def drift_enabled():
+    """
+    Returns True when EVIDENCE_DRIFT is set to "true".
+    """
+    return os.environ.get('EVIDENCE_DRIFT', 'false').lower() == 'true'
+
+def publish_change_event(change):
+    """
+    Sends a change event to the EventBridge bus named by DRIFT_EVENT_BUS, or only logs it.
+    """
+    event_bus = os.environ.get('DRIFT_EVENT_BUS')
+    logger.info(f"Evidence drift for {change['target']}: {change['change']} ({change['operations']} operations)")
+    if not event_bus:
+        return
+    response = get_client('events').put_events(Entries=[{
+        "Source": EVENT_SOURCE,
+        "DetailType": EVENT_DETAIL_TYPE,
+        "Detail": json.dumps(change, separators=(',', ':')),
+        "EventBusName": event_bus
+    }])
+    if response.get('FailedEntryCount'):
+        logger.error(f"Failed to publish drift event for {change['target']}: {response['Entries']}")
+
+def record_drift(s3_client, bucket, target, key, evidence, digest, latest):
+    """
+    Stores the delta between the target's last canonical payload and the new evidence payload
+    under `deltas/<target>/<evidence_id>.json`, and publishes a change event.
+
+    latest is the target's pointer, which carries the last payload once drift tracking is on. The
+    first evidence of a target, or the first one after drift tracking is turned on, only becomes
+    the baseline. Returns the change event.
+    """
+    change = {
+        "collector_name": evidence['collector_name'],
+        "target": target,
+        "target_account_id": evidence['target_account_id'],
+        "evidence_id": evidence['evidence_id'],
+        "evidence_key": key,
+        "collection_timestamp": evidence['collection_timestamp'],
+        "payload_sha256": digest
+    }
+
+    if not latest or 'payload' not in latest:
+        change.update({"change": "initial", "operations": 0, "paths": []})
+        publish_change_event(change)
+        return change
+
+    patch = json_patch(latest['payload'], evidence['evidence_payload'])
+    delta_key = f"{DELTA_PREFIX}{target}/{evidence['evidence_id']}.json"
+    change.update({
+        "change": "modified",
+        "previous_evidence_id": latest['evidence_id'],
+        "previous_evidence_key": latest['evidence_key'],
+        "previous_payload_sha256": latest['payload_sha256'],
+        "delta_key": delta_key,
+        "operations": len(patch),
+        "paths": [operation['path'] for operation in patch[:MAX_EVENT_PATHS]]
+    })
+    write_to_s3(s3_client, bucket, delta_key, dict(change, patch=patch))
+    publish_change_event(change)
+    return change
@@ -0,0 +1,58 @@
+import uuid
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+from collectors.runtime import canonical, metrics
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+SCHEMA_VERSION = "1.0.0"
+
+# --------------------------------------------------------------------------------------------------
+# Helper Functions
+# --------------------------------------------------------------------------------------------------
+def create_evidence_object(collector_name, payload, target_account_id):
+    """
+    Creates a standardized evidence object.
+    """
+    return {
+        "evidence_id": str(uuid.uuid4()),
+        "collector_name": collector_name,
+        "collection_timestamp": datetime.now(timezone.utc).isoformat(),
+        "target_account_id": target_account_id,
+        "evidence_payload": payload,
+        "schema_version": SCHEMA_VERSION
+    }
+
+def write_to_s3(s3_client, bucket, key, data):
+    """
+    Writes a dictionary to S3 as canonical JSON (see canonical.py), or bytes that are already
+    canonical JSON as they are.
+
+    Returns the size and sha256 hex digest of the stored bytes. Digest and bytes come from one
+    encoding, so the digest is the sha256 of the same bytes a DSSE envelope later signs.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        body = bytes(data)
+        sha256 = hashlib.sha256(body).hexdigest()
+    else:
+        body, sha256 = canonical.encode(data)
+    try:
+        logger.info(f"Writing evidence to s3://{bucket}/{key}")
+        with metrics.span('put_object'):
+            s3_client.put_object(
+                Bucket=bucket,
+                Key=key,
+                Body=body,
+                ContentType='application/json'
+            )
+    except Exception as e:
+        logger.error(f"Failed to write to S3 bucket {bucket}: {e}")
+        raise
+    metrics.count('objects_written')
+    metrics.count('bytes_written', len(body), unit="Bytes")
+    return {"bytes": len(body), "sha256": sha256}
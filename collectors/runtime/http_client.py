@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import tempfile
+from datetime import datetime, timezone
+
+from collectors.runtime import metrics
+from collectors.runtime.aws import get_client
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0  # seconds; doubled on every retry without a server-provided delay
+DEFAULT_MAX_BACKOFF = 60.0  # seconds; upper bound for any single wait
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+# Request headers that change the representation GitHub (and most APIs) return for the same URL
+CACHE_VARY_HEADERS = ("Authorization", "Accept")
+
+# --------------------------------------------------------------------------------------------------
+# ETag Caches
+# --------------------------------------------------------------------------------------------------
+class FileEtagCache:
+    """
+    Stores ETags and response bodies as JSON files in a local directory.
+
+    In Lambda, a directory under /tmp survives between invocations of a warm container.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, entry):
+        # Write to a temporary file first so concurrent readers never see a partial entry. Its name
+        # is unique per call, so threads writing the same key never share one.
+        with tempfile.NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False) as f:
+            json.dump(entry, f)
+        os.replace(f.name, self._path(key))
+
+
+class S3EtagCache:
+    """
+    Stores ETags and response bodies in S3, so they survive cold starts and are shared by all
+    invocations of a collector.
+    """
+
+    def __init__(self, s3_client, bucket, prefix="http-cache/"):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}.json")
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def set(self, key, entry):
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=f"{self.prefix}{key}.json",
+            Body=json.dumps(entry),
+            ContentType='application/json'
+        )
+
+
+def etag_cache_from_env(s3_client=None):
+    """
+    Builds the ETag cache configured by HTTP_CACHE_BUCKET or HTTP_CACHE_DIR, or returns None.
+    """
+    bucket = os.environ.get('HTTP_CACHE_BUCKET')
+    if bucket:
+        return S3EtagCache(s3_client or get_client('s3'), bucket, os.environ.get('HTTP_CACHE_PREFIX', 'http-cache/'))
+
+    directory = os.environ.get('HTTP_CACHE_DIR')
+    if directory:
+        return FileEtagCache(directory)
+    return None
+
+# --------------------------------------------------------------------------------------------------
+# HTTP Client
+# --------------------------------------------------------------------------------------------------
+class CollectorHttpClient:
+    """
+    A pooled HTTP client for collectors that backs off according to rate-limit headers and
+    revalidates GET requests with If-None-Match when an ETag cache is configured.
+
+    A 304 Not Modified answer is turned into a 200 response carrying the cached body, with
+    `from_cache` set to True, so callers handle it exactly like a fresh response.
+    """
+
+    def __init__(self, headers=None, etag_cache=None, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, max_backoff=DEFAULT_MAX_BACKOFF,
+                 pool_maxsize=10, sleep=time.sleep):
+        # requests is imported on first use, so importing a collector module stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self.etag_cache = etag_cache
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, headers=None, **kwargs):
+        """
+        Sends a request, retrying throttled and failed attempts. Returns the final response.
+        """
+        headers = dict(headers or {})
+        cache_key = None
+        cached = None
+        if self.etag_cache is not None and method == 'GET':
+            cache_key = self._cache_key(url, kwargs.get('params'), headers)
+            cached = self.etag_cache.get(cache_key)
+            if cached:
+                headers['If-None-Match'] = cached['etag']
+
+        with metrics.span('api_call'):
+            response = self._send_with_retries(method, url, headers=headers, **kwargs)
+        metrics.count('api_calls')
+
+        if cached and response.status_code == 304:
+            logger.info(f"Not modified, reusing cached response for {url}")
+            metrics.count('api_not_modified')
+            return self._cached_response(response, cached)
+
+        if cache_key and response.status_code == 200 and response.headers.get('ETag'):
+            self.etag_cache.set(cache_key, {
+                'etag': response.headers['ETag'],
+                'body': base64.b64encode(response.content).decode('ascii'),
+                'content_type': response.headers.get('Content-Type')
+            })
+
+        response.from_cache = False
+        return response
+
+    def _send_with_retries(self, method, url, **kwargs):
+        import requests
+
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._exponential_delay(attempt)
+                logger.warning(f"Connection error for {url} ({e}), retrying in {delay:.1f}s")
+            else:
+                delay = self._retry_delay(response, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    return response
+                logger.warning(f"Received {response.status_code} for {url}, retrying in {delay:.1f}s")
+
+            metrics.count('api_retries')
+            self.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, response, attempt):
+        """
+        Returns how long to wait before retrying the response, or None if it should not be retried.
+        """
+        throttled = response.status_code == 429 or (
+            response.status_code == 403 and response.headers.get('X-RateLimit-Remaining') == '0'
+        )
+        if not throttled and response.status_code not in RETRYABLE_STATUS_CODES:
+            return None
+
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+
+        reset = response.headers.get('X-RateLimit-Reset')
+        if throttled and reset and reset.isdigit():
+            wait = int(reset) - datetime.now(timezone.utc).timestamp()
+            return min(max(wait, 0.0), self.max_backoff)
+
+        return self._exponential_delay(attempt)
+
+    def _exponential_delay(self, attempt):
+        return min(self.backoff_base * (2 ** attempt), self.max_backoff)
+
+    def _cache_key(self, url, params, headers):
+        merged = dict(self.session.headers)
+        merged.update(headers)
+        # Credentials are hashed into the key, never stored
+        material = [url, json.dumps(params or {}, sort_keys=True)]
+        material.extend(f"{name}:{merged.get(name, '')}" for name in CACHE_VARY_HEADERS)
+        return hashlib.sha256("\n".join(material).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _cached_response(not_modified, cached):
+        import requests
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = base64.b64decode(cached['body'])
+        response.headers.update(not_modified.headers)
+        if cached.get('content_type'):
+            response.headers['Content-Type'] = cached['content_type']
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.encoding = 'utf-8'
+        response.from_cache = True
+        return response
+
+
+_default_client = None
+
+def get_http_client():
+    """
+    Returns the process-wide CollectorHttpClient, configured from the environment on first use.
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = CollectorHttpClient(etag_cache=etag_cache_from_env())
+    return _default_client
+
+def reset():
+    """
+    Drops the process-wide client, so the next call to get_http_client() builds a new one.
+    """
+    global _default_client
+    _default_client = None
@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextvars
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+DEFAULT_NAMESPACE = "scoutos"
+# CloudWatch accepts at most 100 values per metric in one EMF document
+MAX_VALUES_PER_DOCUMENT = 100
+
+# --------------------------------------------------------------------------------------------------
+# Invocation State
+# --------------------------------------------------------------------------------------------------
+# The first invocation in a process is a cold start. The metrics of the running invocation are
+# found through a context variable, so instrumented code deep in the runtime needs no extra
+# arguments; work handed to thread pools runs in a copy of the submitting context.
+_cold_start = True
+_cold_start_lock = threading.Lock()
+_current = contextvars.ContextVar('scoutos_metrics', default=None)
+_sink = None
+
+
+def metrics_enabled():
+    """
+    Returns True when METRICS_ENABLED is set to "true".
+    """
+    return os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+
+def set_sink(sink):
+    """
+    Sends metric documents to sink(document) instead of the default output, e.g. a list's append
+    in tests. Pass None to restore the default.
+    """
+    global _sink
+    _sink = sink
+
+def _emit(document):
+    if _sink is not None:
+        _sink(document)
+        return
+    line = json.dumps(document, separators=(',', ':'))
+    path = os.environ.get('METRICS_SINK')
+    if path:
+        with open(path, 'a') as f:
+            f.write(line + '\n')
+    else:
+        # Lambda forwards stdout to CloudWatch Logs, which extracts EMF documents into metrics
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.timing(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullMetrics:
+    """
+    The metrics used when instrumentation is disabled or no invocation is running. Does nothing.
+    """
+
+    enabled = False
+
+    def span(self, name):
+        return _NULL_SPAN
+
+    def timing(self, name, milliseconds):
+        pass
+
+    def count(self, name, value=1, unit="Count"):
+        pass
+
+    def flush(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class InvocationMetrics:
+    """
+    Timing spans and counters of one handler invocation, emitted as CloudWatch EMF documents.
+
+    Every span adds a `<stage>_ms` value; counters are summed. flush() writes the documents with
+    the `Service` dimension and a `ColdStart` property and metric.
+    """
+
+    enabled = True
+
+    def __init__(self, service, cold_start, namespace=None):
+        self.service = service
+        self.cold_start = cold_start
+        self.namespace = namespace or os.environ.get('METRICS_NAMESPACE', DEFAULT_NAMESPACE)
+        self.timings = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def span(self, name):
+        """
+        Returns a context manager that times the stage `name`.
+        """
+        return _Span(self, name)
+
+    def timing(self, name, milliseconds):
+        with self.lock:
+            self.timings.setdefault(name, []).append(milliseconds)
+
+    def count(self, name, value=1, unit="Count"):
+        with self.lock:
+            total, _ = self.counters.get(name, (0, unit))
+            self.counters[name] = (total + value, unit)
+
+    def documents(self):
+        """
+        Returns the EMF documents for everything recorded so far.
+        """
+        with self.lock:
+            timings = {f"{name}_ms": values for name, values in self.timings.items()}
+            counters = dict(self.counters)
+
+        longest = max([len(values) for values in timings.values()] + [1])
+        documents = []
+        for start in range(0, longest, MAX_VALUES_PER_DOCUMENT):
+            document = {"Service": self.service, "ColdStart": self.cold_start}
+            definitions = []
+            for name, values in timings.items():
+                chunk = values[start:start + MAX_VALUES_PER_DOCUMENT]
+                if chunk:
+                    document[name] = [round(value, 3) for value in chunk]
+                    definitions.append({"Name": name, "Unit": "Milliseconds"})
+            if start == 0:
+                document["ColdStarts"] = 1 if self.cold_start else 0
+                definitions.append({"Name": "ColdStarts", "Unit": "Count"})
+                for name, (total, unit) in counters.items():
+                    document[name] = total
+                    definitions.append({"Name": name, "Unit": unit})
+            document["_aws"] = {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["Service"]],
+                    "Metrics": definitions
+                }]
+            }
+            documents.append(document)
+        return documents
+
+    def flush(self):
+        for document in self.documents():
+            try:
+                _emit(document)
+            except Exception as e:
+                # Instrumentation must never fail the invocation
+                logger.warning(f"Failed to emit metrics: {e}")
+
+
+def start_invocation(service):
+    """
+    Starts collecting metrics for a handler invocation and makes them current in this context.
+
+    Returns NULL_METRICS when instrumentation is disabled.
+    """
+    global _cold_start
+    if not metrics_enabled():
+        _current.set(None)
+        return NULL_METRICS
+    with _cold_start_lock:
+        cold_start, _cold_start = _cold_start, False
+    metrics = InvocationMetrics(service, cold_start)
+    _current.set(metrics)
+    return metrics
+
+def finish_invocation(metrics):
+    """
+    Emits the invocation's metrics and clears them from this context.
+    """
+    metrics.flush()
+    _current.set(None)
+
+def current():
+    """
+    Returns the metrics of the running invocation, or NULL_METRICS.
+    """
+    return _current.get() or NULL_METRICS
+
+def span(name):
+    """
+    Times the stage `name` in the running invocation.
+    """
+    return current().span(name)
+
+def count(name, value=1, unit="Count"):
+    """
+    Adds value to the counter `name` of the running invocation.
+    """
+    current().count(name, value, unit)
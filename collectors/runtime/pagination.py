@@ -0,0 +1,121 @@
+"""
+Iterates the items of paginated HTTP APIs.
+
+A page is requested only once the items of the previous page have been consumed, so a collector
+that processes items as they are yielded holds one page in memory however large the result set is.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+# "none": a single response. "link": follow the rel="next" URL of the Link header (GitHub, GitLab,
+# Okta). "cursor": pass the cursor found in each response body back as a query parameter (Slack,
+# Stripe). "page": count up a page number query parameter until a page comes back short or empty.
+STYLES = ("none", "link", "cursor", "page")
+
+
+def get_path(document, path):
+    """
+    Returns the value at a dotted path such as "data.items" (list indices allowed), or None if any
+    step is missing. An empty path returns the document itself.
+    """
+    if not path:
+        return document
+    for step in path.split('.'):
+        if isinstance(document, dict):
+            document = document.get(step)
+        elif isinstance(document, list) and step.lstrip('-').isdigit() and -len(document) <= int(step) < len(document):
+            document = document[int(step)]
+        else:
+            return None
+    return document
+
+
+class Pagination:
+    """
+    How an API splits its results into pages and where the items are in each page.
+
+    items_path is the dotted path of the item list in a response body. Without it, a body that is
+    a list is the item list and any other body is a single item.
+    """
+
+    def __init__(self, style="none", items_path=None, cursor_path=None, cursor_param="cursor",
+                 page_param="page", page_size_param=None, page_size=None, start_page=1, max_pages=None):
+        if style not in STYLES:
+            raise ValueError(f"Unknown pagination style {style!r}, expected one of {', '.join(STYLES)}")
+        if style == "cursor" and not cursor_path:
+            raise ValueError("Cursor pagination needs the cursor_path of the next cursor in the response")
+        self.style = style
+        self.items_path = items_path
+        self.cursor_path = cursor_path
+        self.cursor_param = cursor_param
+        self.page_param = page_param
+        self.page_size_param = page_size_param
+        self.page_size = page_size
+        self.start_page = start_page
+        self.max_pages = max_pages
+
+    def page_items(self, body):
+        """
+        Returns the list of items in a response body.
+        """
+        items = get_path(body, self.items_path)
+        if items is None:
+            return []
+        return items if isinstance(items, list) else [items]
+
+    def pages(self, client, method, url, params=None, headers=None, json=None):
+        """
+        Yields (response, items) for every page, requesting the next page only when asked for it.
+
+        client is a CollectorHttpClient or anything with the same request() method. Raises
+        requests.HTTPError for an error response.
+        """
+        params = dict(params or {})
+        if self.style == "page":
+            params[self.page_param] = self.start_page
+        if self.page_size_param and self.page_size:
+            params[self.page_size_param] = self.page_size
+
+        page_count = 0
+        while url:
+            response = client.request(method, url, params=params, headers=headers, json=json)
+            response.raise_for_status()
+            body = response.json()
+            items = self.page_items(body)
+            page_count += 1
+            yield response, items
+
+            if self.max_pages and page_count >= self.max_pages:
+                logger.info(f"Stopping after {page_count} pages (max_pages)")
+                return
+            url, params = self._next_page(response, body, items, url, params)
+
+    def _next_page(self, response, body, items, url, params):
+        """
+        Returns the (url, params) of the page after response, or (None, None) after the last page.
+        """
+        if self.style == "link":
+            # The next link carries every query parameter, including the page size
+            next_url = response.links.get('next', {}).get('url')
+            return next_url, None
+        if self.style == "cursor":
+            cursor = get_path(body, self.cursor_path)
+            if not cursor or not items:
+                return None, None
+            return url, dict(params, **{self.cursor_param: cursor})
+        if self.style == "page":
+            if not items or (self.page_size and len(items) < self.page_size):
+                return None, None
+            return url, dict(params, **{self.page_param: params[self.page_param] + 1})
+        return None, None
+
+    def items(self, client, method, url, params=None, headers=None, json=None):
+        """
+        Yields the items of every page, one page in memory at a time.
+        """
+        for _, items in self.pages(client, method, url, params, headers, json):
+            yield from items
@@ -0,0 +1,130 @@
+"""
+Streaming collection for inventory-style collectors (IAM users, repository collaborators, audit logs).
+
+Items are pulled lazily from boto3 paginators or paginated HTTP APIs (see pagination.py) and written
+as evidence chunks: each chunk is one evidence object holding up to chunk_size items. A chunk is
+written as soon as it is full and then dropped, so a collector holds one page and one chunk in
+memory however large the inventory is. The sha256 of every chunk object is recorded as it is
+written, and a manifest listing the chunks is written last:
+
+    <collector_name>/<target>/streams/<stream_id>/chunk-00000.json
+    <collector_name>/<target>/streams/<stream_id>/manifest.json
+
+A stream without a manifest is incomplete. Chunks are written directly, without deduplication or
+drift tracking.
+"""
+import uuid
+import hashlib
+import logging
+import itertools
+from datetime import datetime, timezone
+
+from collectors.runtime import metrics
+from collectors.runtime.evidence import write_to_s3
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+DEFAULT_CHUNK_SIZE = 1000  # items per evidence chunk
+
+# --------------------------------------------------------------------------------------------------
+# Item Sources
+# --------------------------------------------------------------------------------------------------
+def iter_boto3_items(client, operation, result_key, page_size=None, **kwargs):
+    """
+    Yields the items under result_key of every page of a boto3 paginator, e.g.
+    iter_boto3_items(get_client('iam'), 'list_users', 'Users').
+
+    botocore requests the next page only once the items of the previous one have been consumed.
+    """
+    pagination_config = {"PageSize": page_size} if page_size else {}
+    for page in client.get_paginator(operation).paginate(PaginationConfig=pagination_config, **kwargs):
+        metrics.count('api_calls')
+        yield from page.get(result_key, ())
+
+
+def chunked(items, size):
+    """
+    Yields lists of up to size consecutive items, consuming items lazily.
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+# --------------------------------------------------------------------------------------------------
+# Streaming Writer
+# --------------------------------------------------------------------------------------------------
+class StreamingEvidenceWriter:
+    """
+    Writes a stream of items as evidence chunks of a collector, recording each chunk's digest.
+
+    Each chunk's evidence_payload is {"chunk_index", "item_count", "items"}. The manifest lists
+    every chunk with its key, evidence_id, item count, size and the sha256 of the stored object,
+    plus a stream sha256 over the chunk digests in order.
+    """
+
+    def __init__(self, collector, target_account_id=None, target_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.collector = collector
+        self.target_account_id = target_account_id or collector.target_account_id
+        self.chunk_size = chunk_size
+        self.stream_id = str(uuid.uuid4())
+        self.prefix = f"{collector.name}/{target_path or self.target_account_id}/streams/{self.stream_id}"
+        self.manifest_key = f"{self.prefix}/manifest.json"
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.chunks = []
+        self.item_count = 0
+        self.stream_sha256 = hashlib.sha256()
+
+    def write_chunk(self, items):
+        """
+        Writes one chunk of items as an evidence object and returns its manifest entry.
+        """
+        index = len(self.chunks)
+        evidence = self.collector.create_evidence(
+            {"chunk_index": index, "item_count": len(items), "items": items}, self.target_account_id
+        )
+        key = f"{self.prefix}/chunk-{index:05d}.json"
+        written = write_to_s3(self.collector.s3_client, self.collector.evidence_bucket, key, evidence)
+        entry = {
+            "key": key,
+            "evidence_id": evidence['evidence_id'],
+            "items": len(items),
+            "bytes": written['bytes'],
+            "sha256": written['sha256']
+        }
+        self.chunks.append(entry)
+        self.item_count += len(items)
+        self.stream_sha256.update(written['sha256'].encode('ascii'))
+        return entry
+
+    def write(self, items):
+        """
+        Consumes items, writing a chunk each time chunk_size items have been read. Returns the
+        manifest.
+        """
+        for chunk in chunked(items, self.chunk_size):
+            self.write_chunk(chunk)
+        return self.close()
+
+    def close(self):
+        """
+        Writes the manifest and returns it.
+        """
+        manifest = {
+            "stream_id": self.stream_id,
+            "collector_name": self.collector.name,
+            "target_account_id": self.target_account_id,
+            "created_at": self.created_at,
+            "chunk_size": self.chunk_size,
+            "items": self.item_count,
+            "chunks": self.chunks,
+            "sha256": self.stream_sha256.hexdigest()
+        }
+        logger.info(f"Writing stream manifest for {self.item_count} items in {len(self.chunks)} chunks")
+        write_to_s3(self.collector.s3_client, self.collector.evidence_bucket, self.manifest_key, manifest)
+        return manifest
@@ -0,0 +1,144 @@
+import os
+import json
+import uuid
+import threading
+from datetime import datetime
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+# The schema ships next to the collectors package; EVIDENCE_SCHEMA_PATH overrides it
+DEFAULT_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'schema', 'evidence.schema.json')
+
+# Errors reported per rejected document; the rest are dropped to keep rejections cheap
+MAX_REPORTED_ERRORS = 5
+
+# --------------------------------------------------------------------------------------------------
+# Validator Cache
+# --------------------------------------------------------------------------------------------------
+# Compiling a validator parses the schema and resolves its keywords, so it happens once per process
+# and schema path. The statement validator checks whole in-toto Statements, the evidence validator
+# checks the bare evidence objects collectors write, against the schema's predicate definition.
+_validators = {}
+_lock = threading.Lock()
+
+
+class EvidenceValidationError(ValueError):
+    """
+    Raised when evidence or an attestation does not conform to the evidence schema.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"Evidence does not conform to the schema: {'; '.join(errors)}")
+
+
+def _check_uuid(value):
+    if isinstance(value, str):
+        uuid.UUID(value)
+    return True
+
+def _check_date_time(value):
+    if isinstance(value, str):
+        # datetime.fromisoformat only accepts the "Z" suffix from Python 3.11
+        datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    return True
+
+def _format_checker():
+    """
+    Returns a format checker for the formats the schema uses, implemented with the standard library.
+    """
+    from jsonschema import FormatChecker
+
+    checker = FormatChecker(formats=())
+    checker.checks('uuid', raises=ValueError)(_check_uuid)
+    checker.checks('date-time', raises=ValueError)(_check_date_time)
+    return checker
+
+def schema_path():
+    return os.environ.get('EVIDENCE_SCHEMA_PATH', DEFAULT_SCHEMA_PATH)
+
+def get_validator(kind="statement"):
+    """
+    Returns the compiled validator for "statement" or "evidence", compiling it on first use.
+    """
+    path = schema_path()
+    cache_key = (kind, path)
+    validator = _validators.get(cache_key)
+    if validator is None:
+        with _lock:
+            validator = _validators.get(cache_key)
+            if validator is None:
+                from jsonschema import Draft7Validator
+
+                with open(path) as f:
+                    schema = json.load(f)
+                if kind == "evidence":
+                    schema = dict(schema['properties']['predicate'], **{"$schema": schema['$schema']})
+                Draft7Validator.check_schema(schema)
+                validator = Draft7Validator(schema, format_checker=_format_checker())
+                _validators[cache_key] = validator
+    return validator
+
+def reset():
+    """
+    Drops the compiled validators, e.g. after the schema changed.
+    """
+    with _lock:
+        _validators.clear()
+
+# --------------------------------------------------------------------------------------------------
+# Validation
+# --------------------------------------------------------------------------------------------------
+def _errors(validator, document):
+    # is_valid stops at the first failure, so conforming documents never build error objects
+    if validator.is_valid(document):
+        return []
+    errors = []
+    for error in validator.iter_errors(document):
+        location = '/'.join(str(part) for part in error.absolute_path) or '<root>'
+        errors.append(f"{location}: {error.message}")
+        if len(errors) == MAX_REPORTED_ERRORS:
+            break
+    return errors
+
+def validate_evidence(evidence):
+    """
+    Raises EvidenceValidationError if the evidence object does not conform to the schema.
+    """
+    errors = _errors(get_validator("evidence"), evidence)
+    if errors:
+        raise EvidenceValidationError(errors)
+
+def validate_statement(statement):
+    """
+    Raises EvidenceValidationError if the in-toto Statement does not conform to the schema.
+
+    The statement may be a parsed object or the raw JSON bytes of an attestation.
+    """
+    if isinstance(statement, (bytes, str)):
+        try:
+            statement = json.loads(statement)
+        except ValueError as e:
+            raise EvidenceValidationError([f"<root>: not valid JSON ({e})"])
+    errors = _errors(get_validator("statement"), statement)
+    if errors:
+        raise EvidenceValidationError(errors)
+
+def validate_batch(documents, kind="statement"):
+    """
+    Validates many documents with one compiled validator.
+
+    Returns a list with None for every conforming document and the EvidenceValidationError for
+    every rejected one, in input order.
+    """
+    validate = validate_statement if kind == "statement" else validate_evidence
+    get_validator(kind)
+    results = []
+    for document in documents:
+        try:
+            validate(document)
+            results.append(None)
+        except EvidenceValidationError as e:
+            results.append(e)
+    return results
@@ -0,0 +1,271 @@
+"""
+Exports evidence from the lake to partitioned Parquet for analytics.
+
+Evidence for one collector and time window is looked up in the local evidence index (see
+evidence_lake/index.py), so the bucket is never listed. It is read in fixed-size batches and
+written as Hive-style partitions that Athena and DuckDB can prune:
+
+    <output>/collector_name=<name>/collection_date=<YYYY-MM-DD>/part-<run_id>-<n>.parquet
+
+Every row holds the evidence metadata, the payload as JSON, and the collector's stable payload
+fields (its PAYLOAD_COLUMNS) as typed `payload_<field>` columns. Memory use is bounded by the batch
+size, however large the window is. Each run records the highest index sequence it exported, so
+incremental runs only export evidence indexed since the previous run for the same window.
+
+Usage:
+    python -m evidence_lake.export --db evidence.sqlite3 --bucket my-evidence-bucket \\
+        --collector aws-iam-password-policy [--since 2025-01-01] [--until 2025-10-01] \\
+        --output ./parquet | s3://my-analytics-bucket/evidence [--full]
+"""
+import os
+import sys
+import json
+import uuid
+import logging
+import argparse
+import functools
+import itertools
+import tempfile
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from collectors.runtime.aws import get_client
+from evidence_lake.index import DEFAULT_DB_PATH, EvidenceIndex
+from evidence_lake.reader import DEFAULT_BATCH_SIZE, DEFAULT_MAX_WORKERS, EvidenceReader
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+COLUMN_TYPES = {
+    "int": pa.int64(),
+    "float": pa.float64(),
+    "bool": pa.bool_(),
+    "string": pa.string()
+}
+
+METADATA_FIELDS = [
+    pa.field("evidence_id", pa.string()),
+    pa.field("target", pa.string()),
+    pa.field("target_account_id", pa.string()),
+    pa.field("collection_timestamp", pa.timestamp("us", tz="UTC")),
+    pa.field("schema_version", pa.string()),
+    pa.field("payload_sha256", pa.string()),
+    pa.field("object_key", pa.string()),
+    pa.field("evidence_payload", pa.string())
+]
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parquet_exports (
+    output TEXT NOT NULL,
+    collector_name TEXT NOT NULL,
+    since TEXT NOT NULL,
+    until TEXT NOT NULL,
+    last_sequence INTEGER NOT NULL,
+    PRIMARY KEY (output, collector_name, since, until)
+);
+"""
+
+# --------------------------------------------------------------------------------------------------
+# Helper Functions
+# --------------------------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def payload_columns(collector_name):
+    """
+    Returns the PAYLOAD_COLUMNS ({field: type name}) declared by the collector, or {}.
+    """
+    from collectors.runner import discover_collectors
+
+    for module in discover_collectors().values():
+        if getattr(module, 'COLLECTOR_NAME', None) == collector_name:
+            return dict(getattr(module, 'PAYLOAD_COLUMNS', {}))
+    return {}
+
+def _coerce(value, type_name):
+    """
+    Returns the value if it has the declared type, otherwise None. bools are not ints here.
+    """
+    if type_name == "bool":
+        return value if isinstance(value, bool) else None
+    if isinstance(value, bool):
+        return None
+    if type_name == "int":
+        return value if isinstance(value, int) else None
+    if type_name == "float":
+        return float(value) if isinstance(value, (int, float)) else None
+    return value if isinstance(value, str) else None
+
+def export_schema(columns):
+    """
+    Returns the Parquet schema for evidence with the given payload columns.
+    """
+    return pa.schema(METADATA_FIELDS + [
+        pa.field(f"payload_{name}", COLUMN_TYPES[type_name]) for name, type_name in columns.items()
+    ])
+
+# --------------------------------------------------------------------------------------------------
+# Parquet Exporter
+# --------------------------------------------------------------------------------------------------
+class ParquetExporter:
+    """
+    Streams indexed evidence of one collector into partitioned Parquet files.
+
+    output is a local directory or an s3://bucket/prefix URL. S3 output is staged one file at a
+    time in a temporary directory and uploaded as soon as the file is complete.
+    """
+
+    def __init__(self, index, bucket, output, s3_client=None, batch_size=DEFAULT_BATCH_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        self.index = index
+        self.bucket = bucket
+        self.output = output.rstrip('/')
+        self._s3_client = s3_client
+        self.batch_size = batch_size
+        self.reader = EvidenceReader(bucket, s3_client, max_workers)
+        self.index.connection.executescript(STATE_SCHEMA)
+
+    @property
+    def s3_client(self):
+        return self._s3_client or get_client('s3')
+
+    def _record(self, row, evidence, columns):
+        payload = evidence.get('evidence_payload')
+        record = {
+            "evidence_id": row['evidence_id'],
+            "target": row['target'],
+            "target_account_id": row['target_account_id'],
+            "collection_timestamp": datetime.fromisoformat(row['collection_timestamp']),
+            "schema_version": evidence.get('schema_version'),
+            "payload_sha256": row['payload_sha256'],
+            "object_key": row['object_key'],
+            "evidence_payload": json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+        }
+        fields = payload if isinstance(payload, dict) else {}
+        for name, type_name in columns.items():
+            record[f"payload_{name}"] = _coerce(fields.get(name), type_name)
+        return record
+
+    # ----------------------------------------------------------------------------------------------
+    # Writing
+    # ----------------------------------------------------------------------------------------------
+    def _open_writer(self, collector_name, collection_date, run_id, file_number, schema):
+        relative_path = (
+            f"collector_name={collector_name}/collection_date={collection_date}/part-{run_id}-{file_number:05d}.parquet"
+        )
+        if self.output.startswith('s3://'):
+            handle, local_path = tempfile.mkstemp(suffix='.parquet')
+            os.close(handle)
+        else:
+            local_path = os.path.join(self.output, relative_path)
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        return relative_path, local_path, pq.ParquetWriter(local_path, schema, compression='zstd')
+
+    def _finish_writer(self, relative_path, local_path, writer):
+        writer.close()
+        if self.output.startswith('s3://'):
+            bucket, _, prefix = self.output[len('s3://'):].partition('/')
+            key = f"{prefix}/{relative_path}" if prefix else relative_path
+            logger.info(f"Uploading Parquet export to s3://{bucket}/{key}")
+            self.s3_client.upload_file(local_path, bucket, key)
+            os.remove(local_path)
+        return relative_path
+
+    # ----------------------------------------------------------------------------------------------
+    # Export
+    # ----------------------------------------------------------------------------------------------
+    def _state_key(self, collector_name, since, until):
+        return (self.output, collector_name, since or "", until or "")
+
+    def last_sequence(self, collector_name, since=None, until=None):
+        row = self.index.connection.execute(
+            "SELECT last_sequence FROM parquet_exports WHERE output = ? AND collector_name = ? AND since = ? AND until = ?",
+            self._state_key(collector_name, since, until)
+        ).fetchone()
+        return row['last_sequence'] if row else None
+
+    def export(self, collector_name, since=None, until=None, incremental=True):
+        """
+        Exports the collector's evidence collected in [since, until) and returns a run summary.
+
+        With incremental on, only evidence indexed after the previous run for the same collector,
+        window and output is exported.
+        """
+        after_sequence = self.last_sequence(collector_name, since, until) if incremental else None
+        # Evidence indexed while the export runs is left for the next run
+        snapshot = self.index.connection.execute("SELECT MAX(sequence) AS sequence FROM evidence").fetchone()['sequence']
+        columns = payload_columns(collector_name)
+        schema = export_schema(columns)
+        run_id = datetime.now().strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:8]
+
+        rows = (
+            row for row in self.index.iter_between(
+                since, until, collector_name, include_heartbeats=False, after_sequence=after_sequence
+            )
+            if row['sequence'] <= (snapshot or 0)
+        )
+
+        summary = {"collector_name": collector_name, "records": 0, "files": []}
+        last_sequence = after_sequence
+        current = None  # (collection_date, relative_path, local_path, writer)
+        try:
+            for batch in self.reader.iter_batches(rows, self.batch_size):
+                records = [self._record(row, evidence, columns) for row, evidence in batch]
+
+                # Rows arrive in timestamp order, so each partition is written in one stretch
+                for collection_date, group in itertools.groupby(records, key=lambda r: r['collection_timestamp'].date().isoformat()):
+                    if current is None or current[0] != collection_date:
+                        if current is not None:
+                            summary["files"].append(self._finish_writer(*current[1:]))
+                        current = (collection_date,) + self._open_writer(
+                            collector_name, collection_date, run_id, len(summary["files"]), schema
+                        )
+                    current[3].write_table(pa.Table.from_pylist(list(group), schema=schema))
+
+                summary["records"] += len(records)
+                last_sequence = max([last_sequence or 0] + [row['sequence'] for row, _ in batch])
+
+            if current is not None:
+                summary["files"].append(self._finish_writer(*current[1:]))
+                current = None
+        finally:
+            if current is not None:
+                current[3].close()
+
+        if last_sequence is not None:
+            with self.index.lock, self.index.connection:
+                self.index.connection.execute(
+                    "INSERT OR REPLACE INTO parquet_exports (output, collector_name, since, until, last_sequence) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    self._state_key(collector_name, since, until) + (last_sequence,)
+                )
+
+        logger.info(f"Exported {summary['records']} evidence records to {len(summary['files'])} Parquet files.")
+        return summary
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+# --------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export scoutos evidence to partitioned Parquet.")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite evidence index file")
+    parser.add_argument('--bucket', required=True, help="Evidence bucket the index was built from")
+    parser.add_argument('--collector', required=True, help="Collector name, e.g. aws-iam-password-policy")
+    parser.add_argument('--since')
+    parser.add_argument('--until')
+    parser.add_argument('--output', required=True, help="Local directory or s3://bucket/prefix")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--full', action='store_true', help="Export the whole window, not just new evidence")
+    args = parser.parse_args(argv)
+
+    with EvidenceIndex(args.db) as index:
+        exporter = ParquetExporter(index, args.bucket, args.output, batch_size=args.batch_size)
+        summary = exporter.export(args.collector, args.since, args.until, incremental=not args.full)
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
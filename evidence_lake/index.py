@@ -0,0 +1,429 @@
+"""
+Maintains a local SQLite index of the evidence lake.
+
+Evidence objects have random names, so finding the latest evidence for a target or everything
+collected in a time window would otherwise mean listing and reading the whole bucket. The index
+keeps one row per evidence record, keyed by collector, target and collection timestamp, with the
+payload digest and the S3 object that holds it, so those questions are answered locally.
+
+The index is filled by a one-time backfill and then kept current from S3 event notifications,
+either as event JSON files or by polling the SQS queue the bucket notifies. Every indexed object is
+remembered by key and ETag, so both backfills and events only read objects that are new.
+
+Usage:
+    python -m evidence_lake.index --db evidence.sqlite3 backfill --bucket my-evidence-bucket
+    python -m evidence_lake.index --db evidence.sqlite3 apply-events event.json [...]
+    python -m evidence_lake.index --db evidence.sqlite3 poll --queue-url https://sqs...
+    python -m evidence_lake.index --db evidence.sqlite3 latest --collector aws-iam-password-policy
+    python -m evidence_lake.index --db evidence.sqlite3 range --since 2025-10-01 --until 2025-11-01
+"""
+import sys
+import gzip
+import json
+import sqlite3
+import logging
+import argparse
+import threading
+from urllib.parse import unquote_plus
+from datetime import datetime, timezone
+
+from collectors.runtime.aws import get_client
+from collectors.runtime.dedup import HEARTBEAT_PREFIX, LATEST_PREFIX, payload_digest
+from collectors.runtime.drift import DELTA_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+DEFAULT_DB_PATH = "evidence-index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence (
+    sequence INTEGER PRIMARY KEY AUTOINCREMENT,
+    evidence_id TEXT NOT NULL UNIQUE,
+    collector_name TEXT NOT NULL,
+    target TEXT NOT NULL,
+    target_account_id TEXT,
+    collection_timestamp TEXT NOT NULL,
+    payload_sha256 TEXT NOT NULL,
+    object_key TEXT NOT NULL,
+    record_index INTEGER,
+    source_key TEXT NOT NULL,
+    heartbeat INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS evidence_by_target ON evidence (collector_name, target, collection_timestamp);
+CREATE INDEX IF NOT EXISTS evidence_by_time ON evidence (collection_timestamp);
+CREATE INDEX IF NOT EXISTS evidence_by_source ON evidence (source_key);
+CREATE TABLE IF NOT EXISTS objects (
+    key TEXT PRIMARY KEY,
+    etag TEXT
+);
+"""
+
+COLUMNS = (
+    "evidence_id", "collector_name", "target", "target_account_id", "collection_timestamp",
+    "payload_sha256", "object_key", "record_index", "source_key", "heartbeat"
+)
+
+# --------------------------------------------------------------------------------------------------
+# Helper Functions
+# --------------------------------------------------------------------------------------------------
+def normalize_timestamp(value):
+    """
+    Returns an ISO 8601 timestamp in UTC with microseconds, so timestamps sort as strings.
+
+    Dates and timestamps without a timezone are taken to be UTC.
+    """
+    parsed = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+def object_kind(key):
+    """
+    Returns "heartbeat", "manifest", "evidence" or None for keys the index ignores.
+    """
+    if key.startswith((LATEST_PREFIX, DELTA_PREFIX)):
+        return None
+    if key.startswith(HEARTBEAT_PREFIX):
+        return "heartbeat"
+    if '/batches/' in key:
+        return "manifest" if key.endswith('/manifest.json') else None
+    if '/streams/' in key:
+        # Stream chunks are evidence objects; their manifest only lists them
+        return None if key.endswith('/manifest.json') else "evidence"
+    if key.endswith('.json') and key.count('/') >= 2:
+        return "evidence"
+    return None
+
+def evidence_target(key):
+    """
+    Returns the target of a plain evidence key: its directory below the collector name, without
+    the streams/<stream_id> directories of stream chunks.
+    """
+    target = key.rsplit('/', 1)[0].split('/', 1)[1]
+    if '/streams/' in target:
+        target = target.rsplit('/streams/', 1)[0]
+    return target
+
+def _evidence_row(evidence, target, object_key, source_key, record_index=None):
+    return {
+        "evidence_id": evidence['evidence_id'],
+        "collector_name": evidence['collector_name'],
+        "target": target,
+        "target_account_id": evidence.get('target_account_id'),
+        "collection_timestamp": normalize_timestamp(evidence['collection_timestamp']),
+        "payload_sha256": payload_digest(evidence['evidence_payload']),
+        "object_key": object_key,
+        "record_index": record_index,
+        "source_key": source_key,
+        "heartbeat": 0
+    }
+
+def iter_event_objects(event):
+    """
+    Yields (bucket, key, etag, removed) for every S3 notification record in an S3, SNS or SQS event.
+    """
+    for record in event.get('Records', []):
+        if 's3' in record:
+            obj = record['s3']['object']
+            removed = record.get('eventName', '').startswith('ObjectRemoved')
+            yield record['s3']['bucket']['name'], unquote_plus(obj['key']), obj.get('eTag'), removed
+        elif 'body' in record or 'Sns' in record:
+            body = record['body'] if 'body' in record else record['Sns']['Message']
+            notification = json.loads(body)
+            # SNS-to-SQS deliveries wrap the notification once more
+            if 'Message' in notification and 'Records' not in notification:
+                notification = json.loads(notification['Message'])
+            yield from iter_event_objects(notification)
+
+# --------------------------------------------------------------------------------------------------
+# Evidence Index
+# --------------------------------------------------------------------------------------------------
+class EvidenceIndex:
+    """
+    A SQLite index of evidence records in one evidence bucket.
+
+    Rows are keyed by evidence ID. `target` is the evidence key's directory below the collector
+    name (the target account ID unless the collector set a target path), the same directory for
+    every chunk of a stream, and for records inside batch parts the target path the manifest lists
+    for them, so a batched collection indexes like the same evidence written one object at a time.
+    Heartbeats are indexed as collections of the unchanged evidence they point to, so "latest"
+    reflects when a target was last collected.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, s3_client=None):
+        self.path = path
+        self._s3_client = s3_client
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @property
+    def s3_client(self):
+        return self._s3_client or get_client('s3')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    # ----------------------------------------------------------------------------------------------
+    # Updates
+    # ----------------------------------------------------------------------------------------------
+    def is_indexed(self, key, etag=None):
+        row = self.connection.execute("SELECT etag FROM objects WHERE key = ?", (key,)).fetchone()
+        return row is not None and (etag is None or row['etag'] is None or row['etag'].strip('"') == etag.strip('"'))
+
+    def _get_json(self, bucket, key):
+        response = self.s3_client.get_object(Bucket=bucket, Key=key)
+        return json.loads(response['Body'].read()), response.get('ETag')
+
+    def _rows(self, bucket, key, kind):
+        """
+        Reads an object and returns (etag, rows to index).
+        """
+        document, etag = self._get_json(bucket, key)
+
+        if kind == "evidence":
+            # Attestations carry the evidence object as the predicate of an in-toto Statement
+            if isinstance(document, dict) and 'predicate' in document:
+                document = document['predicate']
+            return etag, [_evidence_row(document, evidence_target(key), key, key)]
+
+        if kind == "heartbeat":
+            target = key[len(HEARTBEAT_PREFIX):].rsplit('/', 1)[0].split('/', 1)[1]
+            return etag, [{
+                "evidence_id": document['evidence_id'],
+                "collector_name": document['collector_name'],
+                "target": target,
+                "target_account_id": document.get('target_account_id'),
+                "collection_timestamp": normalize_timestamp(document['collection_timestamp']),
+                "payload_sha256": document['payload_sha256'],
+                "object_key": document['latest_evidence_key'],
+                "record_index": None,
+                "source_key": key,
+                "heartbeat": 1
+            }]
+
+        # A batch manifest is written last, so its parts are complete when it appears
+        rows = []
+        for part in document['parts']:
+            # Parts list the target path of each record; older parts and records without one
+            # fall back to the target account ID
+            targets = part.get('targets') or []
+            body = self.s3_client.get_object(Bucket=bucket, Key=part['key'])['Body']
+            with gzip.GzipFile(fileobj=body) as lines:
+                for record_index, line in enumerate(lines):
+                    evidence = json.loads(line)
+                    target = record_index < len(targets) and targets[record_index] or evidence['target_account_id']
+                    rows.append(_evidence_row(evidence, target, part['key'], key, record_index))
+        return etag, rows
+
+    def add_object(self, bucket, key, etag=None):
+        """
+        Indexes one S3 object unless it is already indexed with the same ETag.
+
+        Returns the number of evidence rows added, or 0 for indexed and ignored objects.
+        """
+        kind = object_kind(key)
+        if kind is None or self.is_indexed(key, etag):
+            return 0
+
+        try:
+            etag, rows = self._rows(bucket, key, kind)
+        except (KeyError, TypeError, ValueError) as e:
+            # Remember objects that are not evidence, so they are not read again
+            logger.warning(f"Skipping s3://{bucket}/{key}, it is not an evidence object: {e}")
+            rows = []
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM evidence WHERE source_key = ?", (key,))
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO evidence ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [tuple(row[column] for column in COLUMNS) for row in rows]
+            )
+            self.connection.execute("INSERT OR REPLACE INTO objects (key, etag) VALUES (?, ?)", (key, etag))
+        return len(rows)
+
+    def remove_object(self, key):
+        """
+        Drops the rows indexed from an object that was deleted from the bucket.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM evidence WHERE source_key = ?", (key,))
+            self.connection.execute("DELETE FROM objects WHERE key = ?", (key,))
+
+    def apply_event(self, event):
+        """
+        Applies an S3 event notification (directly, or delivered via SNS or SQS) to the index.
+
+        Returns the number of evidence rows added.
+        """
+        added = 0
+        for bucket, key, etag, removed in iter_event_objects(event):
+            if removed:
+                self.remove_object(key)
+            else:
+                added += self.add_object(bucket, key, etag)
+        return added
+
+    def backfill(self, bucket, prefix=""):
+        """
+        Indexes every object in the bucket that is not indexed yet.
+
+        The bucket is listed in full, but only new or changed objects are read.
+        Returns (objects listed, evidence rows added).
+        """
+        listed = added = 0
+        for page in self.s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                listed += 1
+                added += self.add_object(bucket, obj['Key'], obj.get('ETag'))
+        logger.info(f"Backfill listed {listed} objects and indexed {added} evidence records.")
+        return listed, added
+
+    def poll_queue(self, queue_url, max_messages=None, wait_seconds=1):
+        """
+        Applies S3 notifications from an SQS queue until it is drained. Returns the rows added.
+
+        A message is deleted only after it has been applied, so failures are redelivered.
+        """
+        sqs = get_client('sqs')
+        added = processed = 0
+        while max_messages is None or processed < max_messages:
+            messages = sqs.receive_message(
+                QueueUrl=queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=wait_seconds
+            ).get('Messages', [])
+            if not messages:
+                break
+            for message in messages:
+                added += self.apply_event({'Records': [{'body': message['Body']}]})
+                sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+                processed += 1
+        return added
+
+    # ----------------------------------------------------------------------------------------------
+    # Queries
+    # ----------------------------------------------------------------------------------------------
+    def latest(self, collector_name=None, target=None):
+        """
+        Returns the most recent evidence row for every (collector, target), optionally filtered.
+        """
+        conditions, parameters = self._filters(collector_name, target)
+        rows = self.connection.execute(f"""
+            SELECT {', '.join(COLUMNS)} FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY collector_name, target ORDER BY collection_timestamp DESC, evidence_id
+                ) AS position
+                FROM evidence {conditions}
+            ) WHERE position = 1
+            ORDER BY collector_name, target
+        """, parameters).fetchall()
+        return [dict(row) for row in rows]
+
+    def between(self, since=None, until=None, collector_name=None, target=None, include_heartbeats=True):
+        """
+        Returns evidence rows collected in [since, until), oldest first.
+        """
+        return list(self.iter_between(since, until, collector_name, target, include_heartbeats))
+
+    def iter_between(self, since=None, until=None, collector_name=None, target=None, include_heartbeats=True,
+                     after_sequence=None):
+        """
+        Yields evidence rows collected in [since, until), oldest first, without loading them all.
+
+        Every row carries a `sequence` that grows in the order rows were indexed. Pass the highest
+        sequence seen so far as after_sequence to only get rows indexed since then.
+        """
+        conditions, parameters = self._filters(collector_name, target)
+        clauses = [conditions[len("WHERE "):]] if conditions else []
+        if since:
+            clauses.append("collection_timestamp >= ?")
+            parameters.append(normalize_timestamp(since))
+        if until:
+            clauses.append("collection_timestamp < ?")
+            parameters.append(normalize_timestamp(until))
+        if not include_heartbeats:
+            clauses.append("heartbeat = 0")
+        if after_sequence is not None:
+            clauses.append("sequence > ?")
+            parameters.append(after_sequence)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = self.connection.execute(
+            f"SELECT sequence, {', '.join(COLUMNS)} FROM evidence {where} "
+            "ORDER BY collection_timestamp, evidence_id",
+            parameters
+        )
+        for row in cursor:
+            yield dict(row)
+
+    def _filters(self, collector_name, target):
+        clauses, parameters = [], []
+        if collector_name:
+            clauses.append("collector_name = ?")
+            parameters.append(collector_name)
+        if target:
+            clauses.append("target = ?")
+            parameters.append(target)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), parameters
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+# --------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and query the scoutos evidence lake locally.")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite index file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backfill = commands.add_parser('backfill', help="Index every object not indexed yet")
+    backfill.add_argument('--bucket', required=True)
+    backfill.add_argument('--prefix', default="")
+
+    apply_events = commands.add_parser('apply-events', help="Apply S3 event notification JSON files")
+    apply_events.add_argument('events', nargs='+')
+
+    poll = commands.add_parser('poll', help="Apply S3 event notifications from an SQS queue")
+    poll.add_argument('--queue-url', required=True)
+
+    latest = commands.add_parser('latest', help="Latest evidence per collector and target")
+    latest.add_argument('--collector')
+    latest.add_argument('--target')
+
+    between = commands.add_parser('range', help="Evidence collected in a time range")
+    between.add_argument('--since')
+    between.add_argument('--until')
+    between.add_argument('--collector')
+    between.add_argument('--target')
+    between.add_argument('--no-heartbeats', action='store_true')
+
+    args = parser.parse_args(argv)
+
+    with EvidenceIndex(args.db) as index:
+        if args.command == 'backfill':
+            listed, added = index.backfill(args.bucket, args.prefix)
+            result = {"objects_listed": listed, "records_added": added}
+        elif args.command == 'apply-events':
+            added = 0
+            for path in args.events:
+                with open(path) as f:
+                    added += index.apply_event(json.load(f))
+            result = {"records_added": added}
+        elif args.command == 'poll':
+            result = {"records_added": index.poll_queue(args.queue_url)}
+        elif args.command == 'latest':
+            result = index.latest(args.collector, args.target)
+        else:
+            result = index.between(args.since, args.until, args.collector, args.target, not args.no_heartbeats)
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""
+Evaluates the grc-controls-witness Rego policies over batches of evidence in-process.
+
+The witness tool evaluates a policy against one attestation at a time. This engine loads a policy
+bundle once and evaluates each control against whole batches of evidence, from the evidence
+index, from a listing of the lake or from local files, and reports a pass/fail matrix of the
+latest evidence per control and target.
+
+Policies made only of boolean rules over `input` (comparisons of references to literals, bare
+references and `not`) are compiled to Python closures and evaluated natively. Any other policy is
+evaluated by a local `opa` binary, one process per batch.
+
+Usage:
+    python -m evidence_lake.policy --policy grc-controls-witness/iam_password_policy.json \\
+        (--db evidence.sqlite3 --bucket my-evidence-bucket [--collector NAME] [--history]
+         | --bucket my-evidence-bucket [--prefix aws-iam-password-policy/]
+         | --evidence evidence.json [...])
+"""
+import os
+import re
+import sys
+import json
+import base64
+import shutil
+import logging
+import argparse
+import operator
+import itertools
+import subprocess
+import tempfile
+
+from evidence_lake.index import DEFAULT_DB_PATH, EvidenceIndex, evidence_target, object_kind
+from evidence_lake.reader import DEFAULT_BATCH_SIZE, EvidenceReader
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+STATEMENT_TYPE = "https://in-toto.io/Statement/v1"
+EVIDENCE_PREDICATE_TYPE = "https://scoutos.dev/evidence/v1"
+
+# Imports that only enable keywords and do not change what a policy means
+KEYWORD_IMPORTS = ("future.keywords", "rego.v1")
+
+_UNDEFINED = object()
+
+_COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge
+}
+
+_NAME = r"[A-Za-z_][A-Za-z0-9_]*"
+_LITERAL = r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|"(?:[^"\\]|\\.)*"|true|false|null'
+_REFERENCE = rf'input(?:\.{_NAME}|\["(?:[^"\\]|\\.)*"\]|\[\d+\])*'
+_TERM = rf"(?:{_REFERENCE}|{_LITERAL})"
+_EXPRESSION = re.compile(rf"^(not\s+)?({_TERM})(?:\s*(==|!=|<=|>=|<|>)\s*({_TERM}))?$")
+_RULE_HEAD = re.compile(rf"^({_NAME})(?:\s*:?=\s*({_LITERAL}))?(?:\s+if)?\s*\{{(.*)$")
+_DEFAULT = re.compile(rf"^default\s+({_NAME})\s*:?=\s*({_LITERAL})$")
+_REFERENCE_PART = re.compile(rf'\.({_NAME})|\["((?:[^"\\]|\\.)*)"\]|\[(\d+)\]')
+
+
+class UnsupportedPolicy(ValueError):
+    """
+    Raised when a policy uses Rego the native evaluator does not implement.
+    """
+
+# --------------------------------------------------------------------------------------------------
+# Value Semantics
+# --------------------------------------------------------------------------------------------------
+def _type_rank(value):
+    # OPA orders values of different types: null < boolean < number < string < array < object
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, list):
+        return 4
+    return 5
+
+def _compare(op, left, right):
+    left_rank, right_rank = _type_rank(left), _type_rank(right)
+    if left_rank != right_rank:
+        return _COMPARISONS[op](left_rank, right_rank)
+    if left_rank >= 4 and op not in ("==", "!="):
+        left, right = json.dumps(left, sort_keys=True), json.dumps(right, sort_keys=True)
+    return _COMPARISONS[op](left, right)
+
+def _truthy(value):
+    return value is not _UNDEFINED and value is not False
+
+# --------------------------------------------------------------------------------------------------
+# Native Compilation
+# --------------------------------------------------------------------------------------------------
+def _compile_term(term):
+    """
+    Returns a function of the input document that yields the term's value or _UNDEFINED.
+    """
+    if not term.startswith("input"):
+        value = json.loads(term)
+        return lambda document: value
+
+    path = []
+    for name, quoted, index in _REFERENCE_PART.findall(term[len("input"):]):
+        if name:
+            path.append(name)
+        elif index:
+            path.append(int(index))
+        else:
+            path.append(json.loads(f'"{quoted}"'))
+
+    def resolve(document):
+        for part in path:
+            if isinstance(part, int) and isinstance(document, list) and 0 <= part < len(document):
+                document = document[part]
+            elif isinstance(part, str) and isinstance(document, dict) and part in document:
+                document = document[part]
+            else:
+                return _UNDEFINED
+        return document
+    return resolve
+
+def _compile_expression(expression):
+    match = _EXPRESSION.match(expression)
+    if not match:
+        raise UnsupportedPolicy(f"Unsupported expression: {expression}")
+    negated, left, op, right = match.groups()
+    left = _compile_term(left)
+
+    if op is None:
+        test = lambda document: _truthy(left(document))
+    else:
+        right = _compile_term(right)
+
+        def test(document):
+            left_value, right_value = left(document), right(document)
+            if left_value is _UNDEFINED or right_value is _UNDEFINED:
+                return False
+            return _compare(op, left_value, right_value)
+
+    if negated:
+        return lambda document: not test(document)
+    return test
+
+def _statements(source):
+    """
+    Splits a module into statements, with comments removed and rule bodies joined on one line.
+    """
+    lines = []
+    for line in source.splitlines():
+        # Drop comments outside string literals
+        line = re.sub(r'("(?:[^"\\]|\\.)*")|#.*', lambda m: m.group(1) or "", line).strip()
+        if line:
+            lines.append(line)
+
+    statements, current, depth = [], [], 0
+    for line in lines:
+        current.append(line)
+        depth += line.count("{") - line.count("}")
+        if depth == 0:
+            statements.append(" ; ".join(current))
+            current = []
+    if current:
+        raise UnsupportedPolicy("Unbalanced braces")
+    return statements
+
+
+class NativePolicy:
+    """
+    A Rego module compiled to Python closures.
+
+    rules maps each rule name to its default value and its bodies with their values. A rule takes
+    the value of its first satisfied body, else its default, else it is undefined.
+    """
+
+    def __init__(self, source):
+        self.package = None
+        self.rules = {}
+        for statement in _statements(source):
+            self._compile_statement(statement)
+        if self.package is None:
+            raise UnsupportedPolicy("Missing package declaration")
+        if "allow" not in self.rules and "deny" not in self.rules:
+            raise UnsupportedPolicy("Policy defines neither an allow nor a deny rule")
+
+    def _rule(self, name):
+        return self.rules.setdefault(name, {"default": _UNDEFINED, "bodies": []})
+
+    def _compile_statement(self, statement):
+        if statement.startswith("package "):
+            self.package = statement[len("package "):].strip()
+            return
+        if statement.startswith("import "):
+            path = statement[len("import "):].strip()
+            if not any(path == allowed or path.startswith(allowed + ".") for allowed in KEYWORD_IMPORTS):
+                raise UnsupportedPolicy(f"Unsupported import: {path}")
+            return
+
+        match = _DEFAULT.match(statement)
+        if match:
+            self._rule(match.group(1))["default"] = json.loads(match.group(2))
+            return
+
+        match = _RULE_HEAD.match(statement)
+        if not match or not match.group(3).rstrip().endswith("}"):
+            raise UnsupportedPolicy(f"Unsupported statement: {statement}")
+        name, value, body = match.groups()
+        expressions = [part.strip() for part in body.rstrip()[:-1].split(";") if part.strip()]
+        if not expressions:
+            raise UnsupportedPolicy(f"Empty rule body: {statement}")
+        tests = [_compile_expression(expression) for expression in expressions]
+        self._rule(name)["bodies"].append((tests, True if value is None else json.loads(value)))
+
+    def rule_value(self, name, document):
+        rule = self.rules.get(name)
+        if rule is None:
+            return _UNDEFINED
+        for tests, value in rule["bodies"]:
+            if all(test(document) for test in tests):
+                return value
+        return rule["default"]
+
+    def evaluate(self, document):
+        """
+        Returns True if the document passes: allow is true (when defined) and deny is not.
+        """
+        if "allow" in self.rules and self.rule_value("allow", document) is not True:
+            return False
+        return not _truthy(self.rule_value("deny", document))
+
+    def evaluate_batch(self, documents):
+        return [self.evaluate(document) for document in documents]
+
+# --------------------------------------------------------------------------------------------------
+# OPA Fallback
+# --------------------------------------------------------------------------------------------------
+class OpaPolicy:
+    """
+    A Rego module evaluated by the `opa` binary. A whole batch is evaluated by one `opa eval`.
+    """
+
+    def __init__(self, source, opa_binary="opa"):
+        match = re.search(r"^\s*package\s+(\S+)", source, re.MULTILINE)
+        if not match:
+            raise ValueError("Missing package declaration")
+        self.package = match.group(1)
+        self.source = source
+        self.opa_binary = opa_binary
+
+    def evaluate_batch(self, documents):
+        binary = shutil.which(self.opa_binary)
+        if binary is None:
+            raise RuntimeError(f"This policy needs the opa binary, but '{self.opa_binary}' was not found on PATH")
+
+        query = f"[[i, doc] | some i; item := input.items[i]; doc := data.{self.package} with input as item]"
+        with tempfile.NamedTemporaryFile('w', suffix='.rego', delete=False) as module:
+            module.write(self.source)
+        try:
+            completed = subprocess.run(
+                [binary, "eval", "--format", "json", "--stdin-input", "--data", module.name, query],
+                input=json.dumps({"items": documents}), capture_output=True, text=True, check=True
+            )
+        finally:
+            os.remove(module.name)
+
+        # Fail closed: a document opa returned nothing for is never allowed
+        results = [False] * len(documents)
+        evaluated = json.loads(completed.stdout)["result"][0]["expressions"][0]["value"]
+        if len(evaluated) != len(documents):
+            raise RuntimeError(f"opa returned {len(evaluated)} results for {len(documents)} documents")
+        for index, package in evaluated:
+            allowed = package.get("allow", True) is True
+            results[index] = allowed and not package.get("deny")
+        return results
+
+# --------------------------------------------------------------------------------------------------
+# Policy Engine
+# --------------------------------------------------------------------------------------------------
+def compile_policy(source, opa_binary="opa"):
+    """
+    Returns a NativePolicy when the module is simple enough, otherwise an OpaPolicy.
+    """
+    try:
+        return NativePolicy(source)
+    except UnsupportedPolicy as e:
+        logger.info(f"Evaluating policy with opa: {e}")
+        return OpaPolicy(source, opa_binary)
+
+def as_statement(evidence):
+    """
+    Returns the in-toto Statement a witness policy sees as `input` for an evidence object.
+    """
+    if isinstance(evidence, dict) and "predicate" in evidence:
+        return evidence
+    return {"_type": STATEMENT_TYPE, "subject": [], "predicateType": EVIDENCE_PREDICATE_TYPE, "predicate": evidence}
+
+
+class PolicyEngine:
+    """
+    Evaluates a set of controls, each a compiled Rego policy, over batches of evidence.
+    """
+
+    def __init__(self, controls):
+        # [(control name, attestation type or None, compiled policy)]
+        self.controls = controls
+
+    @classmethod
+    def from_files(cls, paths, opa_binary="opa"):
+        """
+        Loads witness policy files (.json, with base64 Rego modules) and plain .rego files.
+        """
+        controls = []
+        for path in paths:
+            with open(path) as f:
+                content = f.read()
+            if not path.endswith(".json"):
+                name = os.path.splitext(os.path.basename(path))[0]
+                controls.append((name, None, compile_policy(content, opa_binary)))
+                continue
+            for step in json.loads(content).get("steps", {}).values():
+                for attestation in step.get("attestations", []):
+                    for policy in attestation.get("regopolicies", []):
+                        source = base64.b64decode(policy["module"]).decode("utf-8")
+                        controls.append((policy["name"], attestation.get("type"), compile_policy(source, opa_binary)))
+        return cls(controls)
+
+    def evaluate(self, items, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Evaluates every control against (target, evidence) pairs and yields one result per pair and
+        control that applies to it.
+        """
+        items = iter(items)
+        while True:
+            batch = list(itertools.islice(items, batch_size))
+            if not batch:
+                return
+            documents = [as_statement(evidence) for _, evidence in batch]
+            for name, attestation_type, policy in self.controls:
+                applicable = [
+                    position for position, document in enumerate(documents)
+                    if attestation_type is None or document.get("predicateType") == attestation_type
+                ]
+                outcomes = policy.evaluate_batch([documents[position] for position in applicable])
+                for position, passed in zip(applicable, outcomes):
+                    target, evidence = batch[position]
+                    predicate = documents[position]["predicate"]
+                    yield {
+                        "control": name,
+                        "target": target,
+                        "evidence_id": predicate.get("evidence_id"),
+                        "collection_timestamp": predicate.get("collection_timestamp"),
+                        "passed": passed
+                    }
+
+
+def pass_fail_matrix(results):
+    """
+    Returns {control: {target: "pass" | "fail"}} for the latest evidence of every target.
+    """
+    latest = {}
+    for result in results:
+        cell = (result["control"], result["target"])
+        if cell not in latest or (result["collection_timestamp"] or "") >= (latest[cell]["collection_timestamp"] or ""):
+            latest[cell] = result
+
+    matrix = {}
+    for (control, target), result in sorted(latest.items()):
+        matrix.setdefault(control, {})[target] = "pass" if result["passed"] else "fail"
+    return matrix
+
+# --------------------------------------------------------------------------------------------------
+# Evidence Sources
+# --------------------------------------------------------------------------------------------------
+def iter_index_evidence(index, reader, collector_name=None, history=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yields (target, evidence) for the latest evidence per target in the index, or all of it.
+    """
+    rows = (
+        index.iter_between(collector_name=collector_name, include_heartbeats=False) if history
+        else index.latest(collector_name)
+    )
+    for batch in reader.iter_batches(rows, batch_size):
+        for row, evidence in batch:
+            yield row["target"], evidence
+
+def iter_lake_evidence(reader, prefix="", batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yields (target, evidence) for every plain evidence object in the bucket under prefix.
+    """
+    def rows():
+        paginator = reader.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=reader.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                if object_kind(obj["Key"]) == "evidence":
+                    yield {"object_key": obj["Key"], "target": evidence_target(obj["Key"])}
+
+    for batch in reader.iter_batches(rows(), batch_size):
+        for row, evidence in batch:
+            yield row["target"], evidence
+
+def iter_file_evidence(paths):
+    """
+    Yields (target account ID, evidence) from JSON files and NDJSON files.
+    """
+    for path in paths:
+        with open(path) as f:
+            documents = [json.loads(line) for line in f if line.strip()] if path.endswith(".ndjson") else [json.load(f)]
+        for document in documents:
+            evidence = document.get("predicate", document)
+            yield evidence.get("target_account_id"), evidence
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+# --------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate grc-controls-witness policies over evidence.")
+    parser.add_argument('--policy', action='append', required=True, help="Witness policy (.json) or Rego file")
+    parser.add_argument('--db', help=f"Evidence index to read from, e.g. {DEFAULT_DB_PATH}")
+    parser.add_argument('--bucket', help="Evidence bucket")
+    parser.add_argument('--prefix', default="", help="Key prefix when reading the bucket without an index")
+    parser.add_argument('--collector', help="Only evaluate this collector's evidence from the index")
+    parser.add_argument('--history', action='store_true', help="Evaluate all indexed evidence, not just the latest")
+    parser.add_argument('--evidence', nargs='+', help="Local evidence or attestation files (.json or .ndjson)")
+    parser.add_argument('--opa', default="opa", help="opa binary for policies that cannot be evaluated natively")
+    parser.add_argument('--results', action='store_true', help="Print every result, not just the matrix")
+    args = parser.parse_args(argv)
+
+    if not args.evidence and not args.bucket:
+        parser.error("Pass --evidence files, or --bucket with or without --db")
+
+    engine = PolicyEngine.from_files(args.policy, args.opa)
+    index = None
+    try:
+        if args.evidence:
+            items = iter_file_evidence(args.evidence)
+        elif args.db:
+            index = EvidenceIndex(args.db)
+            items = iter_index_evidence(index, EvidenceReader(args.bucket), args.collector, args.history)
+        else:
+            items = iter_lake_evidence(EvidenceReader(args.bucket), args.prefix)
+        results = list(engine.evaluate(items))
+    finally:
+        if index is not None:
+            index.close()
+
+    output = {"matrix": pass_fail_matrix(results)}
+    if args.results:
+        output["results"] = results
+    print(json.dumps(output, indent=2))
+    return 0 if all(result["passed"] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
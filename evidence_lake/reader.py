@@ -0,0 +1,86 @@
+import gzip
+import json
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from collectors.runtime.aws import get_client
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+DEFAULT_BATCH_SIZE = 1000  # evidence objects held in memory at once
+DEFAULT_MAX_WORKERS = 8  # concurrent S3 reads
+PART_CACHE_SIZE = 2  # decoded batch parts kept in memory
+
+# --------------------------------------------------------------------------------------------------
+# Evidence Reader
+# --------------------------------------------------------------------------------------------------
+class EvidenceReader:
+    """
+    Reads the evidence objects that evidence index rows point to.
+
+    A row names an `object_key` and, for records inside a batch part, the `record_index` of the
+    record in the part. Plain objects may be bare evidence or in-toto Statements carrying the
+    evidence as their predicate; either way the evidence object is returned.
+    """
+
+    def __init__(self, bucket, s3_client=None, max_workers=DEFAULT_MAX_WORKERS):
+        self.bucket = bucket
+        self._s3_client = s3_client
+        self.max_workers = max_workers
+        self._parts = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def s3_client(self):
+        return self._s3_client or get_client('s3')
+
+    def _part_lines(self, key):
+        """
+        Returns the NDJSON lines of a batch part. Consecutive records usually share a part, so the
+        last PART_CACHE_SIZE parts are kept decoded and each is only downloaded once.
+        """
+        with self.lock:
+            entry = self._parts.get(key)
+            if entry is None:
+                entry = self._parts[key] = {"lock": threading.Lock(), "lines": None}
+                while len(self._parts) > PART_CACHE_SIZE:
+                    self._parts.popitem(last=False)
+
+        with entry["lock"]:
+            if entry["lines"] is None:
+                body = self.s3_client.get_object(Bucket=self.bucket, Key=key)['Body']
+                with gzip.GzipFile(fileobj=body) as part:
+                    entry["lines"] = part.readlines()
+        return entry["lines"]
+
+    def load(self, row):
+        """
+        Returns the evidence object an index row points to.
+        """
+        if row.get('record_index') is not None:
+            return json.loads(self._part_lines(row['object_key'])[row['record_index']])
+        document = json.loads(self.s3_client.get_object(Bucket=self.bucket, Key=row['object_key'])['Body'].read())
+        # Attestations carry the evidence object as the predicate of an in-toto Statement
+        if isinstance(document, dict) and 'predicate' in document:
+            return document['predicate']
+        return document
+
+    def iter_batches(self, rows, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Yields lists of (row, evidence) with at most batch_size entries, reading each list concurrently.
+
+        rows may be any iterable, including a lazy index query; only one batch is held at a time.
+        """
+        rows = iter(rows)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    return
+                yield list(zip(batch, executor.map(self.load, batch)))
@@ -34,12 +34,23 @@ data "aws_iam_policy_document" "boundary_policy_doc" {
       "logs:PutLogEvents",
       "secretsmanager:GetSecretValue",
       "kms:Decrypt",
-      "s3:PutObject"
+      "s3:PutObject",
+      "s3:AbortMultipartUpload",
+      "sts:AssumeRole",
+      "organizations:ListAccounts",
+      "events:PutEvents"
     ]
     resources = [
       "arn:aws:logs:*:*:*",
-      "*", # Secrets and KMS keys are scoped in the role
+      "*", # Secrets, KMS keys and event buses are scoped in the role
       "${var.evidence_bucket_arn}/*"
     ]
   }
+
+  statement {
+    sid       = "AllowLatestEvidencePointerRead"
+    effect    = "Allow"
+    actions   = ["s3:GetObject"]
+    resources = ["${var.evidence_bucket_arn}/latest/*"]
+  }
 }
\ No newline at end of file
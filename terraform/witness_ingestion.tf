@@ -15,9 +15,37 @@ resource "aws_secretsmanager_secret_version" "signing_key_version" {
   secret_string = tls_private_key.signing_key.private_key_pem
 }
 
+# Processed-digest ledger: attestations already signed or uploaded, so that retries and replays skip
+# them (see witness_ingestion/ledger.py)
+resource "aws_dynamodb_table" "ingestion_ledger" {
+  name         = "scoutos-ingestion-ledger"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "ledger_key"
+
+  attribute {
+    name = "ledger_key"
+    type = "S"
+  }
+
+  point_in_time_recovery {
+    enabled = true
+  }
+}
+
 resource "null_resource" "zip_lambda" {
+  triggers = {
+    # Rebuild when any module the package can contain, or the requirements, change
+    sources = sha256(join("", [
+      for source in sort(fileset("${path.module}/..", "{witness_ingestion,collectors/runtime}/*.{py,txt}")) :
+      filesha256("${path.module}/../${source}")
+    ]))
+  }
+
   provisioner "local-exec" {
-    command = "zip witness_ingestion.zip witness_ingestion/handler.py"
+    # Packages the handler with only the first-party modules it imports, the evidence schema and
+    # its third-party dependencies built for the Lambda runtime (see witness_ingestion/package.py)
+    working_dir = "${path.module}/.."
+    command     = "python -m witness_ingestion.package --output ${abspath(path.module)}/witness_ingestion.zip"
   }
 }
 
@@ -54,10 +82,19 @@ resource "aws_iam_policy" "ingestion_lambda_policy" {
       },
       {
         Action   = [
-          "secretsmanager:GetSecretValue"
+          "secretsmanager:GetSecretValue",
+          "secretsmanager:DescribeSecret"
         ]
         Effect   = "Allow"
         Resource = aws_secretsmanager_secret.signing_key.arn
+      },
+      {
+        Action   = [
+          "dynamodb:BatchGetItem",
+          "dynamodb:BatchWriteItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.ingestion_ledger.arn
       }
     ]
   })
@@ -71,14 +108,16 @@ resource "aws_iam_role_policy_attachment" "ingestion_lambda_attachment" {
 resource "aws_lambda_function" "ingestion_lambda" {
   function_name = "scoutos-ingestion-lambda"
   role          = aws_iam_role.ingestion_lambda_role.arn
-  handler       = "handler.handler"
+  handler       = "witness_ingestion.handler.handler"
   runtime       = "python3.9"
-  filename      = "witness_ingestion.zip"
+  filename      = "${path.module}/witness_ingestion.zip"
 
   environment {
     variables = {
-      ARCHIVISTA_URL   = "https://archivista.testifysec.io"
-      SIGNING_KEY_ARN = aws_secretsmanager_secret.signing_key.arn
+      ARCHIVISTA_URL         = "https://archivista.testifysec.io"
+      SIGNING_KEY_ARN        = aws_secretsmanager_secret.signing_key.arn
+      METRICS_ENABLED        = "true"
+      INGESTION_LEDGER_TABLE = aws_dynamodb_table.ingestion_ledger.name
     }
   }
 
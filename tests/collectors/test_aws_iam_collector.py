@@ -108,4 +108,178 @@ def test_iam_collector_without_password_policy(s3_client, iam_client, mocker):
     )["Body"].read().decode("utf-8")
     evidence_data = json.loads(file_content)
 
-    assert evidence_data["evidence_payload"]["error"] == "NoPasswordPolicyFound"
\ No newline at end of file
+    assert evidence_data["evidence_payload"]["error"] == "NoPasswordPolicyFound"
+
+@pytest.fixture
+def sts_client(aws_credentials):
+    from collectors.aws_iam import collector
+    collector._account_cache.clear()
+    with mock_aws():
+        yield boto3.client("sts", region_name="us-east-1")
+
+
+def _account_iam_client(sts_client, account_id):
+    credentials = sts_client.assume_role(
+        RoleArn=f"arn:aws:iam::{account_id}:role/scoutos-iam-collector-role",
+        RoleSessionName="test-setup"
+    )["Credentials"]
+    return boto3.client(
+        "iam",
+        region_name="us-east-1",
+        aws_access_key_id=credentials["AccessKeyId"],
+        aws_secret_access_key=credentials["SecretAccessKey"],
+        aws_session_token=credentials["SessionToken"]
+    )
+
+
+def test_iam_collector_fan_out(s3_client, sts_client, mocker):
+    """
+    Test that fan-out mode writes per-account evidence and summarizes each account.
+    """
+    from collectors.aws_iam import collector
+
+    # 1. Setup the mock environment
+    bucket_name = "test-evidence-bucket"
+    s3_client.create_bucket(Bucket=bucket_name)
+
+    account_ids = ["111111111111", "222222222222", "333333333333"]
+    _account_iam_client(sts_client, "111111111111").update_account_password_policy(MinimumPasswordLength=14)
+    _account_iam_client(sts_client, "222222222222").update_account_password_policy(MinimumPasswordLength=8)
+
+    mocker.patch.dict(os.environ, {"EVIDENCE_BUCKET": bucket_name})
+
+    # 2. Run the collector twice; the second run reuses the cached credentials and clients
+    result = handler({"accounts": account_ids, "max_workers": 2}, None)
+    cached_entries = {role_arn: dict(entry) for role_arn, entry in collector._account_cache.items()}
+    handler({"accounts": account_ids, "max_workers": 2}, None)
+
+    # 3. Assert the results
+    assert result["status"] == "success"
+    assert result["succeeded"] == 3
+    assert set(result["accounts"]) == set(account_ids)
+    assert len(cached_entries) == 3
+    for role_arn, entry in collector._account_cache.items():
+        assert entry["credentials"] is cached_entries[role_arn]["credentials"]
+        assert entry["clients"]["iam"] is cached_entries[role_arn]["clients"]["iam"]
+
+    objects = s3_client.list_objects_v2(Bucket=bucket_name)["Contents"]
+    lengths = {}
+    for obj in objects:
+        evidence_data = json.loads(s3_client.get_object(Bucket=bucket_name, Key=obj["Key"])["Body"].read())
+        assert obj["Key"].startswith(f"aws-iam-password-policy/{evidence_data['target_account_id']}/")
+        lengths[evidence_data["target_account_id"]] = evidence_data["evidence_payload"].get("MinimumPasswordLength")
+
+    assert len(objects) == 6
+    assert lengths == {"111111111111": 14, "222222222222": 8, "333333333333": None}
+
+
+def test_iam_collector_fan_out_reports_failed_accounts(s3_client, sts_client, mocker):
+    """
+    Test that a failing account is reported without stopping the others.
+    """
+    from collectors.aws_iam import collector
+
+    bucket_name = "test-evidence-bucket"
+    s3_client.create_bucket(Bucket=bucket_name)
+
+    get_account_client = collector.get_account_client
+
+    def fail_for_one_account(sts, account_id, role_name, service_name):
+        if account_id == "222222222222":
+            raise RuntimeError("AccessDenied")
+        return get_account_client(sts, account_id, role_name, service_name)
+
+    mocker.patch.object(collector, "get_account_client", side_effect=fail_for_one_account)
+    mocker.patch.dict(os.environ, {
+        "EVIDENCE_BUCKET": bucket_name,
+        "TARGET_ACCOUNT_IDS": "111111111111,222222222222"
+    })
+
+    result = handler({}, None)
+
+    assert result["status"] == "partial_failure"
+    assert result["accounts"]["111111111111"] == {"status": "success"}
+    assert result["accounts"]["222222222222"] == {"status": "error", "message": "AccessDenied"}
+    assert len(s3_client.list_objects_v2(Bucket=bucket_name)["Contents"]) == 1
+
+
+def test_iam_collector_fan_out_reports_an_error_when_every_account_fails(s3_client, sts_client, mocker):
+    """
+    Test that a fan-out in which no account succeeds is reported as an error.
+    """
+    from collectors.aws_iam import collector
+
+    bucket_name = "test-evidence-bucket"
+    s3_client.create_bucket(Bucket=bucket_name)
+    mocker.patch.object(collector, "get_account_client", side_effect=RuntimeError("AccessDenied"))
+    mocker.patch.dict(os.environ, {
+        "EVIDENCE_BUCKET": bucket_name,
+        "TARGET_ACCOUNT_IDS": "111111111111,222222222222"
+    })
+
+    result = handler({}, None)
+
+    assert result["status"] == "error"
+    assert result["succeeded"] == 0
+    assert result["failed"] == 2
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=bucket_name)
+
+
+def test_account_clients_expire_with_their_credentials(sts_client):
+    """
+    Test that account clients are reused while the credentials are fresh and rebuilt with them.
+    """
+    from datetime import datetime, timezone
+
+    from collectors.aws_iam import collector
+
+    first = collector.get_account_client(sts_client, "111111111111", "scoutos-iam-collector-role", "iam")
+    assert collector.get_account_client(sts_client, "111111111111", "scoutos-iam-collector-role", "iam") is first
+
+    (entry,) = collector._account_cache.values()
+    entry["credentials"]["Expiration"] = datetime.now(timezone.utc)
+    refreshed = collector.get_account_client(sts_client, "111111111111", "scoutos-iam-collector-role", "iam")
+
+    (refreshed_entry,) = collector._account_cache.values()
+    assert refreshed is not first
+    assert refreshed_entry["credentials"] is not entry["credentials"]
+
+
+def test_iam_collector_dedup_writes_heartbeat_when_unchanged(s3_client, iam_client, mocker):
+    """
+    Test that with dedup on, an unchanged policy only produces a heartbeat on the next run.
+    """
+    bucket_name = "test-evidence-bucket"
+    account_id = "123456789012"
+    s3_client.create_bucket(Bucket=bucket_name)
+    iam_client.update_account_password_policy(MinimumPasswordLength=10)
+
+    mocker.patch.dict(os.environ, {
+        "EVIDENCE_BUCKET": bucket_name,
+        "TARGET_ACCOUNT_ID": account_id,
+        "EVIDENCE_DEDUP": "true"
+    })
+
+    # Two runs with the same policy, then one after it changed
+    handler({}, None)
+    handler({}, None)
+    iam_client.update_account_password_policy(MinimumPasswordLength=14)
+    handler({}, None)
+
+    def keys(prefix):
+        response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
+        return [obj["Key"] for obj in response.get("Contents", [])]
+
+    assert len(keys("aws-iam-password-policy/")) == 2
+    heartbeats = keys(f"heartbeats/aws-iam-password-policy/{account_id}/")
+    assert len(heartbeats) == 1
+
+    pointer = json.loads(s3_client.get_object(
+        Bucket=bucket_name, Key=f"latest/aws-iam-password-policy/{account_id}.json"
+    )["Body"].read())
+    latest = json.loads(s3_client.get_object(Bucket=bucket_name, Key=pointer["evidence_key"])["Body"].read())
+    assert latest["evidence_payload"]["MinimumPasswordLength"] == 14
+
+    heartbeat = json.loads(s3_client.get_object(Bucket=bucket_name, Key=heartbeats[0])["Body"].read())
+    assert heartbeat["target_account_id"] == account_id
+    assert heartbeat["latest_evidence_key"] in keys("aws-iam-password-policy/")
@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import json
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from collectors.runtime.batch_writer import BatchEvidenceWriter
+
+
+@pytest.fixture
+def s3_client():
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-evidence-bucket")
+        yield s3
+
+
+def _evidence(i, padding=""):
+    return {
+        "evidence_id": f"evidence-{i}",
+        "collector_name": "test-collector",
+        "collection_timestamp": "2025-10-13T19:18:00+00:00",
+        "target_account_id": f"account-{i}",
+        "evidence_payload": {"index": i, "padding": padding},
+        "schema_version": "1.0.0"
+    }
+
+
+def _read_part(s3_client, key):
+    body = s3_client.get_object(Bucket="test-evidence-bucket", Key=key)["Body"].read()
+    return body, [json.loads(line) for line in gzip.decompress(body).splitlines()]
+
+
+def test_parts_rotate_on_record_count_and_manifest_lists_them(s3_client):
+    """
+    Test that evidence is split into parts by record count and described by the manifest.
+    """
+    with BatchEvidenceWriter(s3_client, "test-evidence-bucket", "test-collector", max_records=4) as writer:
+        for i in range(10):
+            writer.add(_evidence(i))
+
+    prefix = f"test-collector/batches/{writer.batch_id}/"
+    manifest = json.loads(s3_client.get_object(Bucket="test-evidence-bucket", Key=f"{prefix}manifest.json")["Body"].read())
+
+    assert manifest["records"] == 10
+    assert [part["records"] for part in manifest["parts"]] == [4, 4, 2]
+    assert [part["key"] for part in manifest["parts"]] == [f"{prefix}part-{i:05d}.ndjson.gz" for i in range(3)]
+
+    evidence = []
+    for part in manifest["parts"]:
+        body, records = _read_part(s3_client, part["key"])
+        assert part["sha256"] == hashlib.sha256(body).hexdigest()
+        assert part["compressed_bytes"] == len(body)
+        evidence.extend(records)
+    assert evidence == [_evidence(i) for i in range(10)]
+
+
+def test_parts_are_compact(s3_client):
+    """
+    Test that NDJSON lines are canonical JSON: sorted keys and compact separators.
+    """
+    writer = BatchEvidenceWriter(s3_client, "test-evidence-bucket", "test-collector")
+    writer.add(_evidence(0))
+    manifest = writer.close()
+
+    body = s3_client.get_object(Bucket="test-evidence-bucket", Key=manifest["parts"][0]["key"])["Body"].read()
+    assert gzip.decompress(body) == json.dumps(_evidence(0), separators=(",", ":"), sort_keys=True).encode("utf-8") + b"\n"
+
+
+def test_large_part_uses_multipart_upload(s3_client, mocker):
+    """
+    Test that a part larger than the chunk size is streamed with a multipart upload.
+    """
+    create_multipart_upload = mocker.spy(s3_client, "create_multipart_upload")
+    chunk_size = 5 * 1024 * 1024
+
+    with BatchEvidenceWriter(s3_client, "test-evidence-bucket", "test-collector", chunk_size=chunk_size) as writer:
+        # Random padding barely compresses, so ~12 MB of NDJSON needs more than one chunk
+        for i in range(12):
+            writer.add(_evidence(i, padding=os.urandom(512 * 1024).hex()))
+
+    assert create_multipart_upload.call_count == 1
+    _, records = _read_part(s3_client, writer.parts[0]["key"])
+    assert [record["evidence_id"] for record in records] == [f"evidence-{i}" for i in range(12)]
+
+
+def test_failed_batch_writes_no_manifest(s3_client):
+    """
+    Test that a batch interrupted by an error is not published with a manifest.
+    """
+    with pytest.raises(RuntimeError):
+        with BatchEvidenceWriter(s3_client, "test-evidence-bucket", "test-collector") as writer:
+            writer.add(_evidence(0))
+            raise RuntimeError("collection failed")
+
+    assert "Contents" not in s3_client.list_objects_v2(Bucket="test-evidence-bucket")
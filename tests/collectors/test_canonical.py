@@ -0,0 +1,140 @@
+import enum
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+
+import boto3
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from moto import mock_aws
+from securesystemslib.signer import CryptoSigner, SSlibKey
+
+from collectors.runtime import canonical
+from collectors.runtime.evidence import create_evidence_object, write_to_s3
+from witness_ingestion.dsse import sign_envelope
+
+# The example of RFC 8785 section 3.2.2 and its canonical form
+RFC_EXAMPLE = {
+    "numbers": [333333333.33333329, 1E30, 4.50, 2e-3, 0.000000000000000000000000001],
+    "string": "€$\u000F\u000aA'B\"\\\\\"/",
+    "literals": [None, True, False]
+}
+RFC_CANONICAL = r'''{"literals":[null,true,false],"numbers":[333333333.3333333,1e+30,4.5,0.002,1e-27],"string":"€$\u000f\nA'B\"\\\\\"/"}'''
+
+
+@pytest.fixture(params=["orjson", "python"])
+def backend(request, monkeypatch):
+    """
+    Runs a test with each encoder backend.
+    """
+    if request.param == "orjson":
+        monkeypatch.setattr(canonical, "_orjson", pytest.importorskip("orjson"))
+    else:
+        monkeypatch.setattr(canonical, "_orjson", False)
+    return request.param
+
+
+@pytest.mark.parametrize("number, expected", [
+    (0.0, "0"), (-0.0, "0"), (1.0, "1"), (-1.5, "-1.5"), (0.1, "0.1"), (1e-6, "0.000001"), (1e-7, "1e-7"),
+    (1e20, "100000000000000000000"), (1e21, "1e+21"), (5e-324, "5e-324"), (9007199254740992.0, "9007199254740992"),
+    (-1.7976931348623157e308, "-1.7976931348623157e+308"), (2 ** 70, "1180591620717411303424")
+])
+def test_numbers_take_their_ecmascript_form(number, expected):
+    """
+    Test that numbers are written in their shortest ECMAScript form.
+    """
+    assert canonical.format_number(number) == expected
+
+
+def test_rfc_8785_example(backend):
+    """
+    Test that the example of RFC 8785 encodes to its canonical form.
+    """
+    assert canonical.dumps(RFC_EXAMPLE) == RFC_CANONICAL.encode("utf-8")
+
+
+def test_names_are_sorted_by_utf16_code_units(backend):
+    """
+    Test the member ordering example of RFC 8785 section 3.2.3, where code points and UTF-16 disagree.
+    """
+    names = ["€", "\r", "דּ", "1", "\U0001F600", "\u0080", "ö"]
+    encoded = canonical.dumps({name: index for index, name in enumerate(names)})
+
+    assert list(json.loads(encoded)) == ["\r", "1", "\u0080", "ö", "€", "\U0001F600", "דּ"]
+
+
+def test_backends_agree(backend):
+    """
+    Test that both backends give the same bytes as sorted, compact, non-ASCII JSON when there are no floats.
+    """
+    value = {"users": [{"UserName": f"user-{i}", "Groups": ("dev", "ops"), "Mfa": i % 2 == 0, "Note": None,
+                        "Name": "Jürgen \U0001F600", "Id": 2 ** 64 + i} for i in range(20)]}
+
+    expected = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    assert canonical.dumps(value) == expected
+    assert canonical.encode(value) == (expected, hashlib.sha256(expected).hexdigest())
+
+
+def test_values_without_a_canonical_form_are_rejected(backend):
+    """
+    Test that NaN, infinities, non-string names and unsupported types raise.
+    """
+    for value in ({"a": float("nan")}, [float("inf")]):
+        with pytest.raises(ValueError):
+            canonical.dumps(value)
+    for value in ({1: "a"}, {"when": object()}):
+        with pytest.raises(TypeError):
+            canonical.dumps(value)
+
+
+class Level(str, enum.Enum):
+    HIGH = "high"
+
+
+@pytest.mark.parametrize("value", [
+    {"when": datetime(2025, 10, 1, tzinfo=timezone.utc)},
+    [uuid.UUID(int=1)],
+    {"level": Level.HIGH, "items": ("a", 1)}
+])
+def test_backends_agree_on_other_types(value, monkeypatch):
+    """
+    Test that values orjson would encode natively give the same bytes or the same error with both backends.
+    """
+    def outcome(backend):
+        monkeypatch.setattr(canonical, "_orjson", backend)
+        try:
+            return canonical.dumps(value)
+        except (TypeError, ValueError) as e:
+            return type(e)
+
+    assert outcome(pytest.importorskip("orjson")) == outcome(False)
+
+
+def test_encode_member_splices_an_encoded_member():
+    """
+    Test that splicing an already encoded member gives the bytes of encoding the whole object.
+    """
+    evidence = create_evidence_object("test-collector", {"b": [1.5, 2], "a": "x"}, "123456789012")
+    payload_body = canonical.dumps(evidence["evidence_payload"])
+
+    assert canonical.encode_member(evidence, "evidence_payload", payload_body) == canonical.dumps(evidence)
+
+
+@mock_aws
+def test_stored_bytes_are_the_signed_bytes():
+    """
+    Test that the digest write_to_s3 returns is the sha256 of the stored object and of the payload a
+    DSSE envelope signs for the same evidence.
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="test-evidence-bucket")
+    evidence = create_evidence_object("test-collector", {"Users": [{"Name": "é", "Score": 0.5}]}, "123456789012")
+
+    written = write_to_s3(s3, "test-evidence-bucket", "evidence.json", evidence)
+    stored = s3.get_object(Bucket="test-evidence-bucket", Key="evidence.json")["Body"].read()
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    envelope = sign_envelope(evidence, [CryptoSigner(private_key, SSlibKey.from_crypto(private_key.public_key()))])
+
+    assert written["sha256"] == hashlib.sha256(stored).hexdigest() == canonical.digest(evidence)
+    assert envelope.payload == stored
@@ -0,0 +1,25 @@
+import hashlib
+import json
+
+from collectors.runtime.dedup import payload_digest
+
+
+def test_payload_digest_is_canonical():
+    """
+    Test that key order and whitespace do not change the payload digest.
+    """
+    first = {"MinimumPasswordLength": 14, "RequireSymbols": True, "Nested": {"b": 1, "a": [1, 2]}}
+    second = json.loads('{"Nested": {"a": [1, 2], "b": 1},  "RequireSymbols": true, "MinimumPasswordLength": 14}')
+
+    assert payload_digest(first) == payload_digest(second)
+    assert payload_digest(first) == hashlib.sha256(
+        b'{"MinimumPasswordLength":14,"Nested":{"a":[1,2],"b":1},"RequireSymbols":true}'
+    ).hexdigest()
+
+
+def test_payload_digest_changes_with_content():
+    """
+    Test that any change to the payload changes its digest.
+    """
+    assert payload_digest({"MinimumPasswordLength": 14}) != payload_digest({"MinimumPasswordLength": 15})
+    assert payload_digest([1, 2]) != payload_digest([2, 1])
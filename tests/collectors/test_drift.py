@@ -0,0 +1,117 @@
+import json
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from collectors.runtime import aws
+from collectors.runtime.dedup import emit_evidence
+from collectors.runtime.drift import apply_patch, json_patch
+from collectors.runtime.evidence import create_evidence_object, write_to_s3
+
+BUCKET_NAME = "test-evidence-bucket"
+
+
+@pytest.fixture
+def s3_client(mocker):
+    mocker.patch.dict(os.environ, {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "EVIDENCE_DRIFT": "true"
+    })
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        yield s3
+
+
+def _emit(s3_client, payload):
+    evidence = create_evidence_object("github-branch-protection", payload, "my-org")
+    key = f"github-branch-protection/my-org-api/{evidence['evidence_id']}.json"
+    emit_evidence(s3_client, BUCKET_NAME, key, evidence, lambda bucket, key, data: write_to_s3(s3_client, bucket, key, data))
+    return key, evidence
+
+
+def _read(s3_client, key):
+    return json.loads(s3_client.get_object(Bucket=BUCKET_NAME, Key=key)["Body"].read())
+
+
+def _deltas(s3_client):
+    response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix="deltas/")
+    return [_read(s3_client, obj["Key"]) for obj in response.get("Contents", [])]
+
+
+@pytest.mark.parametrize("old, new", [
+    ({"a": 1, "b": {"c": [1, 2, 3]}}, {"a": 1, "b": {"c": [1, 5]}, "d": None}),
+    ({"rules": [{"pattern": "main"}]}, {"rules": [{"pattern": "main"}, {"pattern": "release/*"}]}),
+    ({"a/b": 1, "m~n": 2}, {"a/b": 2}),
+    ({"flag": 1}, {"flag": True}),
+    ([1, 2], {"now": "an object"})
+])
+def test_json_patch_round_trips(old, new):
+    """
+    Test that applying the computed patch to the old document yields the new one.
+    """
+    patch = json_patch(old, new)
+
+    assert apply_patch(old, patch) == new
+    assert json_patch(new, new) == []
+
+
+def test_json_patch_is_compact():
+    """
+    Test that a change deep inside a document is a single operation at its path.
+    """
+    old = {"rules": [{"pattern": "main", "requiredApprovingReviewCount": 2, "requiredStatusCheckContexts": ["ci"]}]}
+    new = {"rules": [{"pattern": "main", "requiredApprovingReviewCount": 1, "requiredStatusCheckContexts": ["ci"]}]}
+
+    assert json_patch(old, new) == [{"op": "replace", "path": "/rules/0/requiredApprovingReviewCount", "value": 1}]
+    assert json_patch({"count": 1}, {"count": 1.0}) == []
+
+
+def test_changes_are_stored_as_deltas_with_change_events(s3_client, mocker):
+    """
+    Test that the first evidence becomes the baseline and later changes are stored as patches.
+    """
+    mocker.patch.dict(os.environ, {"DRIFT_EVENT_BUS": "scoutos-drift"})
+    aws.get_client("events").create_event_bus(Name="scoutos-drift")
+    put_events = mocker.spy(aws.get_client("events"), "put_events")
+
+    _, first = _emit(s3_client, {"requiresApprovingReviews": True, "requiredApprovingReviewCount": 2})
+    second_key, second = _emit(s3_client, {"requiresApprovingReviews": True, "requiredApprovingReviewCount": 1})
+    _emit(s3_client, {"requiresApprovingReviews": True, "requiredApprovingReviewCount": 1})
+
+    (delta,) = _deltas(s3_client)
+    assert delta["previous_evidence_id"] == first["evidence_id"]
+    assert delta["evidence_id"] == second["evidence_id"]
+    assert delta["evidence_key"] == second_key
+    assert delta["patch"] == [{"op": "replace", "path": "/requiredApprovingReviewCount", "value": 1}]
+    assert apply_patch(first["evidence_payload"], delta["patch"]) == second["evidence_payload"]
+
+    # Unchanged evidence produces no event, so downstream work follows real changes only
+    events = [json.loads(call.kwargs["Entries"][0]["Detail"]) for call in put_events.call_args_list]
+    assert [event["change"] for event in events] == ["initial", "modified"]
+    assert events[1]["paths"] == ["/requiredApprovingReviewCount"]
+    assert events[1]["delta_key"] == f"deltas/github-branch-protection/my-org-api/{second['evidence_id']}.json"
+    assert put_events.call_args.kwargs["Entries"][0]["EventBusName"] == "scoutos-drift"
+
+
+def test_drift_with_dedup_writes_heartbeats_for_unchanged_evidence(s3_client, mocker):
+    """
+    Test that drift tracking and deduplication share the latest pointer.
+    """
+    mocker.patch.dict(os.environ, {"EVIDENCE_DEDUP": "true"})
+
+    _emit(s3_client, {"requiresLinearHistory": False})
+    _emit(s3_client, {"requiresLinearHistory": False})
+    _emit(s3_client, {"requiresLinearHistory": True})
+
+    pointer = _read(s3_client, "latest/github-branch-protection/my-org-api.json")
+    assert pointer["payload"] == {"requiresLinearHistory": True}
+    assert len(s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix="heartbeats/")["Contents"]) == 1
+    assert [delta["patch"] for delta in _deltas(s3_client)] == [
+        [{"op": "replace", "path": "/requiresLinearHistory", "value": True}]
+    ]
@@ -0,0 +1,230 @@
+import gzip
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+import pytest
+import requests
+from moto import mock_aws
+
+
+class GitHubStandIn:
+    """
+    A local stand-in for the GitHub GraphQL API that serves a synthetic organization
+    and counts the requests it receives.
+    """
+
+    def __init__(self, repo_count, protected_every=3, rule_count=1, fail_on_request=None):
+        self.repositories = [
+            {
+                "name": f"repo-{i:05d}",
+                "isArchived": False,
+                "defaultBranchRef": {"name": "main"},
+                "branchProtectionRules": [
+                    {"pattern": "main", "requiresApprovingReviews": True, "requiredApprovingReviewCount": 2}
+                ] + [{"pattern": f"release-{n}"} for n in range(1, rule_count)] if i % protected_every == 0 else []
+            }
+            for i in range(repo_count)
+        ]
+        self.fail_on_request = fail_on_request
+        self.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stand_in.requests.append((self.path, body, dict(self.headers)))
+                if len(stand_in.requests) == stand_in.fail_on_request:
+                    self.send_response(400)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                response = json.dumps(stand_in.graphql(body["variables"])).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def graphql(self, variables):
+        if "name" in variables:
+            repository = next(node for node in self.repositories if node["name"] == variables["name"])
+            return {"data": {"repository": {"branchProtectionRules": self._page(
+                repository["branchProtectionRules"], variables["cursor"], variables["pageSize"]
+            )}}}
+
+        page = self._page(self.repositories, variables["cursor"], variables["pageSize"])
+        page["nodes"] = [
+            dict(node, branchProtectionRules=self._page(node["branchProtectionRules"], None, variables["pageSize"]))
+            for node in page["nodes"]
+        ]
+        return {"data": {"repositoryOwner": {"repositories": page}}}
+
+    @staticmethod
+    def _page(items, cursor, page_size):
+        start = int(cursor or 0)
+        end = start + page_size
+        return {"pageInfo": {"hasNextPage": end < len(items), "endCursor": str(end)}, "nodes": items[start:end]}
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def s3_client(mocker):
+    """A moto S3 client with the evidence bucket and the GitHub token secret in place."""
+    mocker.patch.dict(os.environ, {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SECURITY_TOKEN": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "EVIDENCE_BUCKET": "test-evidence-bucket",
+        "SECRET_NAME": "github-token",
+        "TARGET_ACCOUNT_ID": "my-org",
+        "COLLECTION_MODE": "organization"
+    })
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-evidence-bucket")
+        secrets = boto3.client("secretsmanager", region_name="us-east-1")
+        secrets.create_secret(Name="github-token", SecretString=json.dumps({"GITHUB_TOKEN": "test-token"}))
+
+        yield s3
+
+
+@pytest.fixture
+def collector(s3_client):
+    """The GitHub collector module, configured for organization mode."""
+    from collectors.github import collector as github_collector
+    return github_collector
+
+
+def _list_evidence(s3_client):
+    keys = []
+    for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket="test-evidence-bucket"):
+        keys.extend(obj["Key"] for obj in page.get("Contents", []))
+    return keys
+
+
+def test_organization_mode_batches_repositories_per_request(collector, s3_client, mocker):
+    """
+    Test that organization mode fetches many repositories per GraphQL request and writes
+    one evidence object per repository.
+    """
+    with GitHubStandIn(repo_count=250) as github:
+        mocker.patch.dict(os.environ, {"GITHUB_API_URL": github.url})
+        result = collector.handler({}, None)
+
+    assert result == {"status": "success", "repositories": 250}
+
+    # 250 repositories are fetched in 3 pages instead of 250 REST calls
+    assert len(github.requests) == 3
+    assert all(path == "/graphql" for path, _, _ in github.requests)
+    assert github.requests[0][2]["Authorization"] == "bearer test-token"
+    assert [body["variables"]["cursor"] for _, body, _ in github.requests] == [None, "100", "200"]
+
+    keys = _list_evidence(s3_client)
+    assert len(keys) == 250
+    assert "github-branch-protection/my-org-repo-00003/" in keys[3]
+
+    evidence_data = json.loads(s3_client.get_object(Bucket="test-evidence-bucket", Key=keys[3])["Body"].read())
+    assert evidence_data["evidence_payload"]["repository"] == "repo-00003"
+    assert evidence_data["evidence_payload"]["branch_protection_rules"][0]["requiredApprovingReviewCount"] == 2
+
+
+def test_organization_mode_combined_layout(collector, s3_client, mocker):
+    """
+    Test that the combined layout writes a single evidence object for the whole organization.
+    """
+    with GitHubStandIn(repo_count=120) as github:
+        mocker.patch.dict(os.environ, {"GITHUB_API_URL": github.url, "EVIDENCE_LAYOUT": "combined"})
+        result = collector.handler({}, None)
+
+    assert result["repositories"] == 120
+    assert len(github.requests) == 2
+
+    keys = _list_evidence(s3_client)
+    assert len(keys) == 1
+    assert keys[0].startswith("github-branch-protection/my-org/")
+
+    evidence_data = json.loads(s3_client.get_object(Bucket="test-evidence-bucket", Key=keys[0])["Body"].read())
+    repositories = evidence_data["evidence_payload"]["repositories"]
+    assert len(repositories) == 120
+    assert repositories[-1]["repository"] == "repo-00119"
+
+
+def test_organization_mode_batched_layout(collector, s3_client, mocker):
+    """
+    Test that the batched layout writes per-repository evidence into NDJSON parts with a manifest.
+    """
+    with GitHubStandIn(repo_count=150) as github:
+        mocker.patch.dict(os.environ, {"GITHUB_API_URL": github.url, "EVIDENCE_LAYOUT": "batched"})
+        result = collector.handler({}, None)
+
+    assert result["repositories"] == 150
+
+    keys = _list_evidence(s3_client)
+    manifest_key = next(key for key in keys if key.endswith("/manifest.json"))
+    assert manifest_key.startswith("github-branch-protection/batches/")
+    manifest = json.loads(s3_client.get_object(Bucket="test-evidence-bucket", Key=manifest_key)["Body"].read())
+    assert manifest["records"] == 150
+    assert len(keys) == len(manifest["parts"]) + 1
+
+    body = s3_client.get_object(Bucket="test-evidence-bucket", Key=manifest["parts"][0]["key"])["Body"].read()
+    first = json.loads(gzip.decompress(body).splitlines()[0])
+    assert first["evidence_payload"]["repository"] == "repo-00000"
+
+
+def test_organization_mode_pages_through_branch_protection_rules(collector, s3_client, mocker):
+    """
+    Test that a repository with more rules than fit on one GraphQL page gets all of them.
+    """
+    with GitHubStandIn(repo_count=2, protected_every=2, rule_count=250) as github:
+        mocker.patch.dict(os.environ, {"GITHUB_API_URL": github.url, "EVIDENCE_LAYOUT": "combined"})
+        collector.handler({}, None)
+
+    # One organization page, then two follow-up pages of rules for repo-00000
+    assert len(github.requests) == 3
+    assert [body["variables"].get("name") for _, body, _ in github.requests] == [None, "repo-00000", "repo-00000"]
+    assert [body["variables"]["cursor"] for _, body, _ in github.requests[1:]] == ["100", "200"]
+
+    keys = _list_evidence(s3_client)
+    evidence_data = json.loads(s3_client.get_object(Bucket="test-evidence-bucket", Key=keys[0])["Body"].read())
+    first, second = evidence_data["evidence_payload"]["repositories"]
+    assert len(first["branch_protection_rules"]) == 250
+    assert first["branch_protection_rules"][-1]["pattern"] == "release-249"
+    assert second["branch_protection_rules"] == []
+
+
+def test_organization_mode_batched_layout_aborts_on_failure(collector, s3_client, mocker):
+    """
+    Test that a GraphQL failure part way through a batched collection aborts the open part upload
+    and writes no manifest.
+    """
+    from collectors.runtime import batch_writer
+    abort = mocker.spy(batch_writer._PartUpload, "abort")
+
+    with GitHubStandIn(repo_count=250, fail_on_request=2) as github:
+        mocker.patch.dict(os.environ, {"GITHUB_API_URL": github.url, "EVIDENCE_LAYOUT": "batched"})
+        with pytest.raises(requests.HTTPError):
+            collector.handler({}, None)
+
+    abort.assert_called_once()
+    assert _list_evidence(s3_client) == []
@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pytest
+import responses
+from moto import mock_aws
+
+from collectors.runtime.http_client import CollectorHttpClient, FileEtagCache, S3EtagCache
+
+URL = "https://api.example.com/repos/my-org/my-repo/branches/main/protection"
+
+
+@pytest.fixture
+def sleeps():
+    """Records requested backoff delays instead of sleeping."""
+    return []
+
+
+@responses.activate
+def test_not_modified_reuses_cached_body(tmp_path, sleeps):
+    """
+    Test that a 304 answer to a revalidated request is served from the ETag cache.
+    """
+    responses.add(responses.GET, URL, json={"enforce_admins": {"enabled": True}}, headers={"ETag": '"v1"'})
+    responses.add(responses.GET, URL, status=304, headers={"ETag": '"v1"'})
+
+    client = CollectorHttpClient(etag_cache=FileEtagCache(str(tmp_path)), sleep=sleeps.append)
+    first = client.get(URL, headers={"Authorization": "token secret-token"})
+
+    # A new client (e.g. the next warm invocation) shares the on-disk cache
+    second = CollectorHttpClient(etag_cache=FileEtagCache(str(tmp_path))).get(
+        URL, headers={"Authorization": "token secret-token"}
+    )
+
+    assert first.from_cache is False
+    assert second.from_cache is True
+    assert second.status_code == 200
+    assert second.json() == {"enforce_admins": {"enabled": True}}
+    assert "If-None-Match" not in responses.calls[0].request.headers
+    assert responses.calls[1].request.headers["If-None-Match"] == '"v1"'
+    # The token only feeds the cache key hash and is never written to disk
+    assert all("secret-token" not in path.read_text() for path in tmp_path.iterdir())
+
+
+@responses.activate
+def test_cache_is_keyed_on_credentials(tmp_path):
+    """
+    Test that cached responses are not shared between different credentials.
+    """
+    responses.add(responses.GET, URL, json={}, headers={"ETag": '"v1"'})
+    client = CollectorHttpClient(etag_cache=FileEtagCache(str(tmp_path)))
+
+    client.get(URL, headers={"Authorization": "token first"})
+    client.get(URL, headers={"Authorization": "token second"})
+
+    assert "If-None-Match" not in responses.calls[1].request.headers
+
+
+def test_file_cache_survives_concurrent_writers(tmp_path):
+    """
+    Test that threads writing the same key never corrupt the entry or leave temporary files behind.
+    """
+    cache = FileEtagCache(str(tmp_path))
+    entries = [{"etag": f'"{i}"', "body": "x" * 100000 * (i % 3 + 1)} for i in range(40)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda entry: cache.set("same-url", entry), entries))
+
+    assert cache.get("same-url") in entries
+    assert [path.name for path in tmp_path.iterdir()] == ["same-url.json"]
+
+
+@responses.activate
+def test_backs_off_on_retry_after(sleeps):
+    """
+    Test that a 429 is retried after the delay given by Retry-After.
+    """
+    responses.add(responses.GET, URL, status=429, headers={"Retry-After": "7"})
+    responses.add(responses.GET, URL, json={"ok": True})
+
+    response = CollectorHttpClient(sleep=sleeps.append).get(URL)
+
+    assert response.json() == {"ok": True}
+    assert sleeps == [7.0]
+
+
+@responses.activate
+def test_backs_off_until_rate_limit_reset(sleeps, mocker):
+    """
+    Test that an exhausted rate limit waits until X-RateLimit-Reset, capped by max_backoff.
+    """
+    mocker.patch("collectors.runtime.http_client.datetime").now.return_value.timestamp.return_value = 1000.0
+    responses.add(responses.GET, URL, status=403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1012"})
+    responses.add(responses.GET, URL, status=403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "5000"})
+    responses.add(responses.GET, URL, json={"ok": True})
+
+    response = CollectorHttpClient(sleep=sleeps.append, max_backoff=60).get(URL)
+
+    assert response.status_code == 200
+    assert sleeps == [12.0, 60]
+
+
+@responses.activate
+def test_gives_up_after_max_retries(sleeps):
+    """
+    Test that persistent server errors are returned to the caller once retries are exhausted.
+    """
+    responses.add(responses.GET, URL, status=503)
+
+    response = CollectorHttpClient(sleep=sleeps.append, max_retries=3, backoff_base=0.5).get(URL)
+
+    assert response.status_code == 503
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+@responses.activate
+def test_not_found_is_not_retried(sleeps):
+    """
+    Test that client errors other than rate limiting are returned immediately.
+    """
+    responses.add(responses.GET, URL, status=404)
+
+    response = CollectorHttpClient(sleep=sleeps.append).get(URL)
+
+    assert response.status_code == 404
+    assert sleeps == []
+
+
+def test_s3_etag_cache_round_trip():
+    """
+    Test that the S3-backed ETag cache stores and returns entries.
+    """
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="http-cache-bucket")
+        cache = S3EtagCache(s3, "http-cache-bucket")
+
+        assert cache.get("missing") is None
+        cache.set("key", {"etag": '"v1"', "body": "e30="})
+        assert cache.get("key") == {"etag": '"v1"', "body": "e30="}
@@ -0,0 +1,175 @@
+import json
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from collectors.runtime import metrics
+from collectors.runtime.collector import Collector
+
+
+@pytest.fixture
+def documents(mocker):
+    """Enable metrics and capture the emitted EMF documents."""
+    mocker.patch.dict(os.environ, {"METRICS_ENABLED": "true"})
+    mocker.patch.object(metrics, "_cold_start", True)
+    emitted = []
+    metrics.set_sink(emitted.append)
+    yield emitted
+    metrics.set_sink(None)
+
+
+@pytest.fixture
+def aws_environment(mocker):
+    mocker.patch.dict(os.environ, {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "EVIDENCE_BUCKET": "test-evidence-bucket",
+        "TARGET_ACCOUNT_ID": "123456789012"
+    })
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket="test-evidence-bucket")
+        yield
+
+
+class ExampleCollector(Collector):
+    name = "example-collector"
+
+    def collect(self):
+        with metrics.span("api_call"):
+            return {"example_key": "example_value"}
+
+
+def test_disabled_metrics_do_nothing(mocker):
+    """
+    Test that without METRICS_ENABLED spans and counters are no-ops and nothing is emitted.
+    """
+    mocker.patch.dict(os.environ, {"METRICS_ENABLED": "false"})
+    emitted = []
+    metrics.set_sink(emitted.append)
+    try:
+        invocation = metrics.start_invocation("example")
+        assert invocation is metrics.NULL_METRICS
+        assert metrics.span("download") is metrics.span("upload")
+        with metrics.span("download"):
+            metrics.count("records")
+        metrics.finish_invocation(invocation)
+    finally:
+        metrics.set_sink(None)
+    assert emitted == []
+
+
+def test_invocation_emits_emf_document(documents):
+    """
+    Test that spans and counters are emitted as one EMF document with a cold start marker.
+    """
+    invocation = metrics.start_invocation("example")
+    with metrics.span("download"):
+        pass
+    with metrics.span("download"):
+        pass
+    metrics.count("bytes_downloaded", 100, unit="Bytes")
+    metrics.count("bytes_downloaded", 20, unit="Bytes")
+    metrics.finish_invocation(invocation)
+
+    assert len(documents) == 1
+    document = documents[0]
+    json.dumps(document)
+    assert document["Service"] == "example"
+    assert document["ColdStart"] is True
+    assert document["ColdStarts"] == 1
+    assert len(document["download_ms"]) == 2
+    assert document["bytes_downloaded"] == 120
+
+    definition = document["_aws"]["CloudWatchMetrics"][0]
+    assert definition["Namespace"] == "scoutos"
+    assert definition["Dimensions"] == [["Service"]]
+    assert {"Name": "download_ms", "Unit": "Milliseconds"} in definition["Metrics"]
+    assert {"Name": "bytes_downloaded", "Unit": "Bytes"} in definition["Metrics"]
+
+    # Spans recorded after the invocation has finished are not attributed to it
+    with metrics.span("download"):
+        pass
+    assert len(invocation.timings["download"]) == 2
+
+
+def test_only_the_first_invocation_is_a_cold_start(documents):
+    """
+    Test that later invocations in the same process are marked as warm starts.
+    """
+    for _ in range(2):
+        metrics.finish_invocation(metrics.start_invocation("example"))
+
+    assert [document["ColdStart"] for document in documents] == [True, False]
+    assert [document["ColdStarts"] for document in documents] == [1, 0]
+
+
+def test_values_are_split_across_documents(documents):
+    """
+    Test that more than 100 values of one metric are spread over several documents.
+    """
+    invocation = metrics.start_invocation("example")
+    for _ in range(250):
+        invocation.timing("put_object", 1.0)
+    invocation.count("records", 250)
+    metrics.finish_invocation(invocation)
+
+    assert [len(document["put_object_ms"]) for document in documents] == [100, 100, 50]
+    assert documents[0]["records"] == 250
+    assert "records" not in documents[1]
+
+
+def test_spans_in_worker_threads_count_towards_the_invocation(documents):
+    """
+    Test that work submitted in a copy of the invocation's context is recorded.
+    """
+    invocation = metrics.start_invocation("example")
+
+    def work():
+        with metrics.span("sign"):
+            metrics.count("records")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for future in [executor.submit(contextvars.copy_context().run, work) for _ in range(8)]:
+            future.result()
+    metrics.finish_invocation(invocation)
+
+    assert len(documents[0]["sign_ms"]) == 8
+    assert documents[0]["records"] == 8
+
+
+def test_collector_run_emits_stage_metrics(aws_environment, documents):
+    """
+    Test that a collector run reports its collect, API call and put_object stages.
+    """
+    assert ExampleCollector().run() == {"status": "success"}
+
+    assert len(documents) == 1
+    document = documents[0]
+    assert document["Service"] == "example-collector"
+    for stage in ("collect_ms", "api_call_ms", "emit_ms", "validate_ms", "put_object_ms"):
+        assert len(document[stage]) == 1
+    assert document["records"] == 1
+    assert document["objects_written"] == 1
+    assert document["bytes_written"] > 0
+
+
+def test_secret_fetch_is_timed(aws_environment, documents):
+    """
+    Test that Secrets Manager calls are timed and cache hits are counted.
+    """
+    from collectors.runtime import aws
+
+    boto3.client("secretsmanager").create_secret(Name="api-keys", SecretString=json.dumps({"token": "abc"}))
+    invocation = metrics.start_invocation("example")
+    aws.get_secret("api-keys")
+    aws.get_secret("api-keys")
+    metrics.finish_invocation(invocation)
+
+    assert len(documents[0]["secret_fetch_ms"]) == 1
+    assert documents[0]["secret_cache_hits"] == 1
@@ -0,0 +1,45 @@
+import os
+import re
+import sys
+
+import pytest
+
+from witness_ingestion import package
+
+# Provided by the Lambda runtime, or imported only when installed
+RUNTIME_PROVIDED = {"boto3", "botocore"}
+OPTIONAL = {"orjson"}
+# Import names of the distributions requirements.txt lists
+DISTRIBUTION_MODULES = {"jsonschema": "jsonschema", "requests": "requests"}
+
+
+def _package_files(collector):
+    with open(os.path.join(package.REPO_ROOT, "collectors", collector, "terraform.tf")) as f:
+        source = f.read()
+    block = re.search(r"package_files = \{(.*?)\n  \}", source, re.S).group(1)
+    return sorted(re.findall(r'^\s*"([^"]+)"\s*=', block, re.M))
+
+
+def _requirements(collector):
+    with open(os.path.join(package.REPO_ROOT, "collectors", collector, "requirements.txt")) as f:
+        lines = [line.split("#")[0].strip() for line in f]
+    return {DISTRIBUTION_MODULES[re.split(r"[<>=\[ ]", line)[0]] for line in lines if line}
+
+
+@pytest.mark.parametrize("collector", ["aws_iam", "github"])
+def test_collector_package_holds_what_the_handler_imports(collector):
+    """
+    Test that the Terraform zip holds the collector's first-party imports and its layer's
+    requirements cover every third-party module they import.
+    """
+    files = package.first_party_files(f"collectors.{collector}.collector")
+    imported = set()
+    for path in files:
+        if path.endswith(".py"):
+            module_name = path[:-3].replace("/", ".").replace(".__init__", "")
+            names = package._imported_modules(path, module_name, package.REPO_ROOT)
+            imported.update(name.split(".")[0] for name in names)
+    third_party = imported - set(sys.stdlib_module_names) - set(package.FIRST_PARTY_PACKAGES) - RUNTIME_PROVIDED
+
+    assert _package_files(collector) == files
+    assert third_party - OPTIONAL <= _requirements(collector)
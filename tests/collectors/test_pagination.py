@@ -0,0 +1,88 @@
+import pytest
+import responses
+from responses import matchers
+
+from collectors.runtime.http_client import CollectorHttpClient
+from collectors.runtime.pagination import Pagination, get_path
+
+URL = "https://api.example.com/users"
+
+
+@responses.activate
+def test_link_pagination_requests_pages_as_items_are_consumed():
+    """
+    Test that the next Link is followed only once the previous page has been consumed.
+    """
+    responses.add(responses.GET, URL, json=[{"id": 1}, {"id": 2}], headers={"Link": f'<{URL}?after=2>; rel="next"'},
+                  match=[matchers.query_string_matcher("")])
+    responses.add(responses.GET, URL, json=[{"id": 3}], match=[matchers.query_string_matcher("after=2")])
+
+    items = Pagination(style="link").items(CollectorHttpClient(), "GET", URL)
+
+    assert next(items) == {"id": 1}
+    assert next(items) == {"id": 2}
+    assert len(responses.calls) == 1
+    assert list(items) == [{"id": 3}]
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_cursor_pagination_passes_the_cursor_back():
+    """
+    Test that the cursor found in each body is sent as a query parameter until it is empty.
+    """
+    responses.add(responses.GET, URL, json={"members": [{"id": 1}], "meta": {"next": "c2"}},
+                  match=[matchers.query_param_matcher({"limit": "1"})])
+    responses.add(responses.GET, URL, json={"members": [{"id": 2}], "meta": {"next": ""}},
+                  match=[matchers.query_param_matcher({"limit": "1", "cursor": "c2"})])
+
+    pagination = Pagination(style="cursor", items_path="members", cursor_path="meta.next")
+    items = list(pagination.items(CollectorHttpClient(), "GET", URL, params={"limit": 1}))
+
+    assert items == [{"id": 1}, {"id": 2}]
+
+
+@responses.activate
+def test_page_pagination_stops_at_a_short_page():
+    """
+    Test that page numbers count up until a page holds fewer items than the page size.
+    """
+    for page, ids in ((1, [1, 2]), (2, [3])):
+        responses.add(responses.GET, URL, json={"data": {"items": [{"id": i} for i in ids]}},
+                      match=[matchers.query_param_matcher({"page": str(page), "per_page": "2"})])
+
+    pagination = Pagination(style="page", items_path="data.items", page_size_param="per_page", page_size=2)
+    pages = list(pagination.pages(CollectorHttpClient(), "GET", URL))
+
+    assert [items for _, items in pages] == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_max_pages_and_errors():
+    """
+    Test that max_pages caps the pages requested and error responses raise.
+    """
+    responses.add(responses.GET, URL, json=[{"id": 1}], headers={"Link": f'<{URL}?page=2>; rel="next"'})
+
+    assert list(Pagination(style="link", max_pages=1).items(CollectorHttpClient(), "GET", URL)) == [{"id": 1}]
+
+    responses.replace(responses.GET, URL, status=401, json={"message": "Bad credentials"})
+    with pytest.raises(Exception, match="401"):
+        list(Pagination().items(CollectorHttpClient(max_retries=0), "GET", URL))
+
+
+def test_get_path_and_invalid_settings():
+    """
+    Test dotted path lookups and that unknown styles and cursors without a path are rejected.
+    """
+    document = {"data": {"items": [{"id": 1}, {"id": 2}]}}
+    assert get_path(document, "data.items.1.id") == 2
+    assert get_path(document, "data.missing.id") is None
+    assert get_path(document, "") is document
+    assert Pagination().page_items({"id": 1}) == [{"id": 1}]
+
+    with pytest.raises(ValueError):
+        Pagination(style="offset")
+    with pytest.raises(ValueError):
+        Pagination(style="cursor")
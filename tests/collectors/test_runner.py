@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import boto3
+import pytest
+import responses
+from moto import mock_aws
+
+from collectors import runner
+
+
+@pytest.fixture
+def aws_environment(mocker):
+    mocker.patch.dict(os.environ, {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "EVIDENCE_BUCKET": "test-evidence-bucket",
+        "TARGET_ACCOUNT_ID": "123456789012"
+    })
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket="test-evidence-bucket")
+        yield
+
+
+def test_discovers_collector_packages():
+    """
+    Test that every collector package is discovered and the template and runtime are not.
+    """
+    modules = runner.discover_collectors()
+
+    assert {"aws_iam", "github"} <= set(modules)
+    assert "_template" not in modules
+    assert "runtime" not in modules
+    assert all(callable(module.handler) for module in modules.values())
+
+
+def test_runs_collectors_and_reports_bytes_written(aws_environment):
+    """
+    Test that the report records per-collector status, latency and bytes written to S3.
+    """
+    modules = runner.discover_collectors()
+
+    report = runner.run_collectors({"aws_iam": modules["aws_iam"]}, max_workers=2)
+
+    (run,) = report["collectors"]
+    assert run["name"] == "aws_iam"
+    assert run["status"] == "success"
+    assert run["result"] == {"status": "success"}
+    assert run["latency_seconds"] > 0
+    assert run["put_requests"] == 1
+
+    key = boto3.client("s3").list_objects_v2(Bucket="test-evidence-bucket")["Contents"][0]["Key"]
+    body = boto3.client("s3").get_object(Bucket="test-evidence-bucket", Key=key)["Body"].read()
+    assert run["bytes_written"] == len(body)
+    assert report["succeeded"] == 1 and report["failed"] == 0
+
+
+def test_collectors_run_concurrently_with_errors_and_timeouts(aws_environment):
+    """
+    Test that collectors share the worker pool and that failures and timeouts are reported
+    without stopping the other collectors.
+    """
+    release = threading.Event()
+
+    def slow(event, context):
+        release.wait(5)
+        return {"status": "success"}
+
+    def failing(event, context):
+        raise ValueError("API unavailable")
+
+    def quick(event, context):
+        return {"status": "success"}
+
+    modules = {
+        "slow": SimpleNamespace(handler=slow),
+        "failing": SimpleNamespace(handler=failing),
+        "quick": SimpleNamespace(handler=quick)
+    }
+
+    start = time.monotonic()
+    report = runner.run_collectors(modules, max_workers=3, timeout=0.3)
+    release.set()
+
+    runs = {run["name"]: run for run in report["collectors"]}
+    assert time.monotonic() - start < 2
+    assert runs["quick"]["status"] == "success"
+    assert runs["failing"]["status"] == "error"
+    assert runs["failing"]["error"] == "ValueError: API unavailable"
+    assert runs["slow"]["status"] == "timeout"
+    assert report["failed"] == 2
+
+
+def test_collectors_get_their_own_environment_and_event(aws_environment):
+    """
+    Test that aws_iam and github run together, each with its own TARGET_ACCOUNT_ID and settings.
+    """
+    boto3.client("secretsmanager").create_secret(Name="github-token", SecretString='{"GITHUB_TOKEN": "token"}')
+    modules = runner.discover_collectors()
+    config = {
+        "github": {"environment": {"TARGET_ACCOUNT_ID": "my-org", "SECRET_NAME": "github-token", "GITHUB_REPO": "my-repo"}},
+        "aws_iam": {"event": {"accounts": ["111111111111"]}}
+    }
+    url = "https://api.github.com/repos/my-org/my-repo/branches/main/protection"
+
+    with responses.RequestsMock() as github:
+        github.add(responses.GET, url, json={"enforce_admins": {"enabled": True}})
+        report = runner.run_collectors({name: modules[name] for name in ("aws_iam", "github")}, config=config)
+
+    runs = {run["name"]: run for run in report["collectors"]}
+    assert runs["github"]["status"] == "success"
+    assert runs["aws_iam"]["result"]["accounts"] == {"111111111111": {"status": "success"}}
+    keys = [obj["Key"] for obj in boto3.client("s3").list_objects_v2(Bucket="test-evidence-bucket")["Contents"]]
+    assert sorted(key.rsplit("/", 1)[0] for key in keys) == [
+        "aws-iam-password-policy/111111111111", "github-branch-protection/my-org-my-repo"
+    ]
+    assert os.environ["TARGET_ACCOUNT_ID"] == "123456789012"
+
+
+def test_timed_out_collectors_can_be_waited_for(aws_environment):
+    """
+    Test that a timed-out collector is reported on time, and wait_for_timeouts returns only once
+    it has finished.
+    """
+    finished = threading.Event()
+
+    def slow(event, context):
+        time.sleep(0.5)
+        finished.set()
+        return {"status": "success"}
+
+    report = runner.run_collectors({"slow": SimpleNamespace(handler=slow)}, timeout=0.1, wait_for_timeouts=True)
+
+    assert report["collectors"][0]["status"] == "timeout"
+    assert report["wall_seconds"] < 0.5
+    assert finished.is_set()
+
+
+def test_main_writes_report_offline(tmp_path, mocker):
+    """
+    Test that the command line runs offline against moto and writes the report to a file.
+    """
+    mocker.patch.dict(os.environ, {"EVIDENCE_BUCKET": "offline-evidence-bucket", "TARGET_ACCOUNT_ID": "123456789012"})
+    report_path = tmp_path / "report.json"
+
+    exit_code = runner.main(["--moto", "--collectors", "aws_iam", "--report", str(report_path)])
+
+    report = json.loads(report_path.read_text())
+    assert exit_code == 0
+    assert report["collectors"][0]["status"] == "success"
+    assert report["collectors"][0]["bytes_written"] > 0
@@ -0,0 +1,106 @@
+import json
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from collectors.runtime import aws
+from collectors.runtime.collector import Collector
+
+
+@pytest.fixture
+def aws_environment(mocker):
+    mocker.patch.dict(os.environ, {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1"
+    })
+    with mock_aws():
+        yield
+
+
+class ExampleCollector(Collector):
+    name = "example-collector"
+
+    def collect(self):
+        return {"example_key": "example_value"}
+
+
+def test_clients_are_created_once_per_process(aws_environment, mocker):
+    """
+    Test that clients are created on first use and then reused.
+    """
+    import boto3 as boto3_module
+    create_client = mocker.spy(boto3_module, "client")
+
+    assert aws.get_client("s3") is aws.get_client("s3")
+    assert aws.get_client("s3", region_name="eu-west-1") is not aws.get_client("s3")
+    assert create_client.call_count == 2
+
+
+def test_secrets_are_cached(aws_environment, mocker):
+    """
+    Test that a secret is fetched from Secrets Manager once within the cache TTL.
+    """
+    boto3.client("secretsmanager").create_secret(Name="api-keys", SecretString=json.dumps({"token": "abc"}))
+    get_secret_value = mocker.spy(aws.get_client("secretsmanager"), "get_secret_value")
+
+    assert aws.get_secret("api-keys") == {"token": "abc"}
+    assert aws.get_secret("api-keys") == {"token": "abc"}
+    assert get_secret_value.call_count == 1
+
+    mocker.patch.object(aws, "SECRET_CACHE_TTL", 0)
+    aws.get_secret("api-keys")
+    assert get_secret_value.call_count == 2
+
+
+def test_collector_run_writes_evidence(aws_environment, mocker):
+    """
+    Test that the base class wraps collect()'s payload in an evidence object and writes it.
+    """
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="test-evidence-bucket")
+    mocker.patch.dict(os.environ, {"EVIDENCE_BUCKET": "test-evidence-bucket", "TARGET_ACCOUNT_ID": "123456789012"})
+
+    result = ExampleCollector({}, None).run()
+
+    assert result == {"status": "success"}
+    key = s3.list_objects_v2(Bucket="test-evidence-bucket")["Contents"][0]["Key"]
+    assert key.startswith("example-collector/123456789012/")
+    evidence = json.loads(s3.get_object(Bucket="test-evidence-bucket", Key=key)["Body"].read())
+    assert evidence["collector_name"] == "example-collector"
+    assert evidence["evidence_payload"] == {"example_key": "example_value"}
+    assert evidence["schema_version"] == "1.0.0"
+
+
+def test_collector_run_reports_missing_environment(mocker):
+    """
+    Test that a collector does no work when required environment variables are missing.
+    """
+    mocker.patch.dict(os.environ, {"EVIDENCE_BUCKET": "test-evidence-bucket"})
+    os.environ.pop("TARGET_ACCOUNT_ID", None)
+    collect = mocker.spy(ExampleCollector, "collect")
+
+    result = ExampleCollector({}, None).run()
+
+    assert result == {"status": "error", "message": "Missing environment variables."}
+    assert collect.call_count == 0
+
+
+def test_collector_rejects_malformed_evidence_before_writing(aws_environment, mocker):
+    """
+    Test that evidence that does not match the schema raises before anything is written to S3.
+    """
+    from collectors.runtime.validation import EvidenceValidationError
+
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="test-evidence-bucket")
+    mocker.patch.dict(os.environ, {"EVIDENCE_BUCKET": "test-evidence-bucket", "TARGET_ACCOUNT_ID": "123456789012"})
+    mocker.patch.object(ExampleCollector, "collect", return_value="not an object")
+
+    with pytest.raises(EvidenceValidationError):
+        ExampleCollector({}, None).run()
+
+    assert "Contents" not in s3.list_objects_v2(Bucket="test-evidence-bucket")
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from collectors.runtime.collector import Collector
+from collectors.runtime.streaming import chunked, iter_boto3_items
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+class IamUserInventory(Collector):
+    """
+    A streaming collector over the IAM users of the account.
+    """
+
+    name = "aws-iam-users"
+    chunk_size = 10
+
+    def iter_items(self):
+        for user in iter_boto3_items(self.iam_client, "list_users", "Users", page_size=7):
+            yield {"UserName": user["UserName"], "Arn": user["Arn"]}
+
+
+class SyntheticPaginator:
+    """
+    A boto3-style paginator over item_count synthetic users, built one page at a time.
+    """
+
+    def __init__(self, item_count, page_size=1000):
+        self.item_count = item_count
+        self.page_size = page_size
+        self.pages_served = 0
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, PaginationConfig=None):
+        for start in range(0, self.item_count, self.page_size):
+            self.pages_served += 1
+            yield {"Users": [
+                {"UserName": f"user-{i:07d}", "Arn": f"arn:aws:iam::123456789012:user/user-{i:07d}", "Groups": ["dev"]}
+                for i in range(start, min(start + self.page_size, self.item_count))
+            ]}
+
+
+class DigestOnlyS3:
+    """
+    Keeps the size and digest of every object instead of its body, so the test measures the
+    collector's memory and not the stand-in's.
+    """
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[Key] = (len(Body), hashlib.sha256(Body).hexdigest())
+        if Key.endswith("manifest.json"):
+            self.manifest = json.loads(Body)
+
+
+class SyntheticInventory(Collector):
+    name = "synthetic-inventory"
+
+    def __init__(self, source, s3):
+        super().__init__()
+        self.source = source
+        self.s3 = s3
+        self.evidence_bucket = "test-evidence-bucket"
+        self.target_account_id = "123456789012"
+
+    @property
+    def s3_client(self):
+        return self.s3
+
+    def iter_items(self):
+        for user in iter_boto3_items(self.source, "list_users", "Users"):
+            yield {"UserName": user["UserName"], "InDevGroup": "dev" in user["Groups"]}
+
+
+@pytest.fixture
+def aws_environment(mocker):
+    mocker.patch.dict(os.environ, {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "EVIDENCE_BUCKET": "test-evidence-bucket",
+        "TARGET_ACCOUNT_ID": "123456789012"
+    })
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-evidence-bucket")
+        iam = boto3.client("iam", region_name="us-east-1")
+        for i in range(25):
+            iam.create_user(UserName=f"user-{i:02d}")
+        yield s3, iam
+
+
+def test_streaming_collector_writes_chunks_and_a_manifest_of_digests(aws_environment, mocker):
+    """
+    Test that a collector implementing iter_items writes evidence chunks and records their digests.
+    """
+    s3, iam = aws_environment
+    mocker.patch.object(IamUserInventory, "iam_client", iam, create=True)
+
+    result = IamUserInventory().run()
+
+    assert result["status"] == "success"
+    assert (result["items"], result["chunks"]) == (25, 3)
+    manifest = json.loads(s3.get_object(Bucket="test-evidence-bucket", Key=result["manifest"])["Body"].read())
+    assert [chunk["items"] for chunk in manifest["chunks"]] == [10, 10, 5]
+
+    users = []
+    for index, chunk in enumerate(manifest["chunks"]):
+        assert chunk["key"] == f"aws-iam-users/123456789012/streams/{manifest['stream_id']}/chunk-{index:05d}.json"
+        body = s3.get_object(Bucket="test-evidence-bucket", Key=chunk["key"])["Body"].read()
+        assert (chunk["bytes"], chunk["sha256"]) == (len(body), hashlib.sha256(body).hexdigest())
+        evidence = json.loads(body)
+        assert evidence["evidence_id"] == chunk["evidence_id"]
+        assert evidence["evidence_payload"]["chunk_index"] == index
+        users.extend(user["UserName"] for user in evidence["evidence_payload"]["items"])
+
+    assert users == [f"user-{i:02d}" for i in range(25)]
+    stream_digest = hashlib.sha256("".join(chunk["sha256"] for chunk in manifest["chunks"]).encode()).hexdigest()
+    assert manifest["sha256"] == stream_digest
+
+
+def test_chunked_consumes_lazily():
+    """
+    Test that chunks are built from the source only as they are asked for.
+    """
+    consumed = []
+
+    def source():
+        for i in range(5):
+            consumed.append(i)
+            yield i
+
+    chunks = chunked(source(), 2)
+    assert next(chunks) == [0, 1]
+    assert consumed == [0, 1]
+    assert list(chunks) == [[2, 3], [4]]
+    assert list(chunked([], 2)) == []
+
+
+# Streams 10k items, then 1M items, in a fresh interpreter and prints the peak RSS after each run
+PEAK_RSS_SCRIPT = """
+import json, resource
+from tests.collectors.test_streaming import DigestOnlyS3, SyntheticInventory, SyntheticPaginator
+
+results = []
+for item_count in (10_000, 1_000_000):
+    source, s3 = SyntheticPaginator(item_count), DigestOnlyS3()
+    collector = SyntheticInventory(source, s3)
+    collector.collect()
+    results.append({
+        "items": s3.manifest["items"], "chunks": len(s3.manifest["chunks"]), "objects": len(s3.objects),
+        "pages": source.pages_served, "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    })
+print(json.dumps(results))
+"""
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="ru_maxrss is reported in kilobytes on Linux")
+def test_peak_memory_stays_flat_for_a_million_items():
+    """
+    Test that streaming 1M items raises peak memory by no more than streaming 10k items needs.
+
+    Holding 1M items at once would take hundreds of megabytes.
+    """
+    process = subprocess.run(
+        [sys.executable, "-c", PEAK_RSS_SCRIPT], capture_output=True, text=True, cwd=REPO_ROOT, check=True
+    )
+    small, large = json.loads(process.stdout.splitlines()[-1])
+
+    assert (large["items"], large["chunks"], large["objects"], large["pages"]) == (1_000_000, 1000, 1001, 1000)
+    growth_mb = (large["peak_rss_kb"] - small["peak_rss_kb"]) / 1024
+    assert growth_mb < 16, f"peak RSS grew by {growth_mb:.1f} MB from 10k to 1M items"
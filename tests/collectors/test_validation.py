@@ -0,0 +1,93 @@
+import json
+import uuid
+
+import pytest
+
+from collectors.runtime import validation
+from collectors.runtime.evidence import create_evidence_object
+from collectors.runtime.validation import EvidenceValidationError
+
+
+@pytest.fixture(autouse=True)
+def fresh_validators():
+    validation.reset()
+    yield
+    validation.reset()
+
+
+def _statement(predicate):
+    return {
+        "_type": "https://in-toto.io/Statement/v1",
+        "subject": [{"name": "test-artifact", "digest": {"sha256": "deadbeef"}}],
+        "predicateType": "https://scoutos.dev/evidence/v1",
+        "predicate": predicate
+    }
+
+
+def test_validator_is_compiled_once_per_process(mocker):
+    """
+    Test that the schema is read and compiled on first use only.
+    """
+    load_schema = mocker.spy(validation.json, 'load')
+    first = validation.get_validator("statement")
+
+    for _ in range(3):
+        assert validation.get_validator("statement") is first
+        validation.validate_evidence(create_evidence_object("test-collector", {}, "123456789012"))
+
+    assert validation.get_validator("evidence") is not first
+    assert load_schema.call_count == 2
+
+
+def test_created_evidence_conforms_to_the_schema():
+    """
+    Test that evidence objects built by the runtime pass validation, on their own and as a predicate.
+    """
+    evidence = create_evidence_object("test-collector", {"key": "value"}, "123456789012")
+
+    validation.validate_evidence(evidence)
+    validation.validate_statement(_statement(evidence))
+    validation.validate_statement(json.dumps(_statement(evidence)).encode('utf-8'))
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"evidence_payload": "not an object"}, "evidence_payload"),
+    ({"evidence_id": "not-a-uuid"}, "evidence_id"),
+    ({"collection_timestamp": "yesterday"}, "collection_timestamp"),
+    ({"schema_version": "1.0"}, "schema_version")
+])
+def test_malformed_evidence_is_rejected(change, message):
+    """
+    Test that type, format and pattern violations are reported with their location.
+    """
+    evidence = dict(create_evidence_object("test-collector", {"key": "value"}, "123456789012"), **change)
+
+    with pytest.raises(EvidenceValidationError) as excinfo:
+        validation.validate_evidence(evidence)
+
+    assert excinfo.value.errors[0].startswith(message)
+
+
+def test_timestamps_with_z_suffix_are_accepted():
+    """
+    Test that UTC timestamps written with a Z suffix are valid date-times.
+    """
+    evidence = create_evidence_object("test-collector", {}, "123456789012")
+    evidence["collection_timestamp"] = "2025-10-13T19:18:00Z"
+
+    validation.validate_evidence(evidence)
+
+
+def test_validate_batch_reports_each_document():
+    """
+    Test that batch validation returns None for conforming documents and the error for the others.
+    """
+    valid = json.dumps(_statement(create_evidence_object("test-collector", [], "123456789012"))).encode('utf-8')
+    partial = json.dumps(_statement({"evidence_id": str(uuid.uuid4())})).encode('utf-8')
+
+    results = validation.validate_batch([valid, b'not json', partial, valid])
+
+    assert results[0] is None and results[3] is None
+    assert "not valid JSON" in str(results[1])
+    assert "'collector_name' is a required property" in str(results[2])
+    assert len(results[2].errors) <= validation.MAX_REPORTED_ERRORS
@@ -0,0 +1,13 @@
+import pytest
+
+from collectors.runtime import aws, http_client
+
+
+@pytest.fixture(autouse=True)
+def reset_collector_runtime():
+    """Start every test without clients, secrets or HTTP sessions cached by earlier tests."""
+    aws.reset()
+    http_client.reset()
+    yield
+    aws.reset()
+    http_client.reset()
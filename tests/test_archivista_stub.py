@@ -0,0 +1,64 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from witness_ingestion.archivista_stub import ArchivistaStub
+
+ENVELOPE = {"payload": "eyJfdHlwZSI6ICJ0ZXN0In0=", "payloadType": "application/vnd.in-toto+json", "signatures": []}
+
+
+def test_upload_stores_the_envelope_for_download():
+    """
+    Test that an uploaded envelope is stored under its gitoid and counted, and malformed ones are rejected.
+    """
+    with ArchivistaStub() as stub:
+        response = requests.post(f"{stub.url}/upload", json=ENVELOPE)
+        assert response.status_code == 200
+        gitoid = response.json()["gitoid"]
+        assert requests.get(f"{stub.url}/download/{gitoid}").json() == ENVELOPE
+
+        requests.post(f"{stub.url}/upload", json=dict(ENVELOPE, signatures=[{"keyid": "a", "sig": "b"}]))
+        assert requests.post(f"{stub.url}/upload", json={"payload": "x"}).status_code == 400
+        assert requests.post(f"{stub.url}/other", json=ENVELOPE).status_code == 404
+        stats = requests.get(f"{stub.url}/stats").json()
+
+    assert stats["statuses"] == {"200": 2, "400": 1, "404": 1}
+    assert (stats["uploads"], stats["duplicates"], stats["stored_payloads"]) == (2, 1, 1)
+
+
+def test_latency_and_errors_are_injected():
+    """
+    Test that uploads wait the configured latency and a seeded share of them fails.
+    """
+    with ArchivistaStub(latency=0.05, error_rate=0.5, error_status=502, seed=7) as stub:
+        start = time.perf_counter()
+        statuses = [requests.post(f"{stub.url}/upload", json=ENVELOPE).status_code for _ in range(20)]
+        elapsed = time.perf_counter() - start
+
+    assert elapsed >= 20 * 0.05
+    assert set(statuses) == {200, 502}
+    assert stub.stats()["p50_ms"] >= 50
+    assert stub.stats()["uploads"] == statuses.count(200)
+    with ArchivistaStub(latency=0.05, error_rate=0.5, error_status=502, seed=7) as again:
+        assert [requests.post(f"{again.url}/upload", json=ENVELOPE).status_code for _ in range(20)] == statuses
+
+
+def test_throttling_and_concurrency_limits():
+    """
+    Test that uploads above the rate get 429 with Retry-After, and above max_in_flight get 503.
+    """
+    with ArchivistaStub(throttle_rps=1, throttle_burst=2) as stub:
+        responses = [requests.post(f"{stub.url}/upload", json=ENVELOPE) for _ in range(3)]
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[2].headers["Retry-After"] == "1"
+
+    with ArchivistaStub(latency=0.2, max_in_flight=1) as stub:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            statuses = sorted(executor.map(
+                lambda _: requests.post(f"{stub.url}/upload", data=json.dumps(ENVELOPE)).status_code, range(3)
+            ))
+    assert statuses == [200, 503, 503]
+    assert stub.stats()["peak_in_flight"] == 1
+
@@ -0,0 +1,120 @@
+import base64
+import json
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from securesystemslib.dsse import Envelope
+from securesystemslib.signer import CryptoSigner, SSlibKey
+
+from witness_ingestion import dsse
+
+PAYLOAD = json.dumps({"_type": "https://in-toto.io/Statement/v1", "predicate": {"evidence_payload": {}}}).encode("utf-8")
+
+
+def _signer(private_key):
+    return CryptoSigner(private_key, SSlibKey.from_crypto(private_key.public_key()))
+
+
+def _public_pem(signer):
+    return signer._private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+
+@pytest.fixture(scope="module")
+def signers():
+    return [
+        _signer(ed25519.Ed25519PrivateKey.generate()),
+        _signer(ec.generate_private_key(ec.SECP256R1())),
+        _signer(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+    ]
+
+
+def test_sign_envelope_signs_one_pae_with_every_key(signers, mocker):
+    """
+    Test that every signer signs the same PAE bytes and each signature verifies.
+    """
+    spies = [mocker.spy(signer, "sign") for signer in signers]
+
+    envelope = dsse.sign_envelope(PAYLOAD, signers)
+
+    signed = [spy.call_args.args[0] for spy in spies]
+    assert signed[0] == Envelope(PAYLOAD, dsse.PAYLOAD_TYPE, {}).pae()
+    assert all(data is signed[0] for data in signed)
+    assert set(envelope.signatures) == {signer.public_key.keyid for signer in signers}
+    assert len(envelope.verify([signer.public_key for signer in signers], 3)) == 3
+
+
+def test_verifier_cache_checks_stored_and_parsed_envelopes(signers):
+    """
+    Test that envelope dicts and Envelope objects verify against keys added as PEM.
+    """
+    cache = dsse.VerifierCache(_public_pem(signer) for signer in signers[:2])
+    envelope = dsse.sign_envelope(PAYLOAD, signers)
+
+    expected = [signer.public_key.keyid for signer in signers[:2]]
+    assert sorted(cache.verify(envelope.to_dict(), threshold=2)) == sorted(expected)
+    assert sorted(cache.verify(envelope, threshold=2)) == sorted(expected)
+
+    # The third key is not trusted, so its signature does not count
+    with pytest.raises(dsse.EnvelopeVerificationError) as error:
+        cache.verify(envelope.to_dict(), threshold=3)
+    assert sorted(error.value.verified_keyids) == sorted(expected)
+
+
+def test_keys_are_parsed_once_per_keyid(signers, mocker):
+    """
+    Test that adding a known key again keeps the existing verifier.
+    """
+    cache = dsse.VerifierCache()
+    build = mocker.spy(dsse.Verifier, "_build")
+
+    keyid = cache.add(_public_pem(signers[0]))
+    assert cache.add(signers[0].public_key.to_dict() | {"keyid": keyid}) == keyid
+    assert cache.add(signers[0].public_key) == keyid
+
+    assert keyid == signers[0].public_key.keyid
+    assert cache.keyids() == [keyid]
+    assert build.call_count == 1
+
+
+def test_tampered_and_malformed_envelopes_fail(signers):
+    """
+    Test that changed payloads, foreign signatures and malformed records are rejected.
+    """
+    cache = dsse.VerifierCache([signers[0].public_key, signers[2].public_key])
+    tampered = dsse.sign_envelope(PAYLOAD, signers).to_dict()
+    tampered["payload"] = base64.b64encode(PAYLOAD + b" ").decode("ascii")
+    foreign = dsse.sign_envelope(PAYLOAD, [_signer(ed25519.Ed25519PrivateKey.generate())]).to_dict()
+
+    results = list(cache.verify_many([tampered, foreign, {"payload": "x"}]))
+
+    assert all(isinstance(result, dsse.EnvelopeVerificationError) for result in results)
+    assert "Malformed" in str(results[2])
+
+
+def test_bulk_verify_reports_each_source(signers, tmp_path, capsys):
+    """
+    Test that the command verifies JSON, NDJSON and directories and reports failures by source.
+    """
+    key_path = tmp_path / "signing-key.pub"
+    key_path.write_bytes(_public_pem(signers[0]))
+    good = dsse.sign_envelope(PAYLOAD, signers[:1]).to_dict()
+    bad = dict(good, payload=base64.b64encode(b"{}").decode("ascii"))
+
+    (tmp_path / "envelopes").mkdir()
+    (tmp_path / "envelopes" / "batch.ndjson").write_text("\n".join(json.dumps(good) for _ in range(3)) + "\n")
+    (tmp_path / "single.json").write_text(json.dumps(bad))
+
+    exit_code = dsse.main(["--key", str(key_path), str(tmp_path / "envelopes"), str(tmp_path / "single.json")])
+
+    summary = json.loads(capsys.readouterr().out)
+    assert exit_code == 1
+    assert summary["envelopes"] == 4
+    assert summary["verified"] == 3
+    assert summary["keyids"] == {signers[0].public_key.keyid: 3}
+    assert summary["failures"] == [{
+        "source": str(tmp_path / "single.json"),
+        "error": "0 of the required 1 trusted signatures verified"
+    }]
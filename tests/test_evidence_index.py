@@ -0,0 +1,174 @@
+import json
+import os
+from types import SimpleNamespace
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from collectors.runtime.batch_writer import BatchEvidenceWriter
+from collectors.runtime.dedup import emit_evidence
+from collectors.runtime.evidence import create_evidence_object, write_to_s3
+from collectors.runtime.streaming import StreamingEvidenceWriter
+from evidence_lake import index as evidence_index
+from evidence_lake.index import EvidenceIndex
+
+BUCKET_NAME = "test-evidence-bucket"
+
+
+@pytest.fixture
+def s3_client(mocker):
+    mocker.patch.dict(os.environ, {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1"
+    })
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        yield s3
+
+
+@pytest.fixture
+def index(tmp_path, s3_client):
+    with EvidenceIndex(str(tmp_path / "index.sqlite3"), s3_client) as index:
+        yield index
+
+
+def _put_evidence(s3_client, collector_name, target, timestamp, payload):
+    evidence = create_evidence_object(collector_name, payload, target)
+    evidence["collection_timestamp"] = timestamp
+    key = f"{collector_name}/{target}/{evidence['evidence_id']}.json"
+    write_to_s3(s3_client, BUCKET_NAME, key, evidence)
+    return key, evidence
+
+
+def _s3_event(key, event_name="ObjectCreated:Put"):
+    return {"Records": [{"eventName": event_name, "s3": {"bucket": {"name": BUCKET_NAME}, "object": {"key": key}}}]}
+
+
+def test_backfill_answers_latest_and_range_queries(index, s3_client):
+    """
+    Test that a backfill indexes evidence by collector, target and time with its payload digest.
+    """
+    _put_evidence(s3_client, "aws-iam-password-policy", "111111111111", "2025-10-01T00:00:00+00:00", {"MinimumPasswordLength": 8})
+    latest_key, _ = _put_evidence(s3_client, "aws-iam-password-policy", "111111111111", "2025-10-02T00:00:00Z", {"MinimumPasswordLength": 14})
+    _put_evidence(s3_client, "aws-iam-password-policy", "222222222222", "2025-10-01T12:00:00+00:00", {"MinimumPasswordLength": 12})
+    s3_client.put_object(Bucket=BUCKET_NAME, Key="notes/readme.txt", Body=b"not evidence")
+
+    assert index.backfill(BUCKET_NAME) == (4, 3)
+
+    latest = index.latest("aws-iam-password-policy", "111111111111")
+    assert [row["object_key"] for row in latest] == [latest_key]
+    assert latest[0]["collection_timestamp"] == "2025-10-02T00:00:00.000000+00:00"
+    assert len(latest[0]["payload_sha256"]) == 64
+    assert {row["target"] for row in index.latest()} == {"111111111111", "222222222222"}
+
+    window = index.between(since="2025-10-01T06:00:00Z", until="2025-10-02")
+    assert [row["target"] for row in window] == ["222222222222"]
+
+
+def test_incremental_updates_only_read_new_objects(index, s3_client, mocker):
+    """
+    Test that repeated backfills and events only read objects that are not indexed yet.
+    """
+    for day in range(1, 4):
+        _put_evidence(s3_client, "github-branch-protection", "my-org-repo", f"2025-10-0{day}T00:00:00Z", {"day": day})
+    index.backfill(BUCKET_NAME)
+    get_object = mocker.spy(s3_client, "get_object")
+
+    assert index.backfill(BUCKET_NAME) == (3, 0)
+    assert get_object.call_count == 0
+
+    key, evidence = _put_evidence(s3_client, "github-branch-protection", "my-org-repo", "2025-10-04T00:00:00Z", {"day": 4})
+    assert index.apply_event({"Records": [{"messageId": "message-1", "body": json.dumps(_s3_event(key))}]}) == 1
+    assert index.backfill(BUCKET_NAME) == (4, 0)
+    assert get_object.call_count == 1
+    assert index.latest()[0]["evidence_id"] == evidence["evidence_id"]
+
+    index.apply_event(_s3_event(key, "ObjectRemoved:Delete"))
+    assert index.latest()[0]["collection_timestamp"].startswith("2025-10-03")
+
+
+def test_heartbeats_and_batches_are_indexed(index, s3_client, mocker):
+    """
+    Test that dedup heartbeats and records inside batch parts are indexed alongside plain evidence.
+    """
+    mocker.patch.dict(os.environ, {"EVIDENCE_DEDUP": "true"})
+    first = create_evidence_object("aws-iam-password-policy", {"MinimumPasswordLength": 14}, "111111111111")
+    second = create_evidence_object("aws-iam-password-policy", {"MinimumPasswordLength": 14}, "111111111111")
+    write = lambda bucket, key, data: write_to_s3(s3_client, bucket, key, data)
+    first_key = f"aws-iam-password-policy/111111111111/{first['evidence_id']}.json"
+    emit_evidence(s3_client, BUCKET_NAME, first_key, first, write)
+    emit_evidence(s3_client, BUCKET_NAME, f"aws-iam-password-policy/111111111111/{second['evidence_id']}.json", second, write)
+
+    with BatchEvidenceWriter(s3_client, BUCKET_NAME, "github-branch-protection", max_records=2) as writer:
+        for i in range(3):
+            writer.add(create_evidence_object("github-branch-protection", {"repository": f"repo-{i}"}, "my-org"))
+
+    index.backfill(BUCKET_NAME)
+
+    (latest_policy,) = index.latest("aws-iam-password-policy")
+    assert latest_policy["evidence_id"] == second["evidence_id"]
+    assert latest_policy["heartbeat"] == 1
+    assert latest_policy["object_key"] == first_key
+
+    batch_rows = index.between(collector_name="github-branch-protection")
+    assert len(batch_rows) == 3
+    assert {row["record_index"] for row in batch_rows} == {0, 1}
+    assert all(row["object_key"].endswith(".ndjson.gz") for row in batch_rows)
+    assert len(index.between(collector_name="aws-iam-password-policy", include_heartbeats=False)) == 1
+
+
+def test_batch_records_are_indexed_under_their_target_path(index, s3_client):
+    """
+    Test that batch records added with a target path get one latest row per target, like the same
+    evidence written one object at a time.
+    """
+    for day in (1, 2):
+        with BatchEvidenceWriter(s3_client, BUCKET_NAME, "github-branch-protection") as writer:
+            for repository in ("repo-a", "repo-b"):
+                evidence = create_evidence_object("github-branch-protection", {"repository": repository, "day": day}, "my-org")
+                writer.add(evidence, target_path=f"my-org-{repository}")
+            writer.add(create_evidence_object("github-branch-protection", {"day": day}, "my-org"))
+
+    index.backfill(BUCKET_NAME)
+
+    latest = index.latest("github-branch-protection")
+    assert [row["target"] for row in latest] == ["my-org", "my-org-repo-a", "my-org-repo-b"]
+    assert all(row["target_account_id"] == "my-org" for row in latest)
+    assert len(index.between(collector_name="github-branch-protection", target="my-org-repo-a")) == 2
+
+
+def test_stream_chunks_are_indexed_under_their_target(index, s3_client):
+    """
+    Test that every chunk of a stream is indexed under the stream's target and its manifest is ignored.
+    """
+    collector = SimpleNamespace(
+        name="aws-iam-users", target_account_id="111111111111", s3_client=s3_client, evidence_bucket=BUCKET_NAME,
+        create_evidence=lambda payload, target: create_evidence_object("aws-iam-users", payload, target)
+    )
+    writer = StreamingEvidenceWriter(collector, chunk_size=2)
+    manifest = writer.write({"UserName": f"user-{i}"} for i in range(5))
+
+    assert index.backfill(BUCKET_NAME) == (4, 3)
+    rows = index.between(collector_name="aws-iam-users")
+    assert sorted(row["object_key"] for row in rows) == [chunk["key"] for chunk in manifest["chunks"]]
+    assert {row["target"] for row in rows} == {"111111111111"}
+    assert [row["target"] for row in index.latest()] == ["111111111111"]
+    assert index.is_indexed(writer.manifest_key) is False
+
+
+def test_command_line_backfills_and_queries(tmp_path, s3_client, capsys):
+    """
+    Test the backfill and latest commands.
+    """
+    key, _ = _put_evidence(s3_client, "aws-iam-password-policy", "111111111111", "2025-10-01T00:00:00Z", {})
+    db = str(tmp_path / "cli.sqlite3")
+
+    evidence_index.main(["--db", db, "backfill", "--bucket", BUCKET_NAME])
+    assert json.loads(capsys.readouterr().out) == {"objects_listed": 1, "records_added": 1}
+
+    evidence_index.main(["--db", db, "latest", "--target", "111111111111"])
+    assert json.loads(capsys.readouterr().out)[0]["object_key"] == key
@@ -0,0 +1,187 @@
+import json
+import os
+import subprocess
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from collectors.runtime.evidence import create_evidence_object, write_to_s3
+from evidence_lake import policy as evidence_policy
+from evidence_lake.index import EvidenceIndex
+from evidence_lake.policy import NativePolicy, OpaPolicy, PolicyEngine, compile_policy, pass_fail_matrix
+from evidence_lake.reader import EvidenceReader
+
+POLICY_DIR = os.path.join(os.path.dirname(__file__), "..", "grc-controls-witness")
+BUCKET_NAME = "test-evidence-bucket"
+
+
+def _evidence(minimum_length, account_id="111111111111"):
+    payload = {"password_policy": {"minimum_password_length": minimum_length}} if minimum_length is not None else {}
+    return create_evidence_object("aws-iam-password-policy", payload, account_id)
+
+
+def test_witness_policy_bundle_is_compiled_natively():
+    """
+    Test that the IAM password policy control is loaded from the witness policy and compiled.
+    """
+    engine = PolicyEngine.from_files([os.path.join(POLICY_DIR, "iam_password_policy.json")])
+
+    ((name, attestation_type, policy),) = engine.controls
+    assert name == "iam-password-policy"
+    assert attestation_type == "https://scoutos.dev/evidence/v1"
+    assert isinstance(policy, NativePolicy)
+    assert policy.package == "witness.iam.password_policy"
+
+
+def test_batch_evaluation_builds_pass_fail_matrix():
+    """
+    Test that the latest evidence per target decides its cell, and missing fields fail the control.
+    """
+    engine = PolicyEngine.from_files([os.path.join(POLICY_DIR, "iam_password_policy.rego")])
+    older = _evidence(8, "111111111111")
+    older["collection_timestamp"] = "2025-01-01T00:00:00+00:00"
+    items = [
+        ("111111111111", older),
+        ("111111111111", _evidence(14, "111111111111")),
+        ("222222222222", _evidence(12, "222222222222")),
+        ("333333333333", _evidence(None, "333333333333"))
+    ]
+
+    results = list(engine.evaluate(items, batch_size=3))
+
+    assert [result["passed"] for result in results] == [False, True, False, False]
+    assert pass_fail_matrix(results) == {
+        "iam_password_policy": {"111111111111": "pass", "222222222222": "fail", "333333333333": "fail"}
+    }
+
+
+@pytest.mark.parametrize("body, document, expected", [
+    ('input.predicate.kind == "iam"', {"kind": "iam"}, True),
+    ('input.predicate.kind != "iam"', {"kind": "iam"}, False),
+    ('input.predicate["rules"][0].enabled', {"rules": [{"enabled": True}]}, True),
+    ('input.predicate.rules[1].enabled', {"rules": [{"enabled": True}]}, False),
+    ('not input.predicate.archived', {}, True),
+    ('not input.predicate.archived', {"archived": True}, False),
+    ('input.predicate.age <= 90\n    input.predicate.age > 0', {"age": 30}, True),
+    ('input.predicate.age <= 90 ; input.predicate.age > 0', {"age": 0}, False),
+    # Values of different types are ordered by type, like OPA: strings sort above numbers
+    ('input.predicate.length >= 14', {"length": "short"}, True),
+    ('input.predicate.flag == 1', {"flag": True}, False)
+])
+def test_native_expressions_follow_rego_semantics(body, document, expected):
+    """
+    Test comparisons, references, negation and multi-expression bodies.
+    """
+    policy = NativePolicy(f"package test\n\nimport rego.v1\n\ndefault allow := false\n\nallow if {{\n    {body}\n}}\n")
+
+    assert policy.evaluate({"predicate": document}) is expected
+
+
+def test_multiple_bodies_and_deny_rules():
+    """
+    Test that rule bodies are alternatives and that a satisfied deny rule fails the control.
+    """
+    policy = NativePolicy("""
+        package test
+        # Either a long password or MFA is enough, unless the account is a break-glass account
+        allow { input.predicate.length >= 14 }
+        allow { input.predicate.mfa == true }
+        deny { input.predicate.break_glass }
+    """)
+
+    assert policy.evaluate_batch([
+        {"predicate": {"length": 16}},
+        {"predicate": {"mfa": True}},
+        {"predicate": {"length": 8}},
+        {"predicate": {"length": 16, "break_glass": True}}
+    ]) == [True, True, False, False]
+
+
+def test_unsupported_policies_fall_back_to_one_opa_process_per_batch(mocker):
+    """
+    Test that a policy outside the native subset is evaluated by opa, once for the whole batch.
+    """
+    source = 'package witness.test\n\ndeny[msg] {\n    input.predicate.length < 14\n    msg := "too short"\n}\n'
+    policy = compile_policy(source, opa_binary="opa-test")
+    assert isinstance(policy, OpaPolicy)
+
+    mocker.patch.object(evidence_policy.shutil, "which", return_value="/usr/local/bin/opa-test")
+    run = mocker.patch.object(evidence_policy.subprocess, "run", return_value=subprocess.CompletedProcess(
+        args=[], returncode=0,
+        stdout=json.dumps({"result": [{"expressions": [{"value": [[1, {"deny": ["too short"]}], [0, {"deny": []}]]}]}]})
+    ))
+
+    assert policy.evaluate_batch([{"predicate": {"length": 16}}, {"predicate": {"length": 8}}]) == [True, False]
+    run.assert_called_once()
+    command = run.call_args.args[0]
+    assert command[:2] == ["/usr/local/bin/opa-test", "eval"]
+    assert "data.witness.test with input as item" in command[-1]
+    assert json.loads(run.call_args.kwargs["input"])["items"][1] == {"predicate": {"length": 8}}
+
+
+def test_opa_fallback_fails_closed_when_results_are_missing(mocker):
+    """
+    Test that a batch opa returns fewer results for is an error rather than allowed.
+    """
+    mocker.patch.object(evidence_policy.shutil, "which", return_value="/usr/local/bin/opa")
+    mocker.patch.object(evidence_policy.subprocess, "run", return_value=subprocess.CompletedProcess(
+        args=[], returncode=0,
+        stdout=json.dumps({"result": [{"expressions": [{"value": [[0, {"deny": []}]]}]}]})
+    ))
+
+    with pytest.raises(RuntimeError, match="1 results for 2 documents"):
+        OpaPolicy("package test\n").evaluate_batch([{}, {}])
+
+
+def test_opa_fallback_requires_the_binary(mocker):
+    """
+    Test that a missing opa binary is reported clearly.
+    """
+    mocker.patch.object(evidence_policy.shutil, "which", return_value=None)
+
+    with pytest.raises(RuntimeError, match="opa binary"):
+        OpaPolicy("package test\n").evaluate_batch([{}])
+
+
+def test_evaluates_latest_indexed_evidence(tmp_path, mocker):
+    """
+    Test evaluating the latest evidence per target straight from the index.
+    """
+    mocker.patch.dict(os.environ, {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1"
+    })
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        for account_id, minimum_length in (("111111111111", 14), ("222222222222", 10)):
+            evidence = _evidence(minimum_length, account_id)
+            write_to_s3(s3, BUCKET_NAME, f"aws-iam-password-policy/{account_id}/{evidence['evidence_id']}.json", evidence)
+
+        with EvidenceIndex(str(tmp_path / "index.sqlite3"), s3) as index:
+            index.backfill(BUCKET_NAME)
+            engine = PolicyEngine.from_files([os.path.join(POLICY_DIR, "iam_password_policy.json")])
+            items = evidence_policy.iter_index_evidence(index, EvidenceReader(BUCKET_NAME, s3))
+            matrix = pass_fail_matrix(engine.evaluate(items))
+
+    assert matrix == {"iam-password-policy": {"111111111111": "pass", "222222222222": "fail"}}
+
+
+def test_command_line_evaluates_evidence_files(tmp_path, capsys):
+    """
+    Test that the command prints the matrix and exits non-zero when a control fails.
+    """
+    path = tmp_path / "evidence.ndjson"
+    path.write_text("\n".join(json.dumps(_evidence(length, f"00000000000{i}")) for i, length in enumerate((14, 20, 6))))
+
+    exit_code = evidence_policy.main([
+        "--policy", os.path.join(POLICY_DIR, "iam_password_policy.json"), "--evidence", str(path)
+    ])
+
+    assert exit_code == 1
+    assert json.loads(capsys.readouterr().out)["matrix"] == {
+        "iam-password-policy": {"000000000000": "pass", "000000000001": "pass", "000000000002": "fail"}
+    }
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Lambda handler modules, imported on every cold start
+HANDLER_MODULES = (
+    "witness_ingestion.handler",
+    "collectors.aws_iam.collector",
+    "collectors.github.collector",
+    "collectors._template.collector"
+)
+
+# Libraries that take tens to hundreds of milliseconds to import. Handlers load them on first use.
+HEAVY_PACKAGES = ("boto3", "botocore", "requests", "urllib3", "cryptography", "securesystemslib", "in_toto", "jsonschema")
+
+
+def import_profile(module_name):
+    """
+    Imports the module in a fresh interpreter with -X importtime.
+
+    Returns {module: (self microseconds, cumulative microseconds)} for every module it loaded.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True, text=True, cwd=REPO_ROOT, check=True
+    )
+    profile = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def _slowest(profile, count=15):
+    slowest = sorted(profile.items(), key=lambda item: item[1][1], reverse=True)[:count]
+    return "\n".join(f"{cumulative:>10} us  {name}" for name, (_, cumulative) in slowest)
+
+
+@pytest.mark.parametrize("module_name", HANDLER_MODULES)
+def test_handler_import_defers_heavy_packages(module_name):
+    """
+    Test that importing a handler module loads none of the heavy packages.
+    """
+    profile = import_profile(module_name)
+
+    assert module_name in profile
+    loaded = sorted(name for name in profile if name.split(".")[0] in HEAVY_PACKAGES)
+    assert not loaded, f"Importing {module_name} loads {loaded}. Slowest imports:\n{_slowest(profile)}"
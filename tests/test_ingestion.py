@@ -6,6 +6,9 @@ from moto import mock_aws
 import responses
 import sys
 import base64
+import sqlite3
+import tempfile
+from unittest import mock
 from securesystemslib.signer import CryptoSigner, SSlibKey
 from securesystemslib.dsse import Envelope
 from cryptography.hazmat.primitives import serialization
@@ -14,6 +17,10 @@ from cryptography.hazmat.primitives.asymmetric import ed25519
 # Add the parent directory to the Python path to allow importing handler
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from collectors.runtime import metrics
+from witness_ingestion import handler as ingestion
+from witness_ingestion import ledger, replay
+from witness_ingestion.archivista_stub import ArchivistaStub
 from witness_ingestion.handler import handler
 
 @mock_aws
@@ -30,6 +37,10 @@ class TestIngestionLambda(unittest.TestCase):
         os.environ['AWS_REGION'] = 'us-east-1'
         os.environ['ARCHIVISTA_URL'] = 'https://archivista.testifysec.io'
 
+        # Each test starts from a cold container
+        ingestion._clients.clear()
+        ingestion._signer_cache.clear()
+
         self.s3_client = boto3.client('s3', region_name='us-east-1')
         self.secretsmanager_client = boto3.client('secretsmanager', region_name='us-east-1')
 
@@ -38,16 +49,53 @@ class TestIngestionLambda(unittest.TestCase):
 
         # Create a dummy signing key and store it in Secrets Manager
         self.secret_name = "test-signing-key"
+        pem, self.public_key = self._generate_key()
+        secret = self.secretsmanager_client.create_secret(Name=self.secret_name, SecretString=pem)
+        os.environ['SIGNING_KEY_ARN'] = secret['ARN']
+
+    def _generate_key(self):
+        """
+        Helper function to create an ed25519 key as a PEM string and its public SSlibKey.
+        """
         private_key = ed25519.Ed25519PrivateKey.generate()
         pem = private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PrivateFormat.PKCS8,
             encryption_algorithm=serialization.NoEncryption()
         )
-        self.public_key = SSlibKey.from_crypto(private_key.public_key())
-        secret = self.secretsmanager_client.create_secret(Name=self.secret_name, SecretString=pem.decode('utf-8'))
-        os.environ['SIGNING_KEY_ARN'] = secret['ARN']
+        return pem.decode('utf-8'), SSlibKey.from_crypto(private_key.public_key())
 
+    def _statement(self, predicate=None):
+        """
+        Helper function to build an in-toto Statement that conforms to the evidence schema.
+        """
+        if predicate is None:
+            predicate = {
+                "evidence_id": "a1b2c3d4-e5f6-7890-1234-567890abcdef",
+                "collector_name": "aws-iam-password-policy",
+                "collection_timestamp": "2025-10-13T19:18:00Z",
+                "target_account_id": "123456789012",
+                "evidence_payload": {"MinimumPasswordLength": 14},
+                "schema_version": "1.0.0"
+            }
+        return {
+            "_type": "https://in-toto.io/Statement/v1",
+            "subject": [{"name": "test-artifact", "digest": {"sha256": "deadbeef"}}],
+            "predicateType": "https://scoutos.dev/evidence/v1",
+            "predicate": predicate
+        }
+
+    def _put_attestation(self, object_key, attestation_content=None):
+        """
+        Helper function to store a sample attestation in S3.
+        """
+        attestation_content = attestation_content or self._statement()
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=object_key,
+            Body=json.dumps(attestation_content)
+        )
+        return attestation_content
 
     def _create_s3_event(self, bucket, key):
         """
@@ -71,18 +119,8 @@ class TestIngestionLambda(unittest.TestCase):
         responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={'message': 'success'}, status=200)
 
         # Create a sample attestation
-        attestation_content = {
-            "_type": "https://in-toto.io/Statement/v1",
-            "subject": [{"name": "test-artifact", "digest": {"sha256": "deadbeef"}}],
-            "predicateType": "https://scoutos.dev/evidence/v1",
-            "predicate": {"evidence_id": "test-evidence"}
-        }
         object_key = 'evidence/test-attestation.json'
-        self.s3_client.put_object(
-            Bucket=self.bucket_name,
-            Key=object_key,
-            Body=json.dumps(attestation_content)
-        )
+        attestation_content = self._put_attestation(object_key)
 
         event = self._create_s3_event(self.bucket_name, object_key)
         result = handler(event, None)
@@ -101,6 +139,423 @@ class TestIngestionLambda(unittest.TestCase):
         payload = json.loads(envelope.payload)
         self.assertEqual(payload, attestation_content)
 
+    @responses.activate
+    def test_handler_signs_original_bytes(self):
+        """
+        Test that the stored bytes are signed as-is, including for keys that share a basename.
+        """
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={'message': 'success'}, status=200)
+        bodies = {
+            'evidence/account-a/attestation.json': json.dumps(self._statement(), indent=2).encode('utf-8'),
+            'evidence/account-b/attestation.json': json.dumps(self._statement(), separators=(',', ':')).encode('utf-8')
+        }
+        event = {'Records': []}
+        for object_key, body in bodies.items():
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=object_key, Body=body)
+            event['Records'].extend(self._create_s3_event(self.bucket_name, object_key)['Records'])
+
+        result = handler(event, None)
+
+        self.assertEqual(result['batchItemFailures'], [])
+        payloads = {Envelope.from_dict(json.loads(call.request.body)).payload for call in responses.calls}
+        self.assertEqual(payloads, set(bodies.values()))
+
+    @responses.activate
+    def test_validation_rejects_malformed_attestation(self):
+        """
+        Test that enabling validation rejects a malformed attestation before it is uploaded.
+        """
+        object_key = 'evidence/not-a-statement.json'
+        self.s3_client.put_object(Bucket=self.bucket_name, Key=object_key, Body=b'{"predicate": {}}')
+        event = self._create_s3_event(self.bucket_name, object_key)
+
+        with mock.patch.object(ingestion, 'VALIDATE_ATTESTATIONS', True):
+            result = handler(event, None)
+
+        self.assertEqual(result['batchItemFailures'], [{'itemIdentifier': object_key}])
+        self.assertEqual(len(responses.calls), 0)
+
+    @responses.activate
+    def test_malformed_attestations_are_rejected_before_signing(self):
+        """
+        Test that a batch of attestations that do not match the evidence schema is rejected without
+        loading the signing key, signing or uploading anything.
+        """
+        malformed = {
+            'evidence/partial-predicate.json': self._statement({"evidence_id": "test-evidence"}),
+            'evidence/wrong-type.json': dict(self._statement(), predicateType="https://example.com/other/v1")
+        }
+        event = {'Records': []}
+        for object_key, attestation_content in malformed.items():
+            self._put_attestation(object_key, attestation_content)
+            event['Records'].extend(self._create_s3_event(self.bucket_name, object_key)['Records'])
+
+        with mock.patch.object(ingestion, 'get_signer') as get_signer:
+            result = handler(event, None)
+
+        self.assertEqual(result['batchItemFailures'], [{'itemIdentifier': object_key} for object_key in malformed])
+        get_signer.assert_not_called()
+        self.assertEqual(len(responses.calls), 0)
+
+    @responses.activate
+    def test_valid_attestations_are_uploaded_when_others_are_rejected(self):
+        """
+        Test that rejecting malformed attestations does not hold back the valid ones in the batch.
+        """
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={'message': 'success'}, status=200)
+        self._put_attestation('evidence/valid.json')
+        self._put_attestation('evidence/invalid.json', self._statement({"evidence_id": "test-evidence"}))
+        event = {'Records': []}
+        for object_key in ('evidence/valid.json', 'evidence/invalid.json'):
+            event['Records'].extend(self._create_s3_event(self.bucket_name, object_key)['Records'])
+
+        result = handler(event, None)
+
+        self.assertEqual(result['batchItemFailures'], [{'itemIdentifier': 'evidence/invalid.json'}])
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(json.loads(Envelope.from_dict(json.loads(responses.calls[0].request.body)).payload), self._statement())
+
+    @responses.activate
+    def test_batch_reports_per_record_failures(self):
+        """
+        Test that one bad record in a batch is reported without failing the others.
+        """
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={'message': 'success'}, status=200)
+        object_keys = [f'evidence/attestation-{i}.json' for i in range(10)]
+        for object_key in object_keys:
+            self._put_attestation(object_key)
+
+        event = {'Records': []}
+        for object_key in object_keys + ['evidence/missing.json']:
+            event['Records'].extend(self._create_s3_event(self.bucket_name, object_key)['Records'])
+
+        result = handler(event, None)
+
+        self.assertEqual(result['statusCode'], 200)
+        self.assertEqual(result['batchItemFailures'], [{'itemIdentifier': 'evidence/missing.json'}])
+        self.assertEqual(len(responses.calls), len(object_keys))
+
+    @responses.activate
+    def test_sqs_batch_reports_failed_message_ids(self):
+        """
+        Test that S3 notifications delivered through SQS report failures by messageId.
+        """
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', status=503)
+        self._put_attestation('evidence/first.json')
+
+        event = {'Records': [
+            {'messageId': 'message-1', 'body': json.dumps(self._create_s3_event(self.bucket_name, 'evidence/first.json'))},
+            {'messageId': 'message-2', 'body': json.dumps({'Event': 's3:TestEvent'})}
+        ]}
+
+        result = handler(event, None)
+
+        self.assertEqual(result['batchItemFailures'], [{'itemIdentifier': 'message-1'}])
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_warm_invocation_reuses_cached_signer(self):
+        """
+        Test that a warm invocation signs without fetching or parsing the key again.
+        """
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={'message': 'success'}, status=200)
+        object_key = 'evidence/test-attestation.json'
+        self._put_attestation(object_key)
+        event = self._create_s3_event(self.bucket_name, object_key)
+
+        with mock.patch.object(ingestion, '_load_signer', wraps=ingestion._load_signer) as load_signer:
+            handler(event, None)
+            handler(event, None)
+
+        self.assertEqual(load_signer.call_count, 1)
+        self.assertEqual(len(responses.calls), 2)
+        for call in responses.calls:
+            envelope = Envelope.from_dict(json.loads(call.request.body))
+            self.assertTrue(envelope.verify([self.public_key], 1))
+
+    @responses.activate
+    def test_rotated_key_is_reloaded_after_ttl(self):
+        """
+        Test that a new secret version is picked up once the cache TTL has lapsed.
+        """
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={'message': 'success'}, status=200)
+        object_key = 'evidence/test-attestation.json'
+        self._put_attestation(object_key)
+        event = self._create_s3_event(self.bucket_name, object_key)
+
+        with mock.patch.object(ingestion, 'SIGNING_KEY_CACHE_TTL', 0):
+            with mock.patch.object(ingestion, '_load_signer', wraps=ingestion._load_signer) as load_signer:
+                handler(event, None)
+                # An unchanged VersionId keeps the cached signer even though the TTL lapsed
+                handler(event, None)
+                self.assertEqual(load_signer.call_count, 1)
+
+                rotated_pem, rotated_public_key = self._generate_key()
+                self.secretsmanager_client.put_secret_value(
+                    SecretId=os.environ['SIGNING_KEY_ARN'],
+                    SecretString=rotated_pem
+                )
+                handler(event, None)
+                self.assertEqual(load_signer.call_count, 2)
+
+        envelope = Envelope.from_dict(json.loads(responses.calls[-1].request.body))
+        self.assertTrue(envelope.verify([rotated_public_key], 1))
+
+
+    @responses.activate
+    def test_keyring_signs_with_every_active_key(self):
+        """
+        Test that each attestation carries one verifiable signature per keyring key.
+        """
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={'message': 'success'}, status=200)
+        next_pem, next_public_key = self._generate_key()
+        next_secret = self.secretsmanager_client.create_secret(Name='next-signing-key', SecretString=next_pem)
+        object_key = 'evidence/test-attestation.json'
+        self._put_attestation(object_key)
+
+        key_arns = f"{os.environ['SIGNING_KEY_ARN']}, {next_secret['ARN']}"
+        with mock.patch.dict(os.environ, {'SIGNING_KEY_ARNS': key_arns}):
+            result = handler(self._create_s3_event(self.bucket_name, object_key), None)
+
+        self.assertEqual(result['batchItemFailures'], [])
+        envelope = Envelope.from_dict(json.loads(responses.calls[0].request.body))
+        self.assertEqual(set(envelope.signatures), {self.public_key.keyid, next_public_key.keyid})
+        self.assertEqual(len(envelope.verify([self.public_key, next_public_key], 2)), 2)
+
+    @responses.activate
+    def test_stage_metrics_are_emitted(self):
+        """
+        Test that download, validation, signing and upload are timed when metrics are enabled.
+        """
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={'message': 'success'}, status=200)
+        self._put_attestation('evidence/valid.json')
+        self.s3_client.put_object(Bucket=self.bucket_name, Key='evidence/malformed.json', Body=b'{"_type": "x"}')
+        event = {'Records': [
+            self._create_s3_event(self.bucket_name, key)['Records'][0]
+            for key in ('evidence/valid.json', 'evidence/malformed.json')
+        ]}
+
+        documents = []
+        metrics.set_sink(documents.append)
+        try:
+            with mock.patch.dict(os.environ, {'METRICS_ENABLED': 'true'}):
+                handler(event, None)
+        finally:
+            metrics.set_sink(None)
+
+        self.assertEqual(len(documents), 1)
+        document = documents[0]
+        self.assertEqual(document['Service'], 'witness-ingestion')
+        self.assertEqual(len(document['download_ms']), 2)
+        self.assertEqual(len(document['validate_ms']), 1)
+        self.assertEqual(len(document['signer_load_ms']), 1)
+        self.assertEqual(len(document['sign_ms']), 1)
+        self.assertEqual(len(document['archivista_post_ms']), 1)
+        self.assertEqual(document['records'], 2)
+        self.assertEqual(document['records_rejected'], 1)
+        self.assertEqual(document['records_uploaded'], 1)
+        self.assertEqual(document['records_failed'], 1)
+        self.assertGreater(document['bytes_downloaded'], 0)
+
+
+    def _ledger_environment(self):
+        """
+        Helper function to point the handler at a fresh SQLite ledger for the rest of the test.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.dict(os.environ, {'INGESTION_LEDGER_PATH': os.path.join(directory.name, 'ledger.sqlite3')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: [value.close() for value in ingestion._clients.values() if isinstance(value, ledger.SqliteLedger)])
+
+    def _etag_event(self, object_keys):
+        """
+        Helper function to create an S3 event whose records carry the objects' ETags.
+        """
+        return replay.s3_event(self.bucket_name, [
+            (object_key, self.s3_client.head_object(Bucket=self.bucket_name, Key=object_key)['ETag'])
+            for object_key in object_keys
+        ])
+
+    @responses.activate
+    def test_retry_skips_records_already_uploaded(self):
+        """
+        Test that retrying a batch after one upload failed only signs and uploads the failed record.
+        """
+        self._ledger_environment()
+        object_keys = [f'evidence/attestation-{i}.json' for i in range(3)]
+        for i, object_key in enumerate(object_keys):
+            self._put_attestation(object_key, self._statement(dict(self._statement()['predicate'], evidence_payload={"index": i})))
+        event = {'Records': [self._create_s3_event(self.bucket_name, key)['Records'][0] for key in object_keys]}
+
+        failing_payload = base64.b64encode(self.s3_client.get_object(Bucket=self.bucket_name, Key=object_keys[1])['Body'].read()).decode()
+        responses.add_callback(responses.POST, 'https://archivista.testifysec.io/upload',
+                               callback=lambda request: (503 if json.loads(request.body)['payload'] == failing_payload else 200, {}, '{}'))
+        with mock.patch.object(ingestion, 'sign_envelope', wraps=ingestion.sign_envelope) as sign_envelope:
+            first = handler(event, None)
+            self.assertEqual(first['batchItemFailures'], [{'itemIdentifier': object_keys[1]}])
+            self.assertEqual(first['summary'], {'records': 3, 'skipped': 0, 'uploaded': 2, 'failed': 1})
+
+            responses.replace(responses.POST, 'https://archivista.testifysec.io/upload', json={}, status=200)
+            second = handler(event, None)
+
+        self.assertEqual(second['batchItemFailures'], [])
+        self.assertEqual(second['summary'], {'records': 3, 'skipped': 2, 'uploaded': 1, 'failed': 0})
+        # The failed record's signatures were kept, so the retry uploaded them without signing again
+        self.assertEqual(sign_envelope.call_count, 3)
+        self.assertEqual(len(responses.calls), 4)
+        retried = Envelope.from_dict(json.loads(responses.calls[-1].request.body))
+        self.assertEqual(retried.payload, base64.b64decode(failing_payload))
+        self.assertTrue(retried.verify([self.public_key], 1))
+
+    @responses.activate
+    def test_retry_of_an_sqs_message_with_several_records(self):
+        """
+        Test that when one of several S3 records in an SQS message fails, the retry uploads it
+        instead of skipping it under a sibling's object record.
+        """
+        self._ledger_environment()
+        object_keys = ['evidence/uploaded.json', 'evidence/failing.json']
+        for i, object_key in enumerate(object_keys):
+            self._put_attestation(object_key, self._statement(dict(self._statement()['predicate'], evidence_payload={"index": i})))
+        event = {'Records': [{'messageId': 'message-1', 'body': json.dumps(self._etag_event(object_keys))}]}
+
+        failing_payload = base64.b64encode(self.s3_client.get_object(Bucket=self.bucket_name, Key=object_keys[1])['Body'].read()).decode()
+        responses.add_callback(responses.POST, 'https://archivista.testifysec.io/upload',
+                               callback=lambda request: (503 if json.loads(request.body)['payload'] == failing_payload else 200, {}, '{}'))
+        first = handler(event, None)
+        self.assertEqual(first['batchItemFailures'], [{'itemIdentifier': 'message-1'}])
+
+        responses.replace(responses.POST, 'https://archivista.testifysec.io/upload', json={}, status=200)
+        second = handler(event, None)
+
+        self.assertEqual(second['batchItemFailures'], [])
+        self.assertEqual(second['summary'], {'records': 2, 'skipped': 1, 'uploaded': 1, 'failed': 0})
+        self.assertEqual(Envelope.from_dict(json.loads(responses.calls[-1].request.body)).payload, base64.b64decode(failing_payload))
+
+    @responses.activate
+    def test_known_etag_skips_the_download(self):
+        """
+        Test that a record whose object and ETag were already uploaded is not downloaded again, and
+        that a copy of an uploaded attestation under another key is downloaded but not uploaded.
+        """
+        self._ledger_environment()
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={}, status=200)
+        self._put_attestation('evidence/original.json')
+        handler(self._etag_event(['evidence/original.json']), None)
+        self._put_attestation('evidence/copy.json')
+
+        documents = []
+        metrics.set_sink(documents.append)
+        try:
+            with mock.patch.dict(os.environ, {'METRICS_ENABLED': 'true'}):
+                result = handler(self._etag_event(['evidence/original.json', 'evidence/copy.json']), None)
+        finally:
+            metrics.set_sink(None)
+
+        self.assertEqual(result['summary'], {'records': 2, 'skipped': 2, 'uploaded': 0, 'failed': 0})
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(len(documents[0]['download_ms']), 1)
+        self.assertEqual(documents[0]['records_skipped'], 2)
+
+        # The copy's object was recorded too, so it is no longer downloaded either
+        result = handler(self._etag_event(['evidence/copy.json']), None)
+        self.assertEqual(result['summary']['skipped'], 1)
+
+    @responses.activate
+    def test_replay_drains_a_prefix_once(self):
+        """
+        Test that replaying a prefix uploads each attestation once, and running it again skips them all.
+        """
+        self._ledger_environment()
+        responses.add(responses.POST, 'https://archivista.testifysec.io/upload', json={}, status=200)
+        for i in range(5):
+            self._put_attestation(f'evidence/backlog-{i}.json', self._statement(dict(self._statement()['predicate'], evidence_payload={"index": i})))
+        self._put_attestation('other/ignored.json')
+
+        first = replay.replay(self.bucket_name, 'evidence/', batch_size=2)
+        second = replay.replay(self.bucket_name, 'evidence/', batch_size=2)
+
+        self.assertEqual((first['listed'], first['uploaded'], first['skipped'], first['failed']), (5, 5, 0, 0))
+        self.assertEqual((second['listed'], second['uploaded'], second['skipped'], second['failed']), (5, 0, 5, 0))
+        self.assertEqual(len(responses.calls), 5)
+        self.assertEqual(replay.replay(self.bucket_name, 'evidence/', limit=3)['listed'], 3)
+
+    def test_sqlite_ledger_rolls_back_a_failed_write(self):
+        """
+        Test that a failed SQLite write stores nothing and leaves the ledger usable.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        table = ledger.SqliteLedger(os.path.join(directory.name, 'ledger.sqlite3'))
+        self.addCleanup(table.close)
+
+        uploaded = {ledger.digest_key('a' * 64): ledger.entry(ledger.UPLOADED, 'a' * 64, 'evidence/a.json')}
+        unbindable = {ledger.digest_key('b' * 64): dict(ledger.entry(ledger.UPLOADED, 'b' * 64), object=object())}
+        with self.assertRaises(sqlite3.Error):
+            table.put_many({**uploaded, **unbindable})
+        self.assertEqual(table.get_many(uploaded), {})
+
+        table.put_many(uploaded)
+        self.assertEqual(table.get_many(uploaded)[ledger.digest_key('a' * 64)]['object'], 'evidence/a.json')
+
+    def test_dynamodb_ledger(self):
+        """
+        Test that the DynamoDB ledger stores and reads entries in batches larger than one request.
+        """
+        dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+        dynamodb.create_table(
+            TableName='ingestion-ledger',
+            KeySchema=[{'AttributeName': 'ledger_key', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'ledger_key', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        with mock.patch.dict(os.environ, {'INGESTION_LEDGER_TABLE': 'ingestion-ledger'}):
+            table = ledger.ledger_from_env(ingestion._get_client)
+        self.assertIsInstance(table, ledger.DynamoDbLedger)
+
+        signatures = [{'keyid': 'abc', 'sig': 'def'}]
+        entries = {ledger.digest_key(f'{i:064x}'): ledger.entry(ledger.UPLOADED, f'{i:064x}', f'evidence/{i}.json') for i in range(120)}
+        entries[ledger.digest_key('f' * 64)] = ledger.entry(ledger.SIGNED, 'f' * 64, signatures=signatures)
+        table.put_many(entries)
+
+        found = table.get_many(list(entries) + [ledger.digest_key('0' * 63 + 'x')])
+        self.assertEqual(len(found), 121)
+        self.assertEqual(found[ledger.digest_key(f'{7:064x}')]['object'], 'evidence/7.json')
+        self.assertEqual(json.loads(found[ledger.digest_key('f' * 64)]['signatures']), signatures)
+        self.assertIsNone(found[ledger.digest_key('f' * 64)]['object'])
+        self.assertEqual(ledger.object_alias('b', 'k', '"etag"'), 'object:b/k#etag')
+        self.assertIsNone(ledger.object_alias('b', 'k', None))
+
+
+    def test_handler_against_archivista_stand_in(self):
+        """
+        Test that uploads over HTTP to the stand-in are stored, and injected failures are reported
+        per record and succeed on the retry.
+        """
+        self._ledger_environment()
+        object_keys = [f'evidence/attestation-{i}.json' for i in range(6)]
+        for i, object_key in enumerate(object_keys):
+            self._put_attestation(object_key, self._statement(dict(self._statement()['predicate'], evidence_payload={"index": i})))
+        event = self._etag_event(object_keys)
+
+        with ArchivistaStub(latency=0.01, error_rate=0.5, seed=3) as stub:
+            with mock.patch.dict(os.environ, {'ARCHIVISTA_URL': stub.url}):
+                first = handler(event, None)
+                stub.error_rate = 0
+                second = handler(event, None)
+            stats = stub.stats()
+            envelopes = list(stub.envelopes.values())
+
+        self.assertGreater(first['summary']['failed'], 0)
+        self.assertEqual(second['summary']['uploaded'], first['summary']['failed'])
+        self.assertEqual(second['batchItemFailures'], [])
+        self.assertEqual((stats['stored_payloads'], stats['duplicates']), (6, 0))
+        self.assertEqual(stats['statuses'], {'200': 6, '500': first['summary']['failed']})
+        for envelope in envelopes:
+            self.assertTrue(Envelope.from_dict(envelope).verify([self.public_key], 1))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import zipfile
+
+from witness_ingestion import package
+
+
+def test_package_holds_only_the_modules_the_handler_imports():
+    """
+    Test that the first-party files are the handler, the modules it imports and the schema.
+    """
+    assert package.first_party_files() == [
+        "collectors/__init__.py",
+        "collectors/runtime/__init__.py",
+        "collectors/runtime/canonical.py",
+        "collectors/runtime/metrics.py",
+        "collectors/runtime/validation.py",
+        "schema/evidence.schema.json",
+        "witness_ingestion/__init__.py",
+        "witness_ingestion/dsse.py",
+        "witness_ingestion/handler.py",
+        "witness_ingestion/ledger.py"
+    ]
+
+
+def test_first_party_files_follow_relative_and_nested_imports(tmp_path):
+    """
+    Test that relative imports and imports inside functions are followed.
+    """
+    for path, source in {
+        "witness_ingestion/handler.py": "from . import helpers\n",
+        "witness_ingestion/__init__.py": "",
+        "witness_ingestion/helpers.py": "def load():\n    from collectors.runtime import extra\n",
+        "collectors/__init__.py": "",
+        "collectors/runtime/__init__.py": "",
+        "collectors/runtime/extra.py": "import json\nimport boto3\n",
+        "collectors/runtime/unused.py": ""
+    }.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(source)
+
+    files = package.first_party_files(root=str(tmp_path))
+
+    assert "collectors/runtime/extra.py" in files
+    assert "witness_ingestion/helpers.py" in files
+    assert "collectors/runtime/unused.py" not in files
+
+
+def test_package_is_reproducible_and_importable(tmp_path):
+    """
+    Test that building twice gives identical bytes and the handler imports from the package.
+    """
+    first = tmp_path / "first.zip"
+    second = tmp_path / "second.zip"
+    names = package.build_package(str(first), dependencies=False)
+    package.build_package(str(second), dependencies=False)
+
+    assert first.read_bytes() == second.read_bytes()
+    assert zipfile.ZipFile(first).namelist() == names
+
+    # Import from the package only; third-party dependencies come from the test environment
+    process = subprocess.run(
+        [sys.executable, "-c", "import witness_ingestion.handler as h; print(h.__file__)"],
+        capture_output=True, text=True, cwd=str(tmp_path), check=True,
+        env=dict(os.environ, PYTHONPATH=str(first))
+    )
+    assert process.stdout.strip().startswith(str(first))
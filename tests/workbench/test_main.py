@@ -1,14 +1,151 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch
 
 # Import the FastAPI app
+from workbench.backend import dry_run, main
 from workbench.backend.main import app
 from workbench.backend.models import ApiRequest, CollectorConfig
 
 client = TestClient(app)
 
 
+class StubApi:
+    """
+    A local API for the proxy to call. It records every request with the client port it came
+    from, and tracks how many requests it serves at once.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.gate = threading.Event()
+        self.gate_released = None
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections open so the proxy can reuse them
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._serve(None)
+
+            def do_POST(self):
+                self._serve(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+
+            def _serve(self, body):
+                with stub.lock:
+                    stub.requests.append({
+                        "method": self.command, "path": self.path, "headers": dict(self.headers),
+                        "body": body, "port": self.client_address[1]
+                    })
+                if self.path == "/data":
+                    self._send_json(200, {"data": "some evidence"})
+                elif self.path == "/slow":
+                    with stub.lock:
+                        stub.active += 1
+                        stub.max_active = max(stub.max_active, stub.active)
+                    time.sleep(0.1)
+                    with stub.lock:
+                        stub.active -= 1
+                    self._send_json(200, {"slow": True})
+                elif self.path == "/gated":
+                    # One chunk, then wait until the test has seen it before sending the rest
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    self._send_chunk(b"a" * 65536)
+                    stub.gate_released = stub.gate.wait(5)
+                    for _ in range(16):
+                        self._send_chunk(b"b" * 65536)
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    self._send_json(404, {"message": "Not Found"})
+
+            def _send_chunk(self, data):
+                self.wfile.write(b"%x\r\n%b\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def _send_json(self, status, document):
+                response = json.dumps(document).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    main.response_cache.clear()
+    with StubApi() as stub:
+        yield stub
+    main.response_cache.clear()
+
+
+async def call_app(path, payload, on_chunk=None, send_fails=False):
+    """
+    Calls the ASGI app directly and returns (status, headers, [body chunks]) as the app sent them.
+
+    TestClient reads the whole response before returning, so streaming is observed here instead.
+    With send_fails set, sending fails like it does once the browser is gone.
+    """
+    body = json.dumps(payload).encode("utf-8")
+    received = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {"chunks": []}
+
+    async def receive():
+        if received:
+            return received.pop()
+        # The browser stays connected until the response is complete
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if send_fails:
+            raise OSError("Connection reset by peer")
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {name.decode(): value.decode() for name, value in message["headers"]}
+        elif message.get("body"):
+            response["chunks"].append(message["body"])
+            if on_chunk:
+                on_chunk(message["body"])
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80)
+    }
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["chunks"]
+
+
 def test_read_root():
     """
     Test the root endpoint to ensure the server is running.
@@ -18,18 +155,13 @@ def test_read_root():
     assert response.json() == {"message": "Welcome to the scoutos Collector Workbench Backend!"}
 
 
-@patch("workbench.backend.main.requests.request")
-def test_proxy_endpoint_success(mock_request):
+def test_proxy_endpoint_success(stub):
     """
     Test the /proxy endpoint's happy path.
     """
-    # Mock the response from the external API
-    mock_request.return_value.status_code = 200
-    mock_request.return_value.json.return_value = {"data": "some evidence"}
-
     api_call = {
         "method": "GET",
-        "url": "https://api.example.com/data",
+        "url": f"{stub.url}/data",
         "headers": {"Authorization": "Bearer test-token"}
     }
 
@@ -37,13 +169,169 @@ def test_proxy_endpoint_success(mock_request):
 
     assert response.status_code == 200
     assert response.json() == {"data": "some evidence"}
-    mock_request.assert_called_once_with(
-        method="GET",
-        url="https://api.example.com/data",
-        headers={"Authorization": "Bearer test-token"},
-        params={},
-        json=None
-    )
+    assert len(stub.requests) == 1
+    upstream = stub.requests[0]
+    assert (upstream["method"], upstream["path"], upstream["body"]) == ("GET", "/data", None)
+    assert upstream["headers"]["Authorization"] == "Bearer test-token"
+
+
+def test_proxy_relays_bodies_and_errors(stub):
+    """
+    Test that JSON bodies are sent upstream, upstream errors keep their status and unreachable
+    hosts are reported with a detail.
+    """
+    with TestClient(app) as workbench:
+        posted = workbench.post("/proxy", json={"method": "POST", "url": f"{stub.url}/data", "data": {"query": "{ viewer }"}})
+        missing = workbench.post("/proxy", json={"method": "GET", "url": f"{stub.url}/missing"})
+        unreachable = workbench.post("/proxy", json={"method": "GET", "url": "http://127.0.0.1:1/data"})
+        invalid = workbench.post("/proxy", json={"method": "GET", "url": "ftp://example.com/data"})
+
+    assert posted.json() == {"data": "some evidence"}
+    assert stub.requests[0]["body"] == {"query": "{ viewer }"}
+    assert missing.status_code == 404
+    assert missing.json() == {"message": "Not Found"}
+    assert unreachable.status_code == 502
+    assert "Error calling http://127.0.0.1:1/data" in unreachable.json()["detail"]
+    assert invalid.status_code == 400
+
+
+def test_proxy_reuses_upstream_connections(stub):
+    """
+    Test that consecutive calls to a host go over one pooled connection.
+    """
+    with TestClient(app) as workbench:
+        for _ in range(5):
+            response = workbench.post("/proxy", json={"url": f"{stub.url}/data", "cache": False})
+            assert response.status_code == 200
+
+    assert len(stub.requests) == 5
+    assert len({request["port"] for request in stub.requests}) == 1
+
+
+def test_proxy_caches_by_method_url_and_headers(stub):
+    """
+    Test that a repeated call is served from the cache and that other headers, opting out,
+    non-GET methods and error responses go upstream.
+    """
+    call = {"url": f"{stub.url}/data", "headers": {"Authorization": "Bearer a"}}
+    with TestClient(app) as workbench:
+        first = workbench.post("/proxy", json=call)
+        second = workbench.post("/proxy", json=call)
+        other_token = workbench.post("/proxy", json=dict(call, headers={"Authorization": "Bearer b"}))
+        bypass = workbench.post("/proxy", json=dict(call, cache=False))
+        posted = workbench.post("/proxy", json=dict(call, method="POST", data={}))
+        for _ in range(2):
+            workbench.post("/proxy", json={"url": f"{stub.url}/missing"})
+
+    assert [first.headers["X-Workbench-Cache"], second.headers["X-Workbench-Cache"]] == ["miss", "hit"]
+    assert second.json() == first.json() == {"data": "some evidence"}
+    assert second.headers["Content-Type"] == "application/json"
+    assert other_token.headers["X-Workbench-Cache"] == "miss"
+    assert bypass.headers["X-Workbench-Cache"] == "bypass"
+    assert posted.headers["X-Workbench-Cache"] == "bypass"
+    # first, other_token, bypass, posted and both 404s reached the stub
+    assert len(stub.requests) == 6
+
+
+def test_response_cache_expires_and_evicts(mocker):
+    """
+    Test that entries expire after the TTL and the least recently used entry goes first when full.
+    """
+    clock = mocker.patch.object(main.time, "monotonic", return_value=100.0)
+    cache = main.ResponseCache(ttl=10, max_bytes=10)
+    cache.set("a", 200, {}, b"aaaa")
+    cache.set("b", 200, {}, b"bbbb")
+    assert cache.get("a") == (200, {}, b"aaaa")
+
+    cache.set("c", 200, {}, b"cccc")
+    assert cache.get("b") is None
+    assert len(cache) == 2 and cache.size == 8
+
+    cache.set("too-large", 200, {}, b"x" * 11)
+    assert cache.get("too-large") is None
+
+    clock.return_value = 110.0
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.size == 0
+
+
+def test_proxy_streams_large_responses(stub):
+    """
+    Test that the first upstream chunk reaches the browser before the upstream has sent the rest.
+    """
+    async def run():
+        try:
+            return await call_app("/proxy", {"url": f"{stub.url}/gated"}, on_chunk=lambda _: stub.gate.set())
+        finally:
+            await main.close_pool()
+
+    status, headers, chunks = asyncio.run(run())
+
+    assert status == 200
+    assert stub.gate_released is True
+    assert len(chunks) > 1
+    assert b"".join(chunks) == b"a" * 65536 + b"b" * 16 * 65536
+    assert headers["x-workbench-cache"] == "miss"
+
+
+def test_proxy_limits_concurrent_calls_per_host(stub):
+    """
+    Test that no more than the per-host limit of calls reach a host at once.
+    """
+    async def run():
+        main._pool = main.UpstreamPool(per_host_concurrency=2)
+        try:
+            calls = [call_app("/proxy", {"url": f"{stub.url}/slow", "cache": False}) for _ in range(6)]
+            return await asyncio.gather(*calls)
+        finally:
+            await main.close_pool()
+
+    results = asyncio.run(run())
+
+    assert [status for status, _, _ in results] == [200] * 6
+    assert len(stub.requests) == 6
+    assert stub.max_active == 2
+
+
+def test_proxy_frees_the_host_slot_when_sending_fails(stub, monkeypatch):
+    """
+    Test that a response whose body is never sent still closes the upstream response and frees its slot.
+    """
+    monkeypatch.setattr(main, "QUEUE_TIMEOUT", 1)
+
+    async def run():
+        main._pool = main.UpstreamPool(per_host_concurrency=1)
+        try:
+            for _ in range(2):
+                with pytest.raises(OSError):
+                    await call_app("/proxy", {"url": f"{stub.url}/data", "cache": False}, send_fails=True)
+            return await call_app("/proxy", {"url": f"{stub.url}/data", "cache": False})
+        finally:
+            await main.close_pool()
+
+    status, _, chunks = asyncio.run(run())
+
+    assert status == 200
+    assert json.loads(b"".join(chunks)) == {"data": "some evidence"}
+
+
+def test_host_limits_drop_idle_hosts_first():
+    """
+    Test that only the least recently used idle hosts are dropped once too many are tracked.
+    """
+    async def run():
+        pool = main.UpstreamPool(max_tracked_hosts=2)
+        try:
+            await pool.acquire("busy.example.com", 1)
+            for host in ("a.example.com", "b.example.com", "c.example.com"):
+                (await pool.acquire(host, 1))()
+            return list(pool._host_limits)
+        finally:
+            await pool.aclose()
+
+    hosts = asyncio.run(run())
+
+    assert hosts == ["busy.example.com", "c.example.com"]
 
 
 def test_build_endpoint():
@@ -66,6 +354,105 @@ def test_build_endpoint():
     pack = response.json()
 
     assert pack["manifest"]["name"] == "my-test-collector"
-    assert "import requests" in pack["python_code"]
+    assert "get_http_client" in pack["python_code"]
+    assert "BatchEvidenceWriter" in pack["python_code"]
     assert 'COLLECTOR_NAME = "my-test-collector"' in pack["python_code"]
-    assert "# Terraform code will be generated here." in pack["terraform_code"]
\ No newline at end of file
+    assert "# Terraform code will be generated here." in pack["terraform_code"]
+    assert pack["dry_run"] is None
+
+
+PAGINATED_CONFIG = {
+    "collector_name": "okta-users",
+    "api_request": {
+        "method": "GET",
+        "url": "https://example.okta.com/api/v1/users?limit=2",
+        "headers": {"Authorization": "SSWS secret-token", "Accept": "application/json"}
+    },
+    "transformations": [
+        {"type": "filter", "field": "status", "equals": "ACTIVE"},
+        {"type": "rename", "fields": {"id": "user_id"}}
+    ],
+    "output_mapping": {"user_id": "user_id", "login": "profile.login"},
+    "pagination": {"style": "cursor", "items_path": "users", "cursor_path": "next"}
+}
+SAMPLE_RESPONSE = {
+    "users": [
+        {"id": "u1", "status": "ACTIVE", "profile": {"login": "ada@example.com"}},
+        {"id": "u2", "status": "SUSPENDED", "profile": {"login": "bob@example.com"}}
+    ],
+    "next": "abc"
+}
+
+
+def test_build_generates_a_streaming_collector_without_credentials():
+    """
+    Test that the pack pages, transforms and maps items lazily and reads credentials from a secret.
+    """
+    pack = client.post("/build", json=PAGINATED_CONFIG).json()
+
+    code = pack["python_code"]
+    assert "secret-token" not in code
+    assert "SECRET_HEADERS = ('Authorization',)" in code
+    assert "PAGINATION = Pagination(style='cursor', items_path='users', cursor_path='next')" in code
+    assert "TRANSFORMATIONS = (transform_0, transform_1, map_output)" in code
+    assert pack["manifest"]["secret_headers"] == ["Authorization"]
+
+    module, collector_class = dry_run.load_collector_class(code)
+    items = [{"id": "u1", "status": "ACTIVE", "profile": {"login": "ada"}}, {"id": "u2", "status": "SUSPENDED"}]
+    transformed = iter(items)
+    for transformation in module.TRANSFORMATIONS:
+        transformed = transformation(transformed)
+    assert not isinstance(transformed, list)
+    assert list(transformed) == [{"user_id": "u1", "login": "ada"}]
+    assert collector_class.required_environment == ("EVIDENCE_BUCKET", "TARGET_ACCOUNT_ID", "SECRET_NAME")
+
+
+@pytest.mark.parametrize("pagination", [
+    {"style": "cursor", "items_path": "users", "cursor_path": "next"},
+    {"style": "link", "items_path": "users"},
+    {"style": "page", "items_path": "users", "page_size_param": "limit", "page_size": 2}
+])
+def test_build_dry_run_reports_requests_bytes_and_timing(pagination):
+    """
+    Test that a dry run pages through the stub and writes the filtered items as one batch.
+    """
+    config = dict(PAGINATED_CONFIG, pagination=pagination, dry_run={"sample_response": SAMPLE_RESPONSE, "pages": 3})
+
+    report = client.post("/build", json=config).json()["dry_run"]
+
+    assert report["status"] == "success"
+    # page-number pagination asks for one more page and gets an empty one
+    assert report["requests"] == (4 if pagination["style"] == "page" else 3)
+    assert report["items"] == 3
+    assert report["objects_written"] == 2  # one batch part and its manifest
+    assert report["bytes_received"] == sum(request["bytes"] for request in report["request_log"]) > 0
+    assert report["bytes_written"] > 0
+    assert report["elapsed_ms"] > 0
+    assert all(request["status"] == 200 for request in report["request_log"])
+
+
+def test_build_dry_run_stops_paging_once_a_limit_is_reached():
+    """
+    Test that the generated pipeline stops fetching pages when downstream stops consuming.
+    """
+    config = dict(
+        PAGINATED_CONFIG,
+        transformations=[{"type": "limit", "count": 3}],
+        output_mapping={},
+        dry_run={"sample_response": SAMPLE_RESPONSE, "pages": 50}
+    )
+
+    report = client.post("/build", json=config).json()["dry_run"]
+
+    assert report["items"] == 3
+    assert report["requests"] == 2
+
+
+def test_build_rejects_invalid_transformations():
+    """
+    Test that an unknown transformation or pagination style is a 400 with a detail.
+    """
+    for change in ({"transformations": [{"type": "pivot"}]}, {"pagination": {"style": "offset"}}):
+        response = client.post("/build", json=dict(PAGINATED_CONFIG, **change))
+        assert response.status_code == 400
+        assert "Unknown" in response.json()["detail"]
@@ -0,0 +1,269 @@
+"""
+A local stand-in for Archivista, for exercising ingestion offline.
+
+It implements the endpoints ingestion uses, over real HTTP on localhost:
+
+    POST /upload              stores a DSSE envelope and answers {"gitoid": ...}
+    GET  /download/<gitoid>   returns a stored envelope
+    GET  /stats               what the stand-in has seen so far (see ArchivistaStub.stats)
+
+Unlike the zero-latency mocks in the tests, uploads can be made slow and unreliable: a fixed
+latency plus random jitter, a share of 5xx errors, a request rate above which uploads are throttled
+with 429 and Retry-After, and a cap on concurrent uploads above which they are rejected with 503.
+Faults are drawn from a seeded generator, so a run can be repeated.
+
+    python -m witness_ingestion.archivista_stub --port 8082 --latency-ms 40 --jitter-ms 20 \\
+        --error-rate 0.02 --throttle-rps 200
+
+Then point ARCHIVISTA_URL at http://127.0.0.1:8082. benchmarks/bench_ingestion_load.py drives the
+ingestion handler against it in-process.
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+ENVELOPE_FIELDS = ("payload", "payloadType", "signatures")
+# Requests listed with their timing in stats
+MAX_RECORDED_REQUESTS = 10000
+
+
+class TokenBucket:
+    """
+    Allows rate requests per second on average, with bursts of up to burst requests.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """
+        Takes a token if one is available. Returns 0, or the seconds until one will be.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class ArchivistaStub:
+    """
+    An Archivista-compatible HTTP server on localhost that stores uploaded envelopes in memory.
+
+    latency and jitter are in seconds; each upload waits latency plus a uniform share of jitter.
+    error_rate is the share of uploads answered with error_status after the wait. throttle_rps
+    rate-limits uploads with 429; max_in_flight rejects uploads beyond that many at once with 503.
+    Use as a context manager, or call start() and stop().
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, throttle_rps=None,
+                 throttle_burst=None, max_in_flight=None, seed=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle = TokenBucket(throttle_rps, throttle_burst) if throttle_rps else None
+        self.max_in_flight = max_in_flight
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.envelopes = {}
+        self.reset()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    def reset(self):
+        """
+        Forgets the stored envelopes and counters.
+        """
+        with self.lock:
+            self.envelopes.clear()
+            self.statuses = Counter()
+            self.uploads = 0
+            self.duplicates = 0
+            self.payload_digests = set()
+            self.in_flight = 0
+            self.peak_in_flight = 0
+            self.request_ms = []
+
+    def _fault(self):
+        """
+        Returns (wait seconds, error status or None) for the next upload.
+        """
+        with self.lock:
+            wait = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            failed = self.error_rate and self.random.random() < self.error_rate
+        return wait, self.error_status if failed else None
+
+    def upload(self, body):
+        """
+        Handles an upload body. Returns (status, response document, extra headers).
+        """
+        if self.throttle is not None:
+            retry_after = self.throttle.take()
+            if retry_after:
+                return 429, {"error": "rate limit exceeded"}, {"Retry-After": str(max(1, round(retry_after)))}
+
+        with self.lock:
+            if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+                return 503, {"error": "too many concurrent uploads"}, {}
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            wait, error_status = self._fault()
+            if wait:
+                time.sleep(wait)
+            if error_status is not None:
+                return error_status, {"error": "injected failure"}, {}
+            try:
+                envelope = json.loads(body)
+            except ValueError:
+                return 400, {"error": "body is not JSON"}, {}
+            if not isinstance(envelope, dict) or any(field not in envelope for field in ENVELOPE_FIELDS):
+                return 400, {"error": f"an envelope needs {', '.join(ENVELOPE_FIELDS)}"}, {}
+
+            gitoid = hashlib.sha256(body).hexdigest()
+            payload_digest = hashlib.sha256(envelope["payload"].encode('utf-8')).hexdigest()
+            with self.lock:
+                self.uploads += 1
+                if payload_digest in self.payload_digests:
+                    self.duplicates += 1
+                self.payload_digests.add(payload_digest)
+                self.envelopes[gitoid] = envelope
+            return 200, {"gitoid": gitoid}, {}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def stats(self):
+        """
+        Returns what the stand-in has seen: requests by status, successful uploads, uploads of a
+        payload that was already stored, distinct payloads stored, peak concurrent uploads and
+        upload latency percentiles in milliseconds.
+        """
+        with self.lock:
+            request_ms = sorted(self.request_ms)
+            statuses = dict(self.statuses)
+            stats = {
+                "requests": sum(statuses.values()),
+                "statuses": {str(status): count for status, count in sorted(statuses.items())},
+                "uploads": self.uploads,
+                "duplicates": self.duplicates,
+                "stored_payloads": len(self.payload_digests),
+                "peak_in_flight": self.peak_in_flight
+            }
+        for p in (50, 90, 99):
+            stats[f"p{p}_ms"] = round(request_ms[min(len(request_ms) - 1, len(request_ms) * p // 100)], 3) if request_ms else None
+        return stats
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, status, document, headers=None):
+                response = json.dumps(document).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(response)
+
+            def do_POST(self):
+                started = time.perf_counter()
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.split('?', 1)[0] != "/upload":
+                    status, document, headers = 404, {"error": "not found"}, {}
+                else:
+                    status, document, headers = stub.upload(body)
+                self._respond(status, document, headers)
+                with stub.lock:
+                    stub.statuses[status] += 1
+                    if len(stub.request_ms) < MAX_RECORDED_REQUESTS:
+                        stub.request_ms.append((time.perf_counter() - started) * 1000)
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == "/stats":
+                    return self._respond(200, stub.stats())
+                envelope = stub.envelopes.get(path[len("/download/"):]) if path.startswith("/download/") else None
+                if envelope is None:
+                    return self._respond(404, {"error": "not found"})
+                self._respond(200, envelope)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+# --------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Archivista stand-in with injectable faults.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8082)
+    parser.add_argument('--latency-ms', type=float, default=0, help="Added to every upload")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Uniform random latency added on top")
+    parser.add_argument('--error-rate', type=float, default=0, help="Share of uploads that fail, 0 to 1")
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--throttle-rps', type=float, default=None, help="Uploads per second before 429s")
+    parser.add_argument('--max-in-flight', type=int, default=None, help="Concurrent uploads before 503s")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    stub = ArchivistaStub(
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate,
+        error_status=args.error_status, throttle_rps=args.throttle_rps, max_in_flight=args.max_in_flight,
+        seed=args.seed, host=args.host, port=args.port
+    )
+    print(f"Archivista stand-in listening on {stub.url}", file=sys.stderr)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+        print(json.dumps(stub.stats(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
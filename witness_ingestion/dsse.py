@@ -0,0 +1,316 @@
+"""
+DSSE signing with a keyring and verification with cached verifiers.
+
+Signing builds the envelope's pre-authentication encoding (PAE) once and signs it with every key of
+the keyring, so an attestation carries one signature per active key. Rotating a key is then an
+overlap instead of a cutover: add the new key, let verifiers learn it, and retire the old one.
+
+Verification parses each public key once and caches it by keyid. An envelope is checked against the
+cached verifiers of the keyids its signatures name, without rebuilding key objects per check.
+Bulk verification re-checks stored envelopes in one pass, e.g. during audits:
+
+    python -m witness_ingestion.dsse --key signing-key.pub [--key next-key.pub] [--threshold 1] \\
+        envelopes.ndjson [more-envelopes/ ...]
+
+Each path is a JSON envelope, an NDJSON file of envelopes, or a directory of either. The command
+prints a summary and exits non-zero if any envelope fails.
+"""
+import os
+import sys
+import json
+import base64
+import logging
+import argparse
+import itertools
+import threading
+
+from collectors.runtime import canonical
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+PAYLOAD_TYPE = "application/vnd.in-toto+json"
+# Failed envelopes listed in a bulk verification summary
+MAX_REPORTED_FAILURES = 100
+
+
+class EnvelopeVerificationError(ValueError):
+    """
+    Raised when fewer than the required number of known keys signed an envelope.
+    """
+
+    def __init__(self, message, verified_keyids=()):
+        super().__init__(message)
+        self.verified_keyids = list(verified_keyids)
+
+
+def pae(payload_type, payload):
+    """
+    Returns the DSSE v1 pre-authentication encoding of a payload.
+    """
+    payload_type = payload_type.encode('utf-8')
+    return b"DSSEv1 %d %b %d %b" % (len(payload_type), payload_type, len(payload), payload)
+
+# --------------------------------------------------------------------------------------------------
+# Signing
+# --------------------------------------------------------------------------------------------------
+def sign_envelope(payload, signers, payload_type=PAYLOAD_TYPE):
+    """
+    Returns a DSSE Envelope over the payload bytes with one signature per signer.
+
+    A payload that is not bytes, e.g. an in-toto Statement dict, is signed as its canonical JSON
+    (see collectors/runtime/canonical.py), the same bytes the evidence writers store. The PAE is
+    built once and shared by all signers.
+    """
+    from securesystemslib.dsse import Envelope
+
+    if not isinstance(payload, (bytes, bytearray)):
+        payload = canonical.dumps(payload)
+
+    envelope = Envelope(payload, payload_type, {})
+    data = pae(payload_type, payload)
+    for signer in signers:
+        signature = signer.sign(data)
+        envelope.signatures[signature.keyid] = signature
+    return envelope
+
+# --------------------------------------------------------------------------------------------------
+# Verification
+# --------------------------------------------------------------------------------------------------
+def _ecdsa_verify(public_key, hash_class):
+    from cryptography.hazmat.primitives.asymmetric.ec import ECDSA
+
+    algorithm = ECDSA(hash_class())
+    return lambda signature, data: public_key.verify(signature, data, algorithm)
+
+
+class Verifier:
+    """
+    A public key parsed once into a verification function.
+
+    ed25519 and ECDSA keys are verified with cryptography directly. Other schemes go through
+    SSlibKey.verify_signature.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.keyid = key.keyid
+        self._verify = self._build()
+
+    def _build(self):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives.hashes import SHA256, SHA384, SHA512
+        from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
+        self._invalid = (InvalidSignature,)
+        scheme = self.key.scheme
+        if scheme == "ed25519":
+            from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+            return Ed25519PublicKey.from_public_bytes(bytes.fromhex(self.key.keyval["public"])).verify
+
+        ecdsa_hashes = {"ecdsa-sha2-nistp256": SHA256, "ecdsa-sha2-nistp384": SHA384, "ecdsa-sha2-nistp521": SHA512}
+        if scheme in ecdsa_hashes:
+            public_key = load_pem_public_key(self.key.keyval["public"].encode('utf-8'))
+            return _ecdsa_verify(public_key, ecdsa_hashes[scheme])
+
+        from securesystemslib.exceptions import UnverifiedSignatureError, VerificationError
+        from securesystemslib.signer import Signature
+
+        self._invalid = (UnverifiedSignatureError, VerificationError)
+
+        def verify(signature, data):
+            self.key.verify_signature(Signature(self.keyid, signature.hex()), data)
+        return verify
+
+    def verify(self, signature, data):
+        """
+        Returns True if signature (bytes) is this key's signature over data.
+        """
+        try:
+            self._verify(signature, data)
+        except self._invalid:
+            return False
+        return True
+
+
+def load_public_key(key):
+    """
+    Returns an SSlibKey for a PEM-encoded public key, a securesystemslib key dict, or an SSlibKey.
+    """
+    from securesystemslib.signer import SSlibKey
+
+    if isinstance(key, SSlibKey):
+        return key
+    if isinstance(key, dict):
+        key = dict(key)
+        return SSlibKey.from_dict(key.pop('keyid'), key)
+    from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return SSlibKey.from_crypto(load_pem_public_key(key))
+
+
+def _decode(envelope):
+    """
+    Returns (payload_type, payload, [(keyid, signature bytes)]) for an envelope dict or Envelope.
+    """
+    if isinstance(envelope, dict):
+        return envelope['payloadType'], base64.b64decode(envelope['payload']), [
+            (signature.get('keyid'), base64.b64decode(signature['sig'])) for signature in envelope['signatures']
+        ]
+    return envelope.payload_type, envelope.payload, [
+        (signature.keyid, bytes.fromhex(signature.signature)) for signature in envelope.signatures.values()
+    ]
+
+
+class VerifierCache:
+    """
+    Verifiers of trusted public keys, keyed by keyid.
+
+    Keys are parsed when they are added. Envelopes can be the JSON dicts stored in Archivista or
+    securesystemslib Envelopes; signatures by unknown keyids are ignored.
+    """
+
+    def __init__(self, keys=()):
+        self._verifiers = {}
+        self.lock = threading.Lock()
+        for key in keys:
+            self.add(key)
+
+    def add(self, key):
+        """
+        Trusts a public key (see load_public_key) and returns its keyid.
+        """
+        key = load_public_key(key)
+        with self.lock:
+            if key.keyid not in self._verifiers:
+                self._verifiers[key.keyid] = Verifier(key)
+        return key.keyid
+
+    def remove(self, keyid):
+        with self.lock:
+            self._verifiers.pop(keyid, None)
+
+    def keyids(self):
+        return list(self._verifiers)
+
+    def verified_keyids(self, envelope):
+        """
+        Returns the keyids of the trusted keys with a valid signature on the envelope.
+        """
+        payload_type, payload, signatures = _decode(envelope)
+        data = pae(payload_type, payload)
+        verified = []
+        for keyid, signature in signatures:
+            verifier = self._verifiers.get(keyid)
+            if verifier is not None and keyid not in verified and verifier.verify(signature, data):
+                verified.append(keyid)
+        return verified
+
+    def verify(self, envelope, threshold=1):
+        """
+        Returns the keyids that verified the envelope.
+
+        Raises EnvelopeVerificationError if fewer than threshold trusted keys signed it.
+        """
+        verified = self.verified_keyids(envelope)
+        if len(verified) < threshold:
+            raise EnvelopeVerificationError(
+                f"{len(verified)} of the required {threshold} trusted signatures verified", verified
+            )
+        return verified
+
+    def verify_many(self, envelopes, threshold=1):
+        """
+        Verifies envelopes one after another and yields, for each, the keyids that verified it or
+        the EnvelopeVerificationError.
+
+        Malformed envelopes yield an EnvelopeVerificationError too, so one bad record does not stop
+        an audit.
+        """
+        for envelope in envelopes:
+            try:
+                yield self.verify(envelope, threshold)
+            except EnvelopeVerificationError as e:
+                yield e
+            except (KeyError, TypeError, ValueError) as e:
+                yield EnvelopeVerificationError(f"Malformed envelope: {e}")
+
+
+_default_cache = VerifierCache()
+
+def get_verifier_cache():
+    """
+    Returns the process-wide VerifierCache.
+    """
+    return _default_cache
+
+# --------------------------------------------------------------------------------------------------
+# Bulk Verification
+# --------------------------------------------------------------------------------------------------
+def iter_envelope_files(paths):
+    """
+    Yields (source, envelope dict) from JSON and NDJSON files, descending into directories.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, filenames in os.walk(path):
+                subdirectories.sort()
+                yield from iter_envelope_files(os.path.join(directory, name) for name in sorted(filenames))
+            continue
+        with open(path) as f:
+            text = f.read()
+        try:
+            document = json.loads(text)
+        except ValueError:
+            for line_number, line in enumerate(text.splitlines(), 1):
+                if line.strip():
+                    yield f"{path}:{line_number}", json.loads(line)
+        else:
+            for index, envelope in enumerate(document if isinstance(document, list) else [document]):
+                yield f"{path}:{index + 1}" if isinstance(document, list) else path, envelope
+
+def bulk_verify(cache, sources, threshold=1):
+    """
+    Verifies (source, envelope) pairs and returns a summary of the run.
+    """
+    summary = {"envelopes": 0, "verified": 0, "failed": 0, "failures": [], "keyids": {}}
+    sources, envelopes = itertools.tee(sources)
+    results = cache.verify_many((envelope for _, envelope in envelopes), threshold)
+    for (source, _), result in zip(sources, results):
+        summary["envelopes"] += 1
+        if isinstance(result, EnvelopeVerificationError):
+            summary["failed"] += 1
+            if len(summary["failures"]) < MAX_REPORTED_FAILURES:
+                summary["failures"].append({"source": source, "error": str(result)})
+            continue
+        summary["verified"] += 1
+        for keyid in result:
+            summary["keyids"][keyid] = summary["keyids"].get(keyid, 0) + 1
+    return summary
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+# --------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify DSSE envelopes against trusted public keys.")
+    parser.add_argument('--key', action='append', required=True, help="PEM public key file; repeat for a keyring")
+    parser.add_argument('--threshold', type=int, default=1, help="Trusted signatures required per envelope")
+    parser.add_argument('paths', nargs='+', help="JSON or NDJSON envelope files, or directories of them")
+    args = parser.parse_args(argv)
+
+    cache = VerifierCache()
+    for path in args.key:
+        with open(path, 'rb') as f:
+            cache.add(f.read())
+
+    summary = bulk_verify(cache, iter_envelope_files(args.paths), args.threshold)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
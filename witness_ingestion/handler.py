@@ -1,64 +1,397 @@
 import json
-import boto3
-import requests
 import os
+import time
 import base64
-from in_toto.models.metadata import Metadata
-from securesystemslib.signer import CryptoSigner
-from securesystemslib.signer._key import SSlibKey
-from cryptography.hazmat.primitives.serialization import load_pem_private_key
-from securesystemslib.dsse import Envelope
+import hashlib
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 
-def handler(event, context):
+from collectors.runtime import canonical, metrics
+from collectors.runtime.validation import validate_batch
+from witness_ingestion import ledger as ingestion_ledger
+from witness_ingestion.dsse import PAYLOAD_TYPE, sign_envelope
+
+# boto3, requests, cryptography and securesystemslib are imported by the functions that use them.
+# Importing them here would add their load time to every cold start, including invocations that
+# reject their whole batch and never sign anything.
+
+# --------------------------------------------------------------------------------------------------
+# Warm-start Caches
+# --------------------------------------------------------------------------------------------------
+# Module-level state survives between invocations in a warm Lambda container. A cached signer is
+# reused until its TTL lapses; after that the secret's current VersionId is checked and the key is
+# only fetched and parsed again when it has been rotated.
+SIGNING_KEY_CACHE_TTL = int(os.environ.get('SIGNING_KEY_CACHE_TTL', '300'))
+
+# Every attestation is signed with each active key of the keyring: SIGNING_KEY_ARNS lists the
+# secrets comma-separated, SIGNING_KEY_ARN names a single one. To rotate, add the new key, wait
+# until verifiers trust it, then remove the old one.
+
+# Number of records downloaded, signed and uploaded in parallel. Connection pools are sized to match.
+INGESTION_CONCURRENCY = int(os.environ.get('INGESTION_CONCURRENCY', '8'))
+
+# Attestations are signed as the exact bytes stored in S3. Unless validation is turned off, every
+# batch is checked against schema/evidence.schema.json before any key is loaded or anything is signed.
+VALIDATE_ATTESTATIONS = os.environ.get('VALIDATE_ATTESTATIONS', 'true').lower() == 'true'
+
+# With INGESTION_LEDGER_TABLE (DynamoDB) or INGESTION_LEDGER_PATH (SQLite) set, records whose
+# attestation was already uploaded are skipped on retries and replays; see witness_ingestion/ledger.py.
+
+# Service dimension of the stage metrics emitted when METRICS_ENABLED is "true"
+METRICS_SERVICE = "witness-ingestion"
+
+_clients = {}
+_signer_cache = {}
+
+
+def _get_client(service_name):
     """
-    Lambda handler to process S3 evidence attestations, sign them, and upload to Archivista.
+    Returns a boto3 client for the service, created once per container.
+    """
+    region = os.environ['AWS_REGION']
+    cache_key = (service_name, region)
+    if cache_key not in _clients:
+        import boto3
+        from botocore.config import Config
+
+        _clients[cache_key] = boto3.client(
+            service_name,
+            region_name=region,
+            config=Config(max_pool_connections=INGESTION_CONCURRENCY)
+        )
+    return _clients[cache_key]
+
+
+def _get_http_session():
+    """
+    Returns a keep-alive HTTP session for Archivista uploads, created once per container.
+    """
+    if 'http' not in _clients:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=INGESTION_CONCURRENCY)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _clients['http'] = session
+    return _clients['http']
+
+
+def _get_ledger():
     """
-    s3 = boto3.client('s3', region_name=os.environ['AWS_REGION'])
-    secretsmanager = boto3.client('secretsmanager', region_name=os.environ['AWS_REGION'])
+    Returns the ingestion ledger configured in the environment, or None, created once per container.
+    """
+    cache_key = ('ledger', os.environ.get('INGESTION_LEDGER_TABLE'), os.environ.get('INGESTION_LEDGER_PATH'))
+    if cache_key not in _clients:
+        _clients[cache_key] = ingestion_ledger.ledger_from_env(_get_client)
+    return _clients[cache_key]
+
+
+def _ledger_get(ledger, keys):
+    """
+    Returns the ledger entries of keys. A ledger that cannot be read is treated as empty, so the
+    records are processed again rather than held back.
+    """
+    keys = [key for key in keys if key]
+    if ledger is None or not keys:
+        return {}
+    try:
+        return ledger.get_many(keys)
+    except Exception as e:
+        print(f"Failed to read the ingestion ledger: {e}")
+        return {}
 
-    # Get the signing key from Secrets Manager
-    key_arn = os.environ['SIGNING_KEY_ARN']
-    secret = secretsmanager.get_secret_value(SecretId=key_arn)
-    private_key_pem = secret['SecretString']
 
-    # Write the key to a file
-    key_path = "/tmp/signing_key.pem"
-    with open(key_path, "w") as f:
-        f.write(private_key_pem)
+def _ledger_put(ledger, entries):
+    """
+    Records ledger entries. A failed write is logged only: the record's work is done, and at worst
+    it is repeated on a replay.
+    """
+    try:
+        ledger.put_many(entries)
+    except Exception as e:
+        print(f"Failed to update the ingestion ledger: {e}")
+
+
+def _load_signer(private_key_pem):
+    """
+    Builds a signer directly from a PEM-encoded private key held in memory.
+    """
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+    from securesystemslib.signer import CryptoSigner
+    from securesystemslib.signer._key import SSlibKey
 
-    # Create the signer
     private_key = load_pem_private_key(private_key_pem.encode('utf-8'), password=None)
     public_key = SSlibKey.from_crypto(private_key.public_key())
-    signer = CryptoSigner.from_priv_key_uri(f"file2:{key_path}", public_key)
+    return CryptoSigner(private_key, public_key)
 
 
+def _current_version_id(secretsmanager, key_arn):
+    """
+    Returns the VersionId currently staged as AWSCURRENT, without retrieving the secret value.
+    """
+    versions = secretsmanager.describe_secret(SecretId=key_arn).get('VersionIdsToStages', {})
+    for version_id, stages in versions.items():
+        if 'AWSCURRENT' in stages:
+            return version_id
+    return None
+
+
+def get_signer(key_arn):
+    """
+    Returns the signer for key_arn, reusing the one cached by an earlier invocation when possible.
+    """
+    now = time.monotonic()
+    cached = _signer_cache.get(key_arn)
+    if cached and now - cached['checked_at'] < SIGNING_KEY_CACHE_TTL:
+        return cached['signer']
+
+    secretsmanager = _get_client('secretsmanager')
+    if cached and _current_version_id(secretsmanager, key_arn) == cached['version_id']:
+        cached['checked_at'] = now
+        return cached['signer']
+
+    with metrics.span('signer_load'):
+        secret = secretsmanager.get_secret_value(SecretId=key_arn)
+        signer = _load_signer(secret['SecretString'])
+    _signer_cache[key_arn] = {
+        'signer': signer,
+        'version_id': secret.get('VersionId'),
+        'checked_at': now
+    }
+    return signer
+
+
+def signing_key_arns():
+    """
+    Returns the ARNs of the keyring's active signing keys.
+    """
+    key_arns = [arn.strip() for arn in os.environ.get('SIGNING_KEY_ARNS', '').split(',') if arn.strip()]
+    return key_arns or [os.environ['SIGNING_KEY_ARN']]
+
+
+def get_signers(key_arns):
+    """
+    Returns the (possibly cached) signers of all keyring keys.
+    """
+    return [get_signer(key_arn) for key_arn in key_arns]
+
+
+def _iter_s3_objects(event):
+    """
+    Yields (item_identifier, bucket, key, etag) for every object referenced by an S3 or SQS event.
+
+    Records delivered through SQS carry the S3 notification in their body and are identified by
+    their messageId; direct S3 notification records are identified by their object key. etag is
+    None when the notification does not carry one.
+    """
     for record in event['Records']:
-        bucket_name = record['s3']['bucket']['name']
-        object_key = record['s3']['object']['key']
+        if 's3' in record:
+            s3_object = record['s3']['object']
+            yield s3_object['key'], record['s3']['bucket']['name'], s3_object['key'], s3_object.get('eTag')
+            continue
+
+        # S3 test events published to SQS have no Records and are skipped
+        notification = json.loads(record['body'])
+        for s3_record in notification.get('Records', []):
+            s3_object = s3_record['s3']['object']
+            yield record['messageId'], s3_record['s3']['bucket']['name'], s3_object['key'], s3_object.get('eTag')
+
+
+def _read_object(s3, bucket_name, object_key):
+    """
+    Reads an attestation from S3 into memory.
+    """
+    with metrics.span('download'):
+        payload = s3.get_object(Bucket=bucket_name, Key=object_key)['Body'].read()
+    metrics.count('bytes_downloaded', len(payload), unit="Bytes")
+    return payload
+
+
+def _sign_and_upload(signers, session, archivista_url, object_key, payload,
+                     ledger=None, digest=None, alias=None, signatures=None):
+    """
+    Signs a single attestation with every keyring key and uploads it to Archivista without
+    touching the filesystem.
+
+    With a ledger, the upload is recorded under the attestation's digest and the object's alias.
+    signatures, kept in the ledger by an earlier attempt whose upload failed, are reused instead of
+    signing again; the signatures of a failed upload are recorded for the next attempt.
+    """
+    if signatures is None:
+        # Create a DSSE envelope over the original bytes with one signature per key
+        with metrics.span('sign'):
+            envelope = sign_envelope(payload, signers).to_dict()
+        metrics.count('signatures', len(signers))
+        signed_now = True
+    else:
+        envelope = {
+            'payload': base64.b64encode(payload).decode('ascii'),
+            'payloadType': PAYLOAD_TYPE,
+            'signatures': signatures
+        }
+        metrics.count('signatures_reused', len(signatures))
+        signed_now = False
+
+    # Upload the signed attestation to Archivista
+    headers = {'Content-Type': 'application/json'}
+    try:
+        with metrics.span('archivista_post'):
+            response = session.post(f"{archivista_url}/upload", data=canonical.dumps(envelope), headers=headers)
+            response.raise_for_status()
+    except Exception:
+        if ledger is not None and signed_now:
+            signed = ingestion_ledger.entry(ingestion_ledger.SIGNED, digest, object_key, envelope['signatures'])
+            _ledger_put(ledger, {ingestion_ledger.digest_key(digest): signed})
+        raise
+    metrics.count('records_uploaded')
+
+    if ledger is not None:
+        uploaded = ingestion_ledger.entry(ingestion_ledger.UPLOADED, digest, object_key)
+        entries = {ingestion_ledger.digest_key(digest): uploaded}
+        if alias:
+            entries[alias] = uploaded
+        _ledger_put(ledger, entries)
+
+    print(f"Successfully uploaded signed attestation for {object_key} to Archivista.")
+
+
+def _run_concurrently(executor, function, items, failures):
+    """
+    Calls function(*arguments) for every (item_identifier, arguments) pair on the executor.
+
+    Returns (item_identifier, arguments, result) for the calls that succeeded, in input order, and
+    appends the identifiers of the ones that raised to failures.
+    """
+    # Each call runs in a copy of the caller's context, so its stages count towards the invocation
+    futures = [
+        (item_identifier, arguments, executor.submit(contextvars.copy_context().run, function, *arguments))
+        for item_identifier, arguments in items
+    ]
+    succeeded = []
+    for item_identifier, arguments, future in futures:
+        try:
+            succeeded.append((item_identifier, arguments, future.result()))
+        except Exception as e:
+            print(f"Failed to ingest attestation for {item_identifier}: {e}")
+            if item_identifier not in failures:
+                failures.append(item_identifier)
+    return succeeded
+
+
+def handler(event, context):
+    """
+    Lambda handler to process S3 evidence attestations, sign them, and upload to Archivista.
+
+    Records are downloaded concurrently and the whole batch is validated against the evidence
+    schema first, so malformed attestations are rejected before the signing key is loaded or any
+    signing or upload happens. The remaining records are signed and uploaded concurrently. Failed
+    records are reported as SQS-style batchItemFailures so that only they are retried, instead of
+    the whole batch. With an ingestion ledger, records that were already uploaded are skipped, so
+    a retried or replayed batch only redoes the work that failed. With METRICS_ENABLED, the time
+    spent downloading, validating, signing and posting to Archivista is emitted as a CloudWatch
+    EMF document per invocation.
+    """
+    invocation = metrics.start_invocation(METRICS_SERVICE)
+    try:
+        return _ingest(event, invocation)
+    finally:
+        metrics.finish_invocation(invocation)
+
+
+def _ingest(event, invocation):
+    """
+    Downloads, validates, signs and uploads the attestations of one event. Returns the handler response.
+    """
+    s3 = _get_client('s3')
+    archivista_url = os.environ['ARCHIVISTA_URL']
+    ledger = _get_ledger()
 
-        # Download the attestation from S3
-        local_attestation_path = f"/tmp/{os.path.basename(object_key)}"
-        s3.download_file(bucket_name, object_key, local_attestation_path)
+    records = [
+        (item_identifier, bucket_name, object_key, ingestion_ledger.object_alias(bucket_name, object_key, etag))
+        for item_identifier, bucket_name, object_key, etag in _iter_s3_objects(event)
+    ]
+    invocation.count('records', len(records))
 
-        with open(local_attestation_path, 'r') as f:
-            attestation_statement = json.load(f)
+    # Objects whose ETag is already recorded as uploaded are skipped without being downloaded
+    known = _ledger_get(ledger, [alias for _, _, _, alias in records])
+    pending = [record for record in records if known.get(record[3], {}).get('state') != ingestion_ledger.UPLOADED]
+    skipped = len(records) - len(pending)
 
-        # Create a DSSE envelope and sign it
-        payload = json.dumps(attestation_statement).encode('utf-8')
-        payload_type = "application/vnd.in-toto+json"
+    failures = []
+    uploaded = []
+    with ThreadPoolExecutor(max_workers=INGESTION_CONCURRENCY) as executor:
+        # Each record carries its own alias: one SQS message can hold several S3 records
+        downloaded = _run_concurrently(
+            executor, lambda bucket_name, object_key, alias: _read_object(s3, bucket_name, object_key),
+            [(record[0], record[1:]) for record in pending], failures
+        )
+        attestations = [
+            (item_identifier, object_key, payload, alias)
+            for item_identifier, (_, object_key, alias), payload in downloaded
+        ]
 
-        envelope = Envelope(payload, payload_type, [])
-        envelope.sign(signer)
+        if VALIDATE_ATTESTATIONS:
+            with invocation.span('validate'):
+                results = validate_batch([payload for _, _, payload, _ in attestations])
+            for (item_identifier, object_key, _, _), error in zip(attestations, results):
+                if error is not None:
+                    print(f"Rejected attestation {object_key}: {error}")
+                    invocation.count('records_rejected')
+                    if item_identifier not in failures:
+                        failures.append(item_identifier)
+            attestations = [attestation for attestation, error in zip(attestations, results) if error is None]
 
-        # Upload the signed attestation to Archivista
-        archivista_url = os.environ['ARCHIVISTA_URL']
-        headers = {'Content-Type': 'application/json'}
-        response = requests.post(f"{archivista_url}/upload", json=envelope.to_dict(), headers=headers)
-        response.raise_for_status()
+        # Attestations already uploaded under another object, or before their ETag was known, are
+        # skipped too, and the object is recorded so that the next replay skips its download
+        if ledger is not None and attestations:
+            digests = [hashlib.sha256(payload).hexdigest() for _, _, payload, _ in attestations]
+            entries = _ledger_get(ledger, [ingestion_ledger.digest_key(digest) for digest in digests])
+            remaining, aliases_done = [], {}
+            for attestation, digest in zip(attestations, digests):
+                prior = entries.get(ingestion_ledger.digest_key(digest))
+                if prior is not None and prior.get('state') == ingestion_ledger.UPLOADED:
+                    print(f"Skipping {attestation[1]}: attestation {digest} was already uploaded.")
+                    skipped += 1
+                    if attestation[3]:
+                        aliases_done[attestation[3]] = prior
+                    continue
+                remaining.append((attestation, digest, prior))
+            if aliases_done:
+                _ledger_put(ledger, aliases_done)
+        else:
+            remaining = [(attestation, None, None) for attestation in attestations]
 
-        print(f"Successfully uploaded signed attestation for {object_key} to Archivista.")
+        if remaining:
+            # Get the (possibly cached) signers for the keyring's keys in Secrets Manager
+            signers = get_signers(signing_key_arns())
+            keyids = {signer.public_key.keyid for signer in signers} if ledger is not None else set()
+            session = _get_http_session()
+            uploads = []
+            for (item_identifier, object_key, payload, alias), digest, prior in remaining:
+                signatures = None
+                if prior is not None and prior.get('state') == ingestion_ledger.SIGNED and prior.get('signatures'):
+                    # Signatures are reused only while the keyring is unchanged
+                    stored = json.loads(prior['signatures'])
+                    if {signature['keyid'] for signature in stored} == keyids:
+                        signatures = stored
+                uploads.append((item_identifier, (object_key, payload, ledger, digest, alias, signatures)))
+            uploaded = _run_concurrently(
+                executor, functools.partial(_sign_and_upload, signers, session, archivista_url), uploads, failures
+            )
 
+    invocation.count('records_skipped', skipped)
+    invocation.count('records_failed', len(failures))
     return {
         'statusCode': 200,
-        'body': json.dumps('Ingestion complete')
+        'body': json.dumps('Ingestion complete'),
+        'batchItemFailures': [{'itemIdentifier': item_identifier} for item_identifier in failures],
+        'summary': {
+            'records': len(records),
+            'skipped': skipped,
+            'uploaded': len(uploaded),
+            'failed': len(failures)
+        }
     }
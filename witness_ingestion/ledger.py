@@ -0,0 +1,185 @@
+"""
+The ingestion ledger: what has already been signed and uploaded, keyed by attestation content.
+
+Every attestation is identified by the sha256 of its bytes. After its envelope is uploaded to
+Archivista, the ledger marks the digest "uploaded", together with an alias for the S3 object it
+came from (bucket, key and ETag). A retried or replayed record is then skipped, without even being
+downloaded when its ETag is known. When an upload fails, the envelope's signatures are kept with
+the state "signed", so the retry uploads them again instead of signing again.
+
+Two interchangeable backends store the same entries:
+
+    INGESTION_LEDGER_TABLE=<name>   a DynamoDB table with the string partition key "ledger_key"
+    INGESTION_LEDGER_PATH=<path>    a local SQLite file, e.g. for replays from a workstation
+
+Without either, ingestion runs without a ledger.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+SIGNED = "signed"
+UPLOADED = "uploaded"
+# Entry fields; every value is a string
+FIELDS = ("state", "digest", "object", "signatures", "updated_at")
+PARTITION_KEY = "ledger_key"
+# DynamoDB limits per request
+BATCH_GET_SIZE = 100
+BATCH_WRITE_SIZE = 25
+MAX_UNPROCESSED_RETRIES = 5
+
+
+def digest_key(digest):
+    return f"sha256:{digest}"
+
+
+def object_alias(bucket, key, etag):
+    """
+    Returns the ledger key of an S3 object version, or None without an ETag.
+    """
+    if not etag:
+        return None
+    etag = etag.strip('"')
+    return f"object:{bucket}/{key}#{etag}"
+
+
+def entry(state, digest, object_name=None, signatures=None):
+    """
+    Returns a ledger entry. signatures are the envelope's [{"keyid", "sig"}] list.
+    """
+    return {
+        "state": state,
+        "digest": digest,
+        "object": object_name,
+        "signatures": json.dumps(signatures, separators=(',', ':')) if signatures else None,
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+# --------------------------------------------------------------------------------------------------
+# Backends
+# --------------------------------------------------------------------------------------------------
+class SqliteLedger:
+    """
+    Ledger entries in a local SQLite file, shared by the threads of one process.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS ledger ({PARTITION_KEY} TEXT PRIMARY KEY, "
+            + ", ".join(f"{field} TEXT" for field in FIELDS) + ")"
+        )
+
+    def get_many(self, keys):
+        """
+        Returns {key: entry} for the keys that have an entry.
+        """
+        found = {}
+        for chunk in _chunks(set(keys), BATCH_GET_SIZE):
+            placeholders = ", ".join("?" for _ in chunk)
+            with self.lock:
+                rows = self.connection.execute(
+                    f"SELECT {PARTITION_KEY}, {', '.join(FIELDS)} FROM ledger WHERE {PARTITION_KEY} IN ({placeholders})",
+                    chunk
+                ).fetchall()
+            for row in rows:
+                found[row[0]] = dict(zip(FIELDS, row[1:]))
+        return found
+
+    def put_many(self, entries):
+        """
+        Stores {key: entry}, replacing existing entries, in one transaction.
+        """
+        rows = [(key,) + tuple(value.get(field) for field in FIELDS) for key, value in entries.items()]
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(
+                    f"INSERT OR REPLACE INTO ledger VALUES ({', '.join('?' for _ in range(len(FIELDS) + 1))})", rows
+                )
+            except Exception:
+                # Leave no open transaction behind for the next write to trip over
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def close(self):
+        self.connection.close()
+
+
+class DynamoDbLedger:
+    """
+    Ledger entries in a DynamoDB table, read and written in batches.
+    """
+
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+
+    def get_many(self, keys):
+        """
+        Returns {key: entry} for the keys that have an entry.
+        """
+        found = {}
+        for chunk in _chunks(set(keys), BATCH_GET_SIZE):
+            request = {self.table_name: {"Keys": [{PARTITION_KEY: {"S": key}} for key in chunk], "ConsistentRead": True}}
+            for _ in range(MAX_UNPROCESSED_RETRIES):
+                response = self.client.batch_get_item(RequestItems=request)
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    found[item[PARTITION_KEY]["S"]] = {field: item.get(field, {}).get("S") for field in FIELDS}
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+        return found
+
+    def put_many(self, entries):
+        """
+        Stores {key: entry}, replacing existing entries.
+        """
+        items = [
+            {"PutRequest": {"Item": dict(
+                {PARTITION_KEY: {"S": key}},
+                **{field: {"S": value[field]} for field in FIELDS if value.get(field) is not None}
+            )}}
+            for key, value in entries.items()
+        ]
+        for chunk in _chunks(items, BATCH_WRITE_SIZE):
+            request = {self.table_name: chunk}
+            for _ in range(MAX_UNPROCESSED_RETRIES):
+                request = self.client.batch_write_item(RequestItems=request).get("UnprocessedItems")
+                if not request:
+                    break
+            else:
+                raise RuntimeError(f"DynamoDB left {len(request[self.table_name])} ledger writes unprocessed")
+
+
+def ledger_from_env(get_client):
+    """
+    Returns the ledger configured by INGESTION_LEDGER_TABLE or INGESTION_LEDGER_PATH, or None.
+
+    get_client(service_name) returns a boto3 client.
+    """
+    table_name = os.environ.get('INGESTION_LEDGER_TABLE')
+    if table_name:
+        return DynamoDbLedger(get_client('dynamodb'), table_name)
+    path = os.environ.get('INGESTION_LEDGER_PATH')
+    if path:
+        return SqliteLedger(path)
+    return None
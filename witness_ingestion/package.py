@@ -0,0 +1,188 @@
+"""
+Builds the deployment package of the ingestion Lambda.
+
+The package only holds what the handler needs: the handler module, the first-party modules it
+imports (found by following its import statements through the repository, including imports made
+inside functions), the evidence schema, and the third-party dependencies listed in
+witness_ingestion/requirements.txt, installed for the Lambda runtime's Python version and platform.
+boto3 and botocore are left out because the Lambda runtime provides them.
+
+Files keep their repository paths, so the Lambda handler is `witness_ingestion.handler.handler`.
+Entries are written in sorted order with fixed timestamps, so unchanged sources produce a
+byte-identical zip and Terraform only redeploys real changes.
+
+Usage:
+    python -m witness_ingestion.package [--output witness_ingestion.zip] [--no-dependencies]
+                                        [--python-version 3.9] [--platform manylinux2014_x86_64]
+"""
+import os
+import sys
+import ast
+import logging
+import zipfile
+import argparse
+import tempfile
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HANDLER_MODULE = "witness_ingestion.handler"
+# Top-level packages whose modules are copied from the repository when the handler imports them
+FIRST_PARTY_PACKAGES = ("witness_ingestion", "collectors")
+# Files read at runtime rather than imported
+DATA_FILES = ("schema/evidence.schema.json",)
+REQUIREMENTS_PATH = os.path.join(os.path.dirname(__file__), 'requirements.txt')
+
+DEFAULT_OUTPUT = "witness_ingestion.zip"
+DEFAULT_PYTHON_VERSION = "3.9"
+DEFAULT_PLATFORM = "manylinux2014_x86_64"
+# Fixed entry timestamp (the earliest a zip file can hold) for reproducible packages
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+# Installed files that are never imported at runtime
+EXCLUDED_DIRECTORIES = ("__pycache__", "bin")
+EXCLUDED_SUFFIXES = (".pyc", ".pyi")
+
+# --------------------------------------------------------------------------------------------------
+# First-party Modules
+# --------------------------------------------------------------------------------------------------
+def _module_path(module_name, root):
+    """
+    Returns the repository path of a first-party module or package, or None if there is none.
+    """
+    base = os.path.join(*module_name.split('.'))
+    for candidate in (f"{base}.py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(os.path.join(root, candidate)):
+            return candidate
+    return None
+
+def _imported_modules(path, module_name, root):
+    """
+    Returns the names of the modules imported anywhere in a source file.
+    """
+    with open(os.path.join(root, path)) as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    package = module_name if path.endswith("__init__.py") else module_name.rpartition('.')[0]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parts = package.split('.')
+                base = '.'.join(parts[:len(parts) - node.level + 1])
+                base = f"{base}.{node.module}" if node.module else base
+            else:
+                base = node.module
+            names.add(base)
+            # `from package import module` imports a submodule
+            names.update(f"{base}.{alias.name}" for alias in node.names)
+    return names
+
+def first_party_files(module_name=HANDLER_MODULE, root=REPO_ROOT):
+    """
+    Returns the sorted repository paths of the module, the first-party modules it imports
+    transitively, their packages' __init__.py files, and DATA_FILES.
+    """
+    files = set(DATA_FILES)
+    pending = [module_name]
+    seen = set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name.split('.')[0] not in FIRST_PARTY_PACKAGES:
+            continue
+        seen.add(name)
+        path = _module_path(name, root)
+        if path is None:
+            continue
+        files.add(path)
+        # Importing a module imports every package above it
+        parts = name.split('.')
+        pending.extend('.'.join(parts[:i]) for i in range(1, len(parts)))
+        pending.extend(_imported_modules(path, name, root))
+    return sorted(files)
+
+# --------------------------------------------------------------------------------------------------
+# Dependencies
+# --------------------------------------------------------------------------------------------------
+def install_dependencies(target, python_version=DEFAULT_PYTHON_VERSION, platform=DEFAULT_PLATFORM,
+                         requirements=REQUIREMENTS_PATH):
+    """
+    Installs the requirements as binary wheels for the Lambda runtime into target.
+    """
+    subprocess.run([
+        sys.executable, '-m', 'pip', 'install',
+        '--target', target,
+        '--requirement', requirements,
+        '--platform', platform,
+        '--implementation', 'cp',
+        '--python-version', python_version,
+        '--only-binary=:all:',
+        '--no-compile',
+        '--quiet'
+    ], check=True)
+
+def _installed_files(target):
+    """
+    Yields (path in the package, path on disk) for every installed file that is needed at runtime.
+    """
+    for directory, subdirectories, filenames in os.walk(target):
+        subdirectories[:] = sorted(d for d in subdirectories if d not in EXCLUDED_DIRECTORIES)
+        for filename in filenames:
+            if filename.endswith(EXCLUDED_SUFFIXES):
+                continue
+            local_path = os.path.join(directory, filename)
+            yield os.path.relpath(local_path, target).replace(os.sep, '/'), local_path
+
+# --------------------------------------------------------------------------------------------------
+# Package
+# --------------------------------------------------------------------------------------------------
+def _write_entry(archive, name, local_path):
+    info = zipfile.ZipInfo(name, date_time=ZIP_TIMESTAMP)
+    info.external_attr = 0o644 << 16
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with open(local_path, 'rb') as f:
+        archive.writestr(info, f.read())
+
+def build_package(output, dependencies=True, python_version=DEFAULT_PYTHON_VERSION, platform=DEFAULT_PLATFORM,
+                  root=REPO_ROOT):
+    """
+    Writes the ingestion Lambda package to output and returns the names of its entries.
+    """
+    entries = {path: os.path.join(root, path) for path in first_party_files(root=root)}
+
+    with tempfile.TemporaryDirectory() as target:
+        if dependencies:
+            install_dependencies(target, python_version, platform)
+            for name, local_path in _installed_files(target):
+                # First-party files win over anything an installed distribution might ship
+                entries.setdefault(name, local_path)
+
+        with zipfile.ZipFile(output, 'w') as archive:
+            for name in sorted(entries):
+                _write_entry(archive, name, entries[name])
+
+    logger.info(f"Wrote {len(entries)} files to {output}")
+    return sorted(entries)
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+# --------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the scoutos ingestion Lambda package.")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--no-dependencies', action='store_true', help="Only package first-party files")
+    parser.add_argument('--python-version', default=DEFAULT_PYTHON_VERSION, help="Lambda runtime Python version")
+    parser.add_argument('--platform', default=DEFAULT_PLATFORM, help="Wheel platform tag of the Lambda architecture")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    build_package(args.output, not args.no_dependencies, args.python_version, args.platform)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Replays the attestations under a bucket prefix through the ingestion handler.
+
+Objects are listed page by page and handed to witness_ingestion.handler in batches of S3 events
+carrying each object's ETag, so a replay takes the same path as a live notification. With an
+ingestion ledger configured, objects that were already uploaded are skipped without being
+downloaded, and an interrupted replay can simply be run again:
+
+    INGESTION_LEDGER_PATH=ledger.sqlite3 ARCHIVISTA_URL=... SIGNING_KEY_ARN=... \\
+        python -m witness_ingestion.replay --bucket scoutos-evidence-bucket --prefix evidence/
+
+A JSON summary is printed at the end; the command exits non-zero if any record failed.
+"""
+import sys
+import json
+import time
+import argparse
+import itertools
+
+from witness_ingestion import handler as ingestion
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+DEFAULT_BATCH_SIZE = 100  # records per handler invocation
+# Failed object keys listed in the summary
+MAX_REPORTED_FAILURES = 100
+
+
+def iter_objects(s3, bucket_name, prefix="", limit=None):
+    """
+    Yields (key, etag) for the objects under prefix, listing one page at a time.
+    """
+    pages = s3.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=prefix)
+    objects = (
+        (s3_object['Key'], s3_object.get('ETag'))
+        for page in pages for s3_object in page.get('Contents', ())
+        if not s3_object['Key'].endswith('/')
+    )
+    return itertools.islice(objects, limit)
+
+
+def s3_event(bucket_name, objects):
+    """
+    Returns an S3 notification event for (key, etag) pairs.
+    """
+    return {'Records': [
+        {'s3': {'bucket': {'name': bucket_name}, 'object': {'key': key, 'eTag': etag}}}
+        for key, etag in objects
+    ]}
+
+
+def replay(bucket_name, prefix="", batch_size=DEFAULT_BATCH_SIZE, limit=None, s3=None):
+    """
+    Sends the objects under prefix through the handler and returns a summary of the run.
+    """
+    s3 = s3 or ingestion._get_client('s3')
+    summary = {"listed": 0, "skipped": 0, "uploaded": 0, "failed": 0, "failures": []}
+    started = time.perf_counter()
+    objects = iter_objects(s3, bucket_name, prefix, limit)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            break
+        result = ingestion.handler(s3_event(bucket_name, batch), None)
+        summary["listed"] += len(batch)
+        for field in ("skipped", "uploaded", "failed"):
+            summary[field] += result['summary'][field]
+        for failure in result['batchItemFailures']:
+            if len(summary["failures"]) < MAX_REPORTED_FAILURES:
+                summary["failures"].append(failure['itemIdentifier'])
+        print(f"Replayed {summary['listed']} objects: {summary['uploaded']} uploaded, "
+              f"{summary['skipped']} skipped, {summary['failed']} failed", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    summary["elapsed_seconds"] = round(elapsed, 3)
+    summary["records_per_second"] = round(summary["listed"] / elapsed, 1) if elapsed else 0.0
+    return summary
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+# --------------------------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the attestations under an S3 prefix through ingestion.")
+    parser.add_argument('--bucket', required=True, help="Evidence bucket name")
+    parser.add_argument('--prefix', default="", help="Key prefix to replay, e.g. evidence/")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Records per handler invocation")
+    parser.add_argument('--limit', type=int, default=None, help="Stop after this many objects")
+    args = parser.parse_args(argv)
+
+    summary = replay(args.bucket, args.prefix, args.batch_size, args.limit)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Runs a generated collector pack against local stand-ins instead of the real API and S3.
+
+A stub HTTP server serves as many pages as requested, built from a sample response and paginated
+the way the pack expects (Link headers, cursors or page numbers). Evidence goes to an in-memory S3.
+The report says what the collector did: requests made, bytes received and written, and timing.
+"""
+import copy
+import json
+import time
+import types
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from collectors.runtime.collector import Collector
+from collectors.runtime.http_client import CollectorHttpClient
+from collectors.runtime.pagination import Pagination
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+DRY_RUN_BUCKET = "dry-run-evidence"
+DRY_RUN_TARGET = "dry-run"
+# Query parameter the stub puts in its Link header next URLs
+LINK_PAGE_PARAM = "dry_run_page"
+# Requests listed individually in the report
+MAX_REPORTED_REQUESTS = 20
+
+
+def _with_path(document, path, value):
+    """
+    Returns a copy of document with value set at a dotted path, creating objects along the way.
+    """
+    if not path:
+        return value
+    document = dict(document) if isinstance(document, dict) else {}
+    step, _, rest = path.partition('.')
+    document[step] = _with_path(document.get(step), rest, value)
+    return document
+
+# --------------------------------------------------------------------------------------------------
+# Stand-ins
+# --------------------------------------------------------------------------------------------------
+class StubPages:
+    """
+    Builds the body of every page the stub serves from a sample response.
+    """
+
+    def __init__(self, pagination, sample_response, pages, items_per_page=None):
+        self.pagination = pagination
+        self.sample = sample_response if sample_response is not None else [{"id": 1}]
+        self.sample_items = Pagination(**pagination.model_dump()).page_items(self.sample) or [{}]
+        self.page_count = 1 if pagination.style == "none" else pages
+        self.items_per_page = items_per_page or pagination.page_size or len(self.sample_items)
+
+    def items(self, index):
+        if index >= self.page_count:
+            return []
+        start = index * self.items_per_page
+        return [
+            copy.deepcopy(self.sample_items[position % len(self.sample_items)])
+            for position in range(start, start + self.items_per_page)
+        ]
+
+    def body(self, index):
+        items = self.items(index)
+        if self.pagination.items_path:
+            body = _with_path(self.sample, self.pagination.items_path, items)
+        elif isinstance(self.sample, list):
+            body = items
+        else:
+            body = items[0] if items else {}
+        if self.pagination.style == "cursor":
+            cursor = f"cursor-{index + 1}" if index + 1 < self.page_count else None
+            body = _with_path(body, self.pagination.cursor_path, cursor)
+        return body
+
+    def index(self, query):
+        """
+        Returns the page index a request asks for from its query parameters.
+        """
+        style = self.pagination.style
+        try:
+            if style == "link":
+                return int(query.get(LINK_PAGE_PARAM, ["0"])[0])
+            if style == "cursor":
+                cursor = query.get(self.pagination.cursor_param, ["cursor-0"])[0]
+                return int(cursor.rsplit('-', 1)[1])
+            if style == "page":
+                return int(query[self.pagination.page_param][0]) - self.pagination.start_page
+        except (KeyError, IndexError, ValueError):
+            return self.page_count
+        return 0
+
+
+class StubServer:
+    """
+    A local HTTP server that answers every request with the next page of StubPages.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                index = stub.pages.index(query)
+                response = json.dumps(stub.pages.body(index)).encode('utf-8')
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                if stub.pages.pagination.style == "link" and index + 1 < stub.pages.page_count:
+                    query[LINK_PAGE_PARAM] = [str(index + 1)]
+                    next_url = f"{stub.url}{url.path}?{urlencode(query, doseq=True)}"
+                    self.send_header("Link", f'<{next_url}>; rel="next"')
+                self.end_headers()
+                self.wfile.write(response)
+
+            do_GET = do_POST = do_PUT = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MemoryS3:
+    """
+    The S3 calls BatchEvidenceWriter makes, kept in memory.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self._uploads = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body)
+        return {}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = str(len(self._uploads) + 1)
+        self._uploads[upload_id] = []
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._uploads[UploadId].append(bytes(Body))
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.objects[Key] = b"".join(self._uploads.pop(UploadId))
+        return {}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._uploads.pop(UploadId, None)
+        return {}
+
+# --------------------------------------------------------------------------------------------------
+# Dry Run
+# --------------------------------------------------------------------------------------------------
+def load_collector_class(python_code, module_name="workbench_dry_run"):
+    """
+    Executes generated collector source as a module and returns (module, collector class).
+    """
+    module = types.ModuleType(module_name)
+    exec(compile(python_code, f"<{module_name}>", "exec"), module.__dict__)
+    for value in module.__dict__.values():
+        if isinstance(value, type) and issubclass(value, Collector) and value.__module__ == module_name:
+            return module, value
+    raise ValueError("The collector pack defines no Collector subclass")
+
+
+def run(config, python_code):
+    """
+    Runs the pack's collector against a stub built from config.dry_run and returns the report.
+    """
+    dry_run = config.dry_run
+    module, collector_class = load_collector_class(python_code)
+    requests_made = []
+    s3_client = MemoryS3()
+
+    def record(response, *args, **kwargs):
+        requests_made.append({
+            "method": response.request.method,
+            "url": response.url,
+            "status": response.status_code,
+            "bytes": len(response.content),
+            "ms": round(response.elapsed.total_seconds() * 1000, 2)
+        })
+
+    http_client = CollectorHttpClient(max_retries=0)
+    http_client.session.hooks['response'].append(record)
+
+    class DryRunCollector(collector_class):
+        def http_client(self):
+            return http_client
+
+        def request_headers(self):
+            # Placeholders instead of the credentials the real collector reads from its secret
+            return dict(module.HEADERS, **{name: "dry-run" for name in module.SECRET_HEADERS})
+
+    DryRunCollector.s3_client = s3_client
+
+    pages = StubPages(config.pagination, dry_run.sample_response, dry_run.pages, dry_run.items_per_page)
+    report = {"status": "success"}
+    with StubServer(pages) as stub:
+        url = urlsplit(config.api_request.url)
+        module.URL = f"{stub.url}{url.path}" + (f"?{url.query}" if url.query else "")
+
+        collector = DryRunCollector()
+        collector.evidence_bucket = DRY_RUN_BUCKET
+        collector.target_account_id = DRY_RUN_TARGET
+        start = time.perf_counter()
+        try:
+            collector.collect()
+        except Exception as e:
+            logger.warning(f"Dry run of {config.collector_name} failed: {e}")
+            report = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        elapsed = time.perf_counter() - start
+        http_client.session.close()
+
+    report.update({
+        "requests": len(requests_made),
+        "items": collector.summary.get("items", 0),
+        "bytes_received": sum(request["bytes"] for request in requests_made),
+        "objects_written": len(s3_client.objects),
+        "bytes_written": sum(len(body) for body in s3_client.objects.values()),
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "request_ms": round(sum(request["ms"] for request in requests_made), 2),
+        "request_log": requests_made[:MAX_REPORTED_REQUESTS]
+    })
+    return report
@@ -0,0 +1,276 @@
+"""
+Turns a CollectorConfig into a collector pack: a manifest, the Lambda source and its Terraform.
+
+The generated collector streams: pages are fetched with the pooled runtime HTTP client as they are
+consumed, every transformation is a generator over the items of the previous one, and each item
+becomes an evidence object in gzip NDJSON batch parts. No stage holds more than one page.
+
+Credentials seen in the workbench are never written into the code. Request headers that carry
+them are read from the SECRET_NAME secret when the collector runs instead.
+"""
+import re
+import json
+
+from collectors.runtime.pagination import STYLES
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+# Header names that carry credentials, matched case-insensitively
+SECRET_HEADER_PATTERN = re.compile(r'authorization|cookie|token|api[-_]?key|secret|password', re.IGNORECASE)
+FILTER_OPERATORS = ("equals", "not_equals", "in", "exists")
+
+PYTHON_TEMPLATE = '''import os
+import logging
+
+from collectors.runtime.aws import get_secret
+from collectors.runtime.batch_writer import BatchEvidenceWriter
+from collectors.runtime.collector import Collector
+from collectors.runtime.http_client import get_http_client
+from collectors.runtime.pagination import Pagination, get_path
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+COLLECTOR_NAME = {name}
+METHOD = {method}
+URL = {url}
+PARAMS = {params}
+HEADERS = {headers}
+BODY = {body}
+# Headers whose values are read from the SECRET_NAME secret, a JSON object keyed by header name
+SECRET_HEADERS = {secret_headers}
+PAGINATION = Pagination({pagination})
+
+# --------------------------------------------------------------------------------------------------
+# Transformations
+# --------------------------------------------------------------------------------------------------
+{transformations}
+
+# Applied in order; each takes and returns an iterator of items
+TRANSFORMATIONS = ({transformation_names})
+
+# --------------------------------------------------------------------------------------------------
+# Collector
+# --------------------------------------------------------------------------------------------------
+class {class_name}(Collector):
+    """
+    Generated by the Collector Workbench.
+
+    Writes one evidence object per item, in batch parts under <name>/batches/<batch_id>/.
+    """
+
+    name = COLLECTOR_NAME
+    required_environment = {required_environment}
+
+    def http_client(self):
+        return get_http_client()
+
+    def request_headers(self):
+        headers = dict(HEADERS)
+        if SECRET_HEADERS:
+            secret = get_secret(os.environ['SECRET_NAME']) or {{}}
+            headers.update({{name: secret[name] for name in SECRET_HEADERS if name in secret}})
+        return headers
+
+    def items(self):
+        """
+        Yields the transformed items of every page, fetching pages as they are consumed.
+        """
+        items = PAGINATION.items(self.http_client(), METHOD, URL, params=PARAMS, headers=self.request_headers(), json=BODY)
+        for transformation in TRANSFORMATIONS:
+            items = transformation(items)
+        return items
+
+    def collect(self):
+        item_count = 0
+        with BatchEvidenceWriter(self.s3_client, self.evidence_bucket, self.name) as batch_writer:
+            for item in self.items():
+                batch_writer.add(self.create_evidence(item))
+                item_count += 1
+        logger.info(f"Collected {{item_count}} items.")
+        self.summary["items"] = item_count
+        return None
+
+# --------------------------------------------------------------------------------------------------
+# Main Handler
+# --------------------------------------------------------------------------------------------------
+def handler(event, context):
+    """
+    Main Lambda handler function.
+    """
+    return {class_name}(event, context).run()
+'''
+
+TERRAFORM_TEMPLATE = '''# Terraform code will be generated here.
+# Package collectors/{name}/collector.py with collectors/runtime and deploy it like the other
+# collectors in terraform/main.tf, with handler "collector.handler".{secret_note}
+'''
+
+
+class PackError(ValueError):
+    """
+    Raised for a CollectorConfig that cannot be turned into a collector.
+    """
+
+
+def class_name(collector_name):
+    """
+    Returns the CamelCase class name for a collector name such as "my-test-collector".
+    """
+    words = [word for word in re.split(r'[^0-9A-Za-z]+', collector_name) if word]
+    name = "".join(word[:1].upper() + word[1:] for word in words) or "Generated"
+    if name[0].isdigit():
+        name = f"Collector{name}"
+    return name if name.endswith("Collector") else f"{name}Collector"
+
+# --------------------------------------------------------------------------------------------------
+# Transformations
+# --------------------------------------------------------------------------------------------------
+def _filter_condition(transformation):
+    field = repr(transformation.get('field'))
+    operators = [operator for operator in FILTER_OPERATORS if operator in transformation]
+    if not transformation.get('field') or len(operators) != 1:
+        raise PackError(f"A filter needs a field and one of {', '.join(FILTER_OPERATORS)}: {transformation}")
+    operator = operators[0]
+    value = transformation[operator]
+    if operator == "equals":
+        return f"get_path(item, {field}) == {value!r}"
+    if operator == "not_equals":
+        return f"get_path(item, {field}) != {value!r}"
+    if operator == "in":
+        if not isinstance(value, list):
+            raise PackError(f"A filter with 'in' needs a list of values: {transformation}")
+        return f"get_path(item, {field}) in {tuple(value)!r}"
+    return f"(get_path(item, {field}) is not None) is {bool(value)!r}"
+
+
+def _transformation_source(function_name, transformation):
+    """
+    Returns the source of a generator function that applies one transformation.
+    """
+    kind = transformation.get('type')
+    description = json.dumps(transformation, sort_keys=True)
+    header = f"def {function_name}(items):\n    # {description}\n"
+    if kind == "filter":
+        return header + f"    return (item for item in items if {_filter_condition(transformation)})\n"
+    if kind == "select":
+        fields = tuple(transformation.get('fields') or ())
+        if not fields:
+            raise PackError(f"A select needs fields: {transformation}")
+        return header + f"    return ({{field: get_path(item, field) for field in {fields!r}}} for item in items)\n"
+    if kind == "rename":
+        renames = transformation.get('fields') or {}
+        if not renames:
+            raise PackError(f"A rename needs fields mapping old to new names: {transformation}")
+        return header + (
+            f"    renames = {renames!r}\n"
+            f"    return ({{renames.get(key, key): value for key, value in item.items()}} for item in items)\n"
+        )
+    if kind == "explode":
+        if not transformation.get('field'):
+            raise PackError(f"An explode needs the field holding a list: {transformation}")
+        return header + (
+            f"    for item in items:\n"
+            f"        yield from get_path(item, {transformation['field']!r}) or ()\n"
+        )
+    if kind == "limit":
+        count = transformation.get('count')
+        if not isinstance(count, int) or count < 0:
+            raise PackError(f"A limit needs a non-negative count: {transformation}")
+        return header + (
+            f"    for index, item in enumerate(items):\n"
+            f"        if index >= {count}:\n"
+            f"            return\n"
+            f"        yield item\n"
+        )
+    raise PackError(f"Unknown transformation type {kind!r}: {transformation}")
+
+
+def _output_mapping_source(output_mapping):
+    return (
+        "def map_output(items):\n"
+        "    # Evidence payload field -> dotted path in the item\n"
+        f"    mapping = {output_mapping!r}\n"
+        "    return ({field: get_path(item, path) for field, path in mapping.items()} for item in items)\n"
+    )
+
+# --------------------------------------------------------------------------------------------------
+# Pack
+# --------------------------------------------------------------------------------------------------
+def _pagination_arguments(pagination):
+    """
+    Returns the Pagination(...) keyword arguments that differ from the defaults.
+    """
+    if pagination.style not in STYLES:
+        raise PackError(f"Unknown pagination style {pagination.style!r}, expected one of {', '.join(STYLES)}")
+    if pagination.style == "cursor" and not pagination.cursor_path:
+        raise PackError("Cursor pagination needs the cursor_path of the next cursor in the response")
+    defaults = type(pagination)()
+    arguments = [
+        f"{field}={value!r}" for field, value in pagination.model_dump().items()
+        if value != getattr(defaults, field)
+    ]
+    return ", ".join(arguments)
+
+
+def split_headers(headers):
+    """
+    Returns (plain headers, names of headers that carry credentials).
+    """
+    secret_headers = tuple(sorted(name for name in headers if SECRET_HEADER_PATTERN.search(name)))
+    plain = {name: value for name, value in headers.items() if name not in secret_headers}
+    return plain, secret_headers
+
+
+def build_pack(config):
+    """
+    Returns a collector pack dict for a CollectorConfig.
+
+    Raises PackError if a transformation or the pagination settings are invalid.
+    """
+    request = config.api_request
+    headers, secret_headers = split_headers(request.headers)
+
+    functions = [
+        _transformation_source(f"transform_{index}", transformation)
+        for index, transformation in enumerate(config.transformations)
+    ]
+    names = [f"transform_{index}" for index in range(len(functions))]
+    if config.output_mapping:
+        functions.append(_output_mapping_source(config.output_mapping))
+        names.append("map_output")
+
+    required_environment = ("EVIDENCE_BUCKET", "TARGET_ACCOUNT_ID") + (("SECRET_NAME",) if secret_headers else ())
+    python_code = PYTHON_TEMPLATE.format(
+        name=json.dumps(config.collector_name),
+        method=json.dumps(request.method.upper()),
+        url=json.dumps(request.url),
+        params=repr(request.params),
+        headers=repr(headers),
+        body=repr(request.data if request.method.upper() != "GET" else None),
+        secret_headers=repr(secret_headers),
+        pagination=_pagination_arguments(config.pagination),
+        transformations="\n\n".join(functions) if functions else "# None configured",
+        transformation_names=", ".join(names) + ("," if len(names) == 1 else ""),
+        required_environment=repr(required_environment),
+        class_name=class_name(config.collector_name)
+    )
+    secret_note = ""
+    if secret_headers:
+        secret_note = f"\n# Set SECRET_NAME to a secret with the keys {', '.join(secret_headers)}."
+    return {
+        "manifest": {
+            "name": config.collector_name,
+            "source": {"method": request.method.upper(), "url": request.url},
+            "pagination": config.pagination.model_dump(),
+            "transformations": config.transformations,
+            "output_mapping": config.output_mapping,
+            "evidence_layout": "batched",
+            "secret_headers": list(secret_headers)
+        },
+        "python_code": python_code,
+        "terraform_code": TERRAFORM_TEMPLATE.format(name=config.collector_name, secret_note=secret_note)
+    }
@@ -0,0 +1,360 @@
+"""
+The Collector Workbench backend.
+
+/proxy makes the API calls the frontend explores on the user's behalf, so the browser is not held
+back by CORS. Calls go through one pooled async client: no worker is blocked for the length of an
+upstream round trip, and connections to a host are reused across calls. Upstream bodies are relayed
+to the browser as they arrive, so large responses are never buffered whole. Each upstream host has a
+concurrency limit, and successful GET and HEAD responses are cached for a while, keyed on method,
+URL, query parameters and headers, so repeating a call is answered locally.
+
+/build turns what the user built into a collector pack, and can dry-run it against a local stub.
+
+Run locally next to the Vite dev server:
+
+    uvicorn workbench.backend.main:app --port 8000
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+
+from workbench.backend import dry_run
+from workbench.backend.generator import PackError, build_pack
+from workbench.backend.models import ApiRequest, CollectorConfig, CollectorPack
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------------------------------
+# Constants
+# --------------------------------------------------------------------------------------------------
+MAX_CONNECTIONS = int(os.environ.get('WORKBENCH_MAX_CONNECTIONS', '100'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('WORKBENCH_MAX_KEEPALIVE_CONNECTIONS', '20'))
+# Concurrent upstream calls per host; further calls wait for a slot
+PER_HOST_CONCURRENCY = int(os.environ.get('WORKBENCH_PER_HOST_CONCURRENCY', '8'))
+# Hosts whose limits are kept; the least recently used idle ones are dropped beyond this
+MAX_TRACKED_HOSTS = int(os.environ.get('WORKBENCH_MAX_TRACKED_HOSTS', '1024'))
+QUEUE_TIMEOUT = float(os.environ.get('WORKBENCH_QUEUE_TIMEOUT', '30'))  # seconds to wait for a slot
+UPSTREAM_TIMEOUT = float(os.environ.get('WORKBENCH_UPSTREAM_TIMEOUT', '30'))  # seconds
+# Seconds a cached response is served for; 0 turns the cache off
+CACHE_TTL = float(os.environ.get('WORKBENCH_CACHE_TTL', '300'))
+CACHE_MAX_BYTES = int(os.environ.get('WORKBENCH_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Larger responses are streamed but not cached
+CACHE_MAX_ENTRY_BYTES = int(os.environ.get('WORKBENCH_CACHE_MAX_ENTRY_BYTES', str(8 * 1024 * 1024)))
+CACHEABLE_METHODS = ("GET", "HEAD")
+ALLOWED_ORIGINS = os.environ.get('WORKBENCH_ALLOWED_ORIGINS', 'http://localhost:5173').split(',')
+# Upstream response headers that describe the upstream connection rather than the response
+HOP_BY_HOP_HEADERS = frozenset((
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "set-cookie"
+))
+CACHE_STATUS_HEADER = "X-Workbench-Cache"
+
+# --------------------------------------------------------------------------------------------------
+# Response Cache
+# --------------------------------------------------------------------------------------------------
+class ResponseCache:
+    """
+    Recent upstream responses in memory, least recently used first out once max_bytes is reached.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, max_entry_bytes=CACHE_MAX_ENTRY_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def key(api_request):
+        """
+        Returns the cache key of a call: its method, URL, query parameters and headers.
+
+        Header names are case-insensitive, so the same call with another credential is another entry.
+        """
+        headers = sorted((name.lower(), value) for name, value in api_request.headers.items())
+        document = [api_request.method.upper(), api_request.url, sorted(api_request.params.items()), headers]
+        return hashlib.sha256(json.dumps(document, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Returns (status_code, headers, body) for a fresh entry, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, status_code, headers, body = entry
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return status_code, headers, body
+
+    def set(self, key, status_code, headers, body):
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, status_code, headers, bytes(body))
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[3])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+# --------------------------------------------------------------------------------------------------
+# Upstream Connection Pool
+# --------------------------------------------------------------------------------------------------
+class UpstreamPool:
+    """
+    The pooled async client and per-host concurrency limits of one event loop.
+    """
+
+    def __init__(self, per_host_concurrency=PER_HOST_CONCURRENCY, max_connections=MAX_CONNECTIONS,
+                 max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS, timeout=UPSTREAM_TIMEOUT,
+                 max_tracked_hosts=MAX_TRACKED_HOSTS):
+        self.loop = asyncio.get_running_loop()
+        self.per_host_concurrency = per_host_concurrency
+        self.max_tracked_hosts = max_tracked_hosts
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+            timeout=timeout,
+            follow_redirects=True
+        )
+        # host -> [semaphore, calls holding or waiting for a slot], least recently used first
+        self._host_limits = OrderedDict()
+
+    async def acquire(self, host, timeout):
+        """
+        Waits up to timeout seconds for a call slot to host and returns the function that frees it,
+        which may be called more than once. Raises asyncio.TimeoutError.
+        """
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = [asyncio.Semaphore(self.per_host_concurrency), 0]
+        self._host_limits.move_to_end(host)
+        limit[1] += 1
+        self._evict_idle_hosts()
+        try:
+            await asyncio.wait_for(limit[0].acquire(), timeout)
+        except BaseException:
+            limit[1] -= 1
+            raise
+
+        released = False
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                limit[0].release()
+                limit[1] -= 1
+        return release
+
+    def _evict_idle_hosts(self):
+        # Hosts with calls in flight keep their semaphore, so their limit keeps holding
+        excess = len(self._host_limits) - self.max_tracked_hosts
+        if excess <= 0:
+            return
+        for host in [host for host, (_, calls) in self._host_limits.items() if not calls][:excess]:
+            del self._host_limits[host]
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_pool = None
+
+def get_pool():
+    """
+    Returns the UpstreamPool of the running event loop, creating it on first use.
+
+    Under uvicorn there is one loop for the life of the server, so every call shares one pool.
+    Connections cannot move between loops, so a new loop gets a new pool.
+    """
+    global _pool
+    if _pool is None or _pool.loop is not asyncio.get_running_loop():
+        _pool = UpstreamPool()
+    return _pool
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.aclose()
+
+# --------------------------------------------------------------------------------------------------
+# Application
+# --------------------------------------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await close_pool()
+
+app = FastAPI(title="scoutos Collector Workbench", lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=ALLOWED_ORIGINS,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=[CACHE_STATUS_HEADER]
+)
+
+
+def _response_headers(headers, cache_status):
+    """
+    Returns the upstream response headers to pass to the browser.
+
+    Content-Encoding and Content-Length are kept: the body is relayed as the upstream sent it.
+    """
+    relayed = {name: value for name, value in headers.items() if name.lower() not in HOP_BY_HOP_HEADERS}
+    relayed[CACHE_STATUS_HEADER] = cache_status
+    return relayed
+
+
+async def _send(pool, api_request):
+    """
+    Sends the call upstream and returns the response with its body still unread.
+    """
+    upstream_request = pool.client.build_request(
+        api_request.method.upper(),
+        api_request.url,
+        headers=api_request.headers,
+        params=api_request.params,
+        json=api_request.data
+    )
+    try:
+        return await pool.client.send(upstream_request, stream=True)
+    except (httpx.UnsupportedProtocol, httpx.InvalidURL) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid URL {api_request.url}: {e}")
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail=f"Timed out calling {api_request.url}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Error calling {api_request.url}: {e}")
+
+
+async def _relay(upstream, cache_key):
+    """
+    Yields the upstream body as it arrives, then caches it if cache_key is set and it fits.
+    """
+    body = bytearray() if cache_key else None
+    async for chunk in upstream.aiter_raw():
+        if body is not None:
+            body.extend(chunk)
+            if len(body) > response_cache.max_entry_bytes:
+                body = None
+        yield chunk
+    if body is not None:
+        headers = _response_headers(upstream.headers, "hit")
+        response_cache.set(cache_key, upstream.status_code, headers, body)
+
+
+class UpstreamResponse(StreamingResponse):
+    """
+    Relays an upstream response to the browser. The upstream response is closed and its host slot
+    freed once the response is done, also when its body was never sent because the browser went
+    away or sending failed.
+    """
+
+    def __init__(self, upstream, release, cache_key):
+        super().__init__(
+            _relay(upstream, cache_key),
+            status_code=upstream.status_code,
+            headers=_response_headers(upstream.headers, "miss" if cache_key else "bypass")
+        )
+        self.upstream = upstream
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.upstream.aclose()
+            finally:
+                self.release()
+
+
+@app.get("/")
+def read_root():
+    return {"message": "Welcome to the scoutos Collector Workbench Backend!"}
+
+
+@app.post("/proxy")
+async def proxy(api_request: ApiRequest):
+    """
+    Calls the upstream API and relays its status, headers and body.
+    """
+    method = api_request.method.upper()
+    cache_key = None
+    if api_request.cache and method in CACHEABLE_METHODS and response_cache.enabled:
+        cache_key = response_cache.key(api_request)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            status_code, headers, body = cached
+            return Response(content=body, status_code=status_code, headers=headers)
+
+    pool = get_pool()
+    host = urlsplit(api_request.url).netloc.lower()
+    try:
+        release = await pool.acquire(host, QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail=f"Too many concurrent calls to {host}; try again shortly")
+
+    try:
+        upstream = await _send(pool, api_request)
+    except BaseException:
+        release()
+        raise
+
+    if not 200 <= upstream.status_code < 300:
+        cache_key = None
+    logger.info(f"{method} {api_request.url} -> {upstream.status_code}")
+    return UpstreamResponse(upstream, release, cache_key)
+
+
+@app.post("/build", response_model=CollectorPack)
+def build(config: CollectorConfig):
+    """
+    Generates a collector pack from the workbench configuration.
+
+    With dry_run set, the generated collector is also run against a local stub of the API and the
+    pack carries its report.
+    """
+    try:
+        pack = build_pack(config)
+    except PackError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if config.dry_run is not None:
+        pack["dry_run"] = dry_run.run(config, pack["python_code"])
+    return pack
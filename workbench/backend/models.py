@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ApiRequest(BaseModel):
+    """
+    An API call explored through the workbench proxy.
+    """
+
+    method: str = "GET"
+    url: str
+    headers: Dict[str, str] = Field(default_factory=dict)
+    params: Dict[str, Any] = Field(default_factory=dict)
+    # JSON request body, sent for methods other than GET
+    data: Optional[Any] = None
+    # Set to False to bypass the proxy's response cache for this call
+    cache: bool = True
+
+
+class Pagination(BaseModel):
+    """
+    How the API pages its results; see collectors/runtime/pagination.py.
+    """
+
+    style: str = "none"  # "none", "link", "cursor" or "page"
+    items_path: Optional[str] = None
+    cursor_path: Optional[str] = None
+    cursor_param: str = "cursor"
+    page_param: str = "page"
+    page_size_param: Optional[str] = None
+    page_size: Optional[int] = None
+    start_page: int = 1
+    max_pages: Optional[int] = None
+
+
+class DryRun(BaseModel):
+    """
+    Runs the generated collector against a local stub that serves pages built from a sample
+    response, instead of the real API.
+    """
+
+    # A response body as seen in the workbench; items found at the pagination's items_path are
+    # repeated to fill every page
+    sample_response: Any = None
+    pages: int = Field(3, ge=1, le=100)
+    items_per_page: Optional[int] = Field(None, ge=1, le=10000)
+
+
+class CollectorConfig(BaseModel):
+    """
+    What the workbench user built: the API call, how to transform its response and where each
+    field lands in the evidence payload.
+    """
+
+    collector_name: str
+    api_request: ApiRequest
+    transformations: List[Dict[str, Any]] = Field(default_factory=list)
+    output_mapping: Dict[str, Any] = Field(default_factory=dict)
+    pagination: Pagination = Field(default_factory=Pagination)
+    # Set to also run the generated collector against a local stub
+    dry_run: Optional[DryRun] = None
+
+
+class CollectorPack(BaseModel):
+    """
+    A generated collector: its manifest, Lambda source and Terraform.
+    """
+
+    manifest: Dict[str, Any]
+    python_code: str
+    terraform_code: str
+    # The dry run report, when one was requested
+    dry_run: Optional[Dict[str, Any]] = None